@@ -0,0 +1,194 @@
+# coding: utf-8
+
+# Standard Python libraries
+import importlib
+import time
+
+# https://docs.pytest.org/en/latest/
+import pytest
+
+# https://pandas.pydata.org/
+import pandas as pd
+
+# https://requests.readthedocs.io/
+import requests
+
+from yabadaba import load_database, load_record, recordmanager
+from yabadaba.record import Record
+
+class CDCSFAQ(Record):
+    """Minimal record style used for the CDCS database tests"""
+
+    @property
+    def style(self):
+        return 'cdcs_faq'
+
+    @property
+    def modelroot(self):
+        return 'faq'
+
+    def _init_values(self):
+        self._add_value('longstr', 'question')
+        self._add_value('longstr', 'answer')
+
+recordmanager.import_style('cdcs_faq', __name__, classname='CDCSFAQ')
+
+def http_error(message, status):
+    """Builds an HTTPError with a response status code"""
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(message, response=response)
+
+class FakeCDCS():
+    """Stand-in for a cdcs.CDCS client with a paged query interface"""
+
+    def __init__(self, names, pagesize=10):
+        self.pagesize = pagesize
+        self.records = []
+        for name in names:
+            record = load_record('cdcs_faq', name=name, question='q', answer='a')
+            self.records.append({'title': name, 'template_title': 'cdcs_faq',
+                                 'xml_content': record.build_model().xml()})
+        self.failing = set()
+        self.failingpages = set()
+        self.delays = {}
+        self.pages = []
+
+    def matches(self, title):
+        time.sleep(self.delays.get(title, 0))
+        if title in self.failing:
+            raise http_error(f'query for {title} failed', 500)
+        return [record for record in self.records
+                if title is None or record['title'] == title]
+
+    def query(self, title=None, template=None, mongoquery=None, keyword=None,
+              page=None):
+        self.pages.append((title, page))
+        records = self.matches(title)
+        if page in self.failingpages:
+            raise http_error(f'page {page} failed', 503)
+
+        # Like pycdcs, all pages are combined if page is None
+        if page is None:
+            return pd.DataFrame(records, columns=['title', 'template_title', 'xml_content'])
+
+        # Like CDCS, pages past the last page are invalid
+        start = (page - 1) * self.pagesize
+        if page > 1 and start >= len(records):
+            raise http_error('invalid page', 404)
+        return pd.DataFrame(records[start:start + self.pagesize],
+                            columns=['title', 'template_title', 'xml_content'])
+
+    def query_count(self, title=None, template=None, mongoquery=None, keyword=None):
+        return len(self.matches(title))
+
+@pytest.fixture
+def client():
+    """A fake CDCS client holding 25 records"""
+    return FakeCDCS([f'faq{i:02d}' for i in range(25)])
+
+@pytest.fixture
+def database(monkeypatch, client):
+    """A CDCSDatabase that uses the fake client"""
+    module = importlib.import_module('yabadaba.database.CDCSDatabase')
+    monkeypatch.setattr(module, 'CDCS', lambda host, **kwargs: client)
+    return load_database(style='cdcs', host='https://cdcs.example')
+
+def test_get_records_all(database, client):
+    """Tests that retrieving all records uses one combined query"""
+    records = database.get_records('cdcs_faq', sort=None)
+    assert len(records) == 25
+    assert client.pages == [(None, None)]
+
+@pytest.mark.parametrize('pagesize', [10, 7, 30])
+def test_get_records_unsorted_pages(database, client, pagesize):
+    """Tests that unsorted queries only retrieve the pages that are needed"""
+    client.pagesize = pagesize
+    records = database.get_records('cdcs_faq', sort=None, skip=12, limit=5)
+    assert [record.name for record in records] == [f'faq{i}' for i in range(12, 17)]
+
+    # The first page gives the page size used to find the first needed page
+    firstpage = 12 // pagesize + 1
+    lastpage = 16 // pagesize + 1
+    expected = [(None, page) for page in sorted({1, *range(firstpage, lastpage + 1)})]
+    assert client.pages == expected
+
+    records = database.get_records('cdcs_faq', sort=None, skip=20)
+    assert [record.name for record in records] == [f'faq{i}' for i in range(20, 25)]
+
+@pytest.mark.parametrize('pagesize', [10, 7])
+def test_iter_records_pages(database, client, pagesize):
+    """Tests that iter_records retrieves all pages one at a time"""
+    client.pagesize = pagesize
+    names = [record.name for record in database.iter_records('cdcs_faq')]
+    assert names == [f'faq{i:02d}' for i in range(25)]
+    assert client.pages == [(None, page) for page in range(1, 25 // pagesize + 2)]
+
+@pytest.mark.parametrize('skip', [25, 30, 100])
+def test_get_records_skip_past_end(database, client, skip):
+    """Tests that skipping past the last record returns no records"""
+    assert len(database.get_records('cdcs_faq', sort=None, skip=skip)) == 0
+    df = database.get_records_df('cdcs_faq', sort=None, skip=skip)
+    assert len(df) == 0
+    assert client.pages == []
+
+def test_get_records_deleted_pages(database, client):
+    """Tests that a first page emptied since counting returns no records"""
+    del client.records[20:]
+    client.query_count = lambda **kwargs: 25
+    assert len(database.get_records('cdcs_faq', sort=None, skip=22)) == 0
+    assert client.pages == [(None, 1), (None, 3)]
+
+def test_get_records_failed_page(database, client):
+    """Tests that errors for pages after the first are raised"""
+    client.failingpages.add(2)
+    with pytest.raises(requests.HTTPError, match='page 2 failed'):
+        database.get_records('cdcs_faq', sort=None, limit=15)
+    with pytest.raises(requests.HTTPError, match='page 2 failed'):
+        database.get_records('cdcs_faq', sort=None, skip=12)
+    with pytest.raises(requests.HTTPError, match='page 2 failed'):
+        list(database.iter_records('cdcs_faq'))
+
+def test_get_records_invalid_first_page(database, client):
+    """Tests that errors for the first page of results are raised"""
+    client.failing.add(None)
+    with pytest.raises(requests.HTTPError):
+        database.get_records('cdcs_faq', sort=None)
+
+@pytest.mark.parametrize('threads', [1, 4])
+def test_get_records_names(database, client, threads):
+    """Tests that records for multiple names keep the order of the names"""
+    names = ['faq07', 'faq02', 'faq11', 'faq02']
+
+    # Make the first names finish last when queried concurrently
+    client.delays = {'faq07': 0.2, 'faq02': 0.1}
+    records = database.get_records('cdcs_faq', name=names, sort=None, threads=threads)
+    assert [record.name for record in records] == ['faq07', 'faq02', 'faq11']
+    assert sorted(client.pages) == [('faq02', None), ('faq07', None), ('faq11', None)]
+
+    records, df = database.get_records('cdcs_faq', name=names, return_df=True,
+                                       threads=threads)
+    assert [record.name for record in records] == ['faq07', 'faq02', 'faq11']
+    assert df.name.tolist() == ['faq07', 'faq02', 'faq11']
+    df = database.get_records_df('cdcs_faq', name=names, sort='name', threads=threads)
+    assert df.name.tolist() == ['faq02', 'faq07', 'faq11']
+    assert database.count_records('cdcs_faq', name=names, threads=threads) == 3
+
+@pytest.mark.parametrize('threads', [1, 4])
+def test_get_records_names_error(database, client, threads):
+    """Tests that an error querying one of multiple names is raised"""
+    names = ['faq01', 'faq02', 'faq03']
+    client.failing.add('faq02')
+    with pytest.raises(requests.HTTPError, match='faq02'):
+        database.get_records('cdcs_faq', name=names, threads=threads)
+    with pytest.raises(requests.HTTPError, match='faq02'):
+        database.count_records('cdcs_faq', name=names, threads=threads)
+
+def test_get_records_names_cancel(database, client):
+    """Tests that queries not yet started are cancelled after an error"""
+    names = [f'faq{i:02d}' for i in range(10)]
+    client.failing.add('faq00')
+    client.delays = {name: 0.1 for name in names[1:]}
+    with pytest.raises(requests.HTTPError, match='faq00'):
+        database.get_records('cdcs_faq', name=names, threads=2)
+    assert len(client.pages) < len(names)
@@ -0,0 +1,507 @@
+# coding: utf-8
+
+# Standard Python libraries
+import importlib.util
+import multiprocessing
+import os
+import time
+
+# https://docs.pytest.org/en/latest/
+import pytest
+
+from yabadaba import load_database, load_record, recordmanager
+from yabadaba.record import Record
+
+class DemoFAQ(Record):
+    """Minimal record style used for the database tests"""
+
+    @property
+    def style(self):
+        return 'demo_faq'
+
+    @property
+    def modelroot(self):
+        return 'faq'
+
+    def _init_values(self):
+        self._add_value('longstr', 'question')
+        self._add_value('longstr', 'answer')
+
+recordmanager.import_style('demo_faq', __name__, classname='DemoFAQ')
+
+@pytest.fixture
+def database(tmp_path):
+    """A LocalDatabase containing three demo_faq records"""
+    database = load_database(style='local', host=tmp_path)
+    for i in range(3):
+        record = load_record('demo_faq', name=f'faq{i}',
+                             question=f'question {i}', answer=f'answer {i}')
+        database.add_record(record=record)
+    return database
+
+def test_cache(database):
+    """Tests building the metadata cache"""
+    cache = database.cache('demo_faq')
+    assert cache.name.tolist() == ['faq0', 'faq1', 'faq2']
+    assert '_mtime' in cache and '_size' in cache
+
+    df = database.get_records_df('demo_faq')
+    assert df.keys().tolist() == ['name', 'question', 'answer']
+    assert df.answer.tolist() == ['answer 0', 'answer 1', 'answer 2']
+
+def test_cache_modified(database):
+    """Tests that modified records are reparsed"""
+    database.cache('demo_faq')
+
+    # Modify a record file in place
+    fname = database.host / 'demo_faq' / 'faq1.json'
+    content = fname.read_text(encoding='UTF-8').replace('answer 1', 'changed')
+    fname.write_text(content, encoding='UTF-8')
+    stat = fname.stat()
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+    df = database.get_records_df('demo_faq')
+    assert df.answer.tolist() == ['answer 0', 'changed', 'answer 2']
+
+    # Delete a record
+    database.delete_record(name='faq0', style='demo_faq')
+    df = database.get_records_df('demo_faq')
+    assert df.name.tolist() == ['faq1', 'faq2']
+
+def test_cache_hashcheck(tmp_path, database):
+    """Tests that content hashes detect changes with identical file stats"""
+    database = load_database(style='local', host=tmp_path, hashcheck=True)
+    cache = database.cache('demo_faq')
+    assert '_hash' in cache
+
+    # Replace content while keeping the size and modification time
+    fname = database.host / 'demo_faq' / 'faq2.json'
+    stat = fname.stat()
+    content = fname.read_text(encoding='UTF-8').replace('answer 2', 'answer 9')
+    fname.write_text(content, encoding='UTF-8')
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    df = database.get_records_df('demo_faq')
+    assert df.answer.tolist() == ['answer 0', 'answer 1', 'answer 9']
+
+def test_cacheformat_pickle(tmp_path, database):
+    """Tests the binary pickle cache format"""
+    database = load_database(style='local', host=tmp_path, cacheformat='pickle')
+    assert database.cachefile('demo_faq').name == 'demo_faq.pkl'
+
+    database.cache('demo_faq')
+    assert database.cachefile('demo_faq').is_file()
+    cache = database.read_cache_file('demo_faq')
+    assert cache.name.tolist() == ['faq0', 'faq1', 'faq2']
+    assert cache['_size'].dtype == 'int64'
+
+    with pytest.raises(ValueError):
+        load_database(style='local', host=tmp_path, cacheformat='bad')
+
+def test_cache_workers(tmp_path, database):
+    """Tests parsing records for the cache with a process pool"""
+    database = load_database(style='local', host=tmp_path, workers=2)
+    assert database.workers == 2
+
+    cache = database.cache('demo_faq', refresh=True)
+    assert cache.name.tolist() == ['faq0', 'faq1', 'faq2']
+    assert cache.answer.tolist() == ['answer 0', 'answer 1', 'answer 2']
+
+def test_get_records_threads(database):
+    """Tests loading records with a thread pool"""
+    records = database.get_records('demo_faq', threads=4)
+    assert [record.name for record in records] == ['faq0', 'faq1', 'faq2']
+    assert records[1].answer == 'answer 1'
+
+def test_cacheformat_sqlite(tmp_path, database):
+    """Tests the SQLite cache format and query pushdown"""
+    database = load_database(style='local', host=tmp_path, cacheformat='sqlite')
+    assert database.cachefile('demo_faq').name == 'metadata.sqlite'
+
+    cache = database.cache('demo_faq')
+    assert cache.name.tolist() == ['faq0', 'faq1', 'faq2']
+
+    df = database.get_records_df('demo_faq', answer='answer 1')
+    assert df.name.tolist() == ['faq1']
+    df = database.get_records_df('demo_faq', name=['faq0', 'faq2'])
+    assert df.name.tolist() == ['faq0', 'faq2']
+
+    # Modify a record file in place
+    fname = database.host / 'demo_faq' / 'faq1.json'
+    content = fname.read_text(encoding='UTF-8').replace('answer 1', 'changed')
+    fname.write_text(content, encoding='UTF-8')
+    stat = fname.stat()
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+    df = database.get_records_df('demo_faq', answer='changed')
+    assert df.name.tolist() == ['faq1']
+
+def test_get_records_lazy(database):
+    """Tests returning record proxies backed by the cached metadata"""
+    records = database.get_records('demo_faq', lazy=True)
+    assert [record.name for record in records] == ['faq0', 'faq1', 'faq2']
+    assert records[1].answer == 'answer 1'
+    assert not records[1].loaded
+
+    # Accessing the model loads the full record
+    assert records[1].model['faq']['answer'] == 'answer 1'
+    assert records[1].loaded
+    assert records[1].metadata() == records[1].record.metadata()
+
+@pytest.mark.parametrize('cacheformat', ['csv', 'sqlite'])
+def test_iter_records(tmp_path, database, cacheformat):
+    """Tests iterating over records and metadata in chunks"""
+    database = load_database(style='local', host=tmp_path, cacheformat=cacheformat)
+
+    chunks = list(database.iter_records_df('demo_faq', chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[1].name.tolist() == ['faq2']
+
+    records = database.iter_records('demo_faq', chunksize=2, answer='answer 2')
+    assert [record.name for record in records] == ['faq2']
+
+def test_get_records_sort(database):
+    """Tests sorting, skipping and limiting matching records"""
+    df = database.get_records_df('demo_faq', sort='answer', ascending=False)
+    assert df.name.tolist() == ['faq2', 'faq1', 'faq0']
+
+    records = database.get_records('demo_faq', skip=1, limit=1)
+    assert [record.name for record in records] == ['faq1']
+
+    records = database.get_records('demo_faq', sort='answer', ascending=False, skip=2)
+    assert [record.name for record in records] == ['faq0']
+
+    # Check the Mongo sort specification
+    record = load_record('demo_faq')
+    assert record.mongosort(['answer', 'name'], ascending=False) == [('content.faq.answer', -1), ('name', -1)]
+    with pytest.raises(ValueError):
+        record.mongosort('bad')
+
+def test_memcache(tmp_path, database):
+    """Tests reusing in-memory caches until the style directory changes"""
+    database = load_database(style='local', host=tmp_path, memcache=True)
+    assert database.memcache
+
+    # Age the directory and cache file so their states can be trusted
+    database.cache('demo_faq')
+    past = os.stat(database.host).st_mtime_ns - 10000000000
+    for path in [database.host / 'demo_faq', database.cachefile('demo_faq')]:
+        os.utime(path, ns=(past, past))
+    cache = database.cache('demo_faq')
+    assert database.cache('demo_faq') is cache
+
+    # Updates replace the record file and change the directory
+    record = database.get_record('demo_faq', name='faq1')
+    record.answer = 'updated'
+    database.update_record(record=record, build=True)
+    df = database.get_records_df('demo_faq')
+    assert df.answer.tolist() == ['answer 0', 'updated', 'answer 2']
+    assert not any(path.name.endswith('.tmp') for path in (database.host / 'demo_faq').iterdir())
+
+@pytest.mark.parametrize('cacheformat', ['csv', 'sqlite'])
+def test_get_records_df_name(tmp_path, database, cacheformat):
+    """Tests that name lookups use the cache for unchanged record files"""
+    database = load_database(style='local', host=tmp_path, cacheformat=cacheformat)
+    database.cache('demo_faq')
+
+    # Change content without changing the file stats: cached values are used
+    fname = database.host / 'demo_faq' / 'faq1.json'
+    stat = fname.stat()
+    content = fname.read_text(encoding='UTF-8').replace('answer 1', 'answer 8')
+    fname.write_text(content, encoding='UTF-8')
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    df = database.get_records_df('demo_faq', name=['faq1', 'faq0', 'missing'])
+    assert df.name.tolist() == ['faq1', 'faq0']
+    assert df.answer.tolist() == ['answer 1', 'answer 0']
+
+    # Names are only sorted if sort is given
+    df = database.get_records_df('demo_faq', name=['faq1', 'faq0'], sort='name')
+    assert df.name.tolist() == ['faq0', 'faq1']
+    records = database.get_records('demo_faq', name=['faq2', 'faq0', 'faq1'], skip=1)
+    assert [record.name for record in records] == ['faq0', 'faq1']
+
+    # Newer files are parsed
+    os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    df = database.get_records_df('demo_faq', name='faq1')
+    assert df.answer.tolist() == ['answer 8']
+
+def test_find_record_style(database):
+    """Tests resolving record styles with the name index"""
+    assert database.nameindexfile.is_file()
+    assert database.find_record_style('faq1') == 'demo_faq'
+
+    # Records added outside of the database are found and indexed
+    fname = database.host / 'demo_faq' / 'faq1.json'
+    other = database.host / 'other' / 'extra.json'
+    other.parent.mkdir()
+    other.write_bytes(fname.read_bytes())
+    assert database.find_record_style('extra') == 'other'
+
+    database.delete_record(name='faq1')
+    with pytest.raises(ValueError):
+        database.find_record_style('faq1')
+
+def connect_nameindex(host, barrier, errors):
+    """Opens the name index of a host once all processes are ready"""
+    database = load_database(style='local', host=host)
+    barrier.wait()
+    try:
+        database.nameindex_connect().close()
+    except Exception as err:
+        errors.put(repr(err))
+
+def test_nameindex_multiprocess(database):
+    """Tests that processes opening a new name index do not conflict"""
+    context = multiprocessing.get_context('fork')
+    for i in range(25):
+        database.nameindexfile.unlink()
+        barrier = context.Barrier(4)
+        errors = context.Queue()
+        processes = [context.Process(target=connect_nameindex,
+                                     args=(database.host, barrier, errors))
+                     for j in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert errors.empty()
+        assert all(process.exitcode == 0 for process in processes)
+        assert database.find_record_style('faq1') == 'demo_faq'
+
+@pytest.mark.parametrize('layout', ['hash', 'prefix'])
+def test_layout(tmp_path, database, layout):
+    """Tests migrating to and using sharded record layouts"""
+    database.add_tar(name='faq1', tar=b'content')
+    database.migrate_layout(layout, shardlevels=2)
+    assert database.layout == layout
+    fname = database.record_path('demo_faq', 'faq1')
+    assert fname.is_file()
+    assert len(fname.relative_to(tmp_path).parts) == 4
+    assert database.get_tar(name='faq1', raw=True) == b'content'
+
+    # Reopen with the saved layout
+    database = load_database(style='local', host=tmp_path)
+    assert database.layout == layout and database.shardlevels == 2
+    assert database.count_records('demo_faq') == 3
+    assert database.get_records_df('demo_faq').name.tolist() == ['faq0', 'faq1', 'faq2']
+    database.add_record(record=load_record('demo_faq', name='faq3', question='q', answer='a'))
+    database.delete_record(name='faq0')
+    assert database.get_records_df('demo_faq').name.tolist() == ['faq1', 'faq2', 'faq3']
+
+    with pytest.raises(ValueError):
+        load_database(style='local', host=tmp_path, layout='flat')
+
+    # Migrate back to the flat layout
+    database.migrate_layout('flat')
+    assert sorted(path.name for path in (tmp_path / 'demo_faq').iterdir()) == [
+        'faq1.json', 'faq1.tar.gz', 'faq2.json', 'faq3.json']
+
+@pytest.mark.parametrize('cacheformat', ['csv', 'sqlite'])
+def test_bulk_records(tmp_path, database, cacheformat):
+    """Tests adding, updating and deleting multiple records at once"""
+    database = load_database(style='local', host=tmp_path, cacheformat=cacheformat)
+    database.cache('demo_faq')
+
+    records = [load_record('demo_faq', name=f'faq{i}', question=f'question {i}',
+                           answer=f'answer {i}') for i in range(3, 5)]
+    database.add_records(records, threads=2)
+    assert database.find_record_style('faq4') == 'demo_faq'
+    df = database.get_records_df('demo_faq')
+    assert df.name.tolist() == ['faq0', 'faq1', 'faq2', 'faq3', 'faq4']
+
+    # Existing records cannot be added again
+    with pytest.raises(ValueError):
+        database.add_records([records[0]])
+
+    for record in records:
+        record.answer = 'updated'
+    database.update_records(records, build=True)
+    cache = database.cache('demo_faq', addnew=False)
+    assert cache.answer.tolist() == ['answer 0', 'answer 1', 'answer 2', 'updated', 'updated']
+
+    database.delete_records(style='demo_faq', names=['faq0', 'faq3'])
+    df = database.get_records_df('demo_faq')
+    assert df.name.tolist() == ['faq1', 'faq2', 'faq4']
+
+@pytest.mark.parametrize('compression', ['gzip', 'bz2', 'lzma'])
+def test_compression(tmp_path, compression):
+    """Tests reading and writing compressed record files"""
+    database = load_database(style='local', host=tmp_path, compression=compression)
+    for i in range(3):
+        record = load_record('demo_faq', name=f'faq{i}',
+                             question=f'question {i}', answer=f'answer {i}')
+        database.add_record(record=record)
+    fname = database.record_path('demo_faq', 'faq1')
+    assert fname.name == 'faq1' + database.suffix
+    assert fname.read_bytes()[:1] != b'{'
+
+    assert database.count_records('demo_faq') == 3
+    df = database.get_records_df('demo_faq')
+    assert df.answer.tolist() == ['answer 0', 'answer 1', 'answer 2']
+
+    record = database.get_record('demo_faq', name='faq1')
+    record.answer = 'updated'
+    database.update_record(record=record, build=True)
+    records = database.get_records('demo_faq', answer='updated')
+    assert [record.name for record in records] == ['faq1']
+
+    # Uncompressed databases do not see the compressed files
+    assert load_database(style='local', host=tmp_path).count_records('demo_faq') == 0
+    with pytest.raises(ValueError):
+        load_database(style='local', host=tmp_path, compression='bad')
+
+def test_cache_log(tmp_path, database):
+    """Tests appending cache changes to the change log and compacting it"""
+    database = load_database(style='local', host=tmp_path, logcompaction=2, memcache=True)
+    database.cache('demo_faq')
+    logfile = database.cachelogfile('demo_faq')
+    assert not logfile.is_file()
+
+    # Writers append to the log instead of rewriting the cache file
+    record = database.get_record('demo_faq', name='faq1')
+    record.answer = 'updated'
+    database.update_record(record=record, build=True)
+    database.delete_record(name='faq0')
+    assert logfile.is_file()
+    assert database.read_cache_file('demo_faq').name.tolist() == ['faq0', 'faq1', 'faq2']
+    cache = database.cache('demo_faq', addnew=False)
+    assert cache.name.tolist() == ['faq1', 'faq2']
+    assert cache.answer.tolist() == ['updated', 'answer 2']
+    assert logfile.is_file()
+
+    # Reads fold in new entries and compact the log once it is too long
+    database.add_record(record=load_record('demo_faq', name='faq3', question='q', answer='a'))
+    cache = database.cache('demo_faq')
+    assert cache.name.tolist() == ['faq1', 'faq2', 'faq3']
+    assert not logfile.is_file()
+    assert database.read_cache_file('demo_faq').name.tolist() == ['faq1', 'faq2', 'faq3']
+
+@pytest.mark.parametrize('cacheformat', ['csv', 'sqlite'])
+def test_watch(tmp_path, database, cacheformat):
+    """Tests keeping caches up to date with the watcher thread"""
+    database = load_database(style='local', host=tmp_path, cacheformat=cacheformat)
+    database.watch(interval=60)
+    assert database.watching == ['demo_faq']
+    other = load_database(style='local', host=tmp_path, cacheformat=cacheformat)
+    try:
+        # Queries use the watched cache without scanning the directory
+        fname = database.host / 'demo_faq' / 'faq1.json'
+        fname.with_name('faq3.json').write_bytes(fname.read_bytes())
+        if importlib.util.find_spec('inotify_simple') is None:
+            assert database.get_records_df('demo_faq').name.tolist() == ['faq0', 'faq1', 'faq2']
+
+        # Changes made through the database are applied immediately
+        database.delete_record(name='faq0')
+        assert database.get_records_df('demo_faq').name.tolist() == ['faq1', 'faq2']
+
+        # The watcher picks up external changes
+        database.watch('demo_faq', interval=0.05)
+        other.add_record(record=load_record('demo_faq', name='faq4', question='q', answer='a'))
+        for i in range(100):
+            names = database.get_records_df('demo_faq').name.tolist()
+            if names == ['faq1', 'faq2', 'faq3', 'faq4']:
+                break
+            time.sleep(0.05)
+        assert names == ['faq1', 'faq2', 'faq3', 'faq4']
+    finally:
+        database.unwatch()
+    assert database.watching == []
+
+def test_tarindex(tmp_path, database):
+    """Tests saving and reading uncompressed tar archives with indices"""
+    database = load_database(style='local', host=tmp_path, tarindex=True)
+    folder = tmp_path / 'work' / 'faq1'
+    folder.mkdir(parents=True)
+    (folder / 'result.txt').write_text('result', encoding='UTF-8')
+    database.add_tar(name='faq1', root_dir=tmp_path / 'work')
+    assert database.tar_path('demo_faq', 'faq1').name == 'faq1.tar'
+    assert (tmp_path / 'demo_faq' / 'faq1.tar.idx').is_file()
+
+    record = database.get_record('demo_faq', name='faq1')
+    assert record.get_file('result.txt', local=False).read() == b'result'
+    assert record.tar.indexed
+
+    # Compressed archives are decompressed and indexed
+    database.delete_tar(name='faq1')
+    gzipped = load_database(style='local', host=tmp_path / 'other')
+    gzipped.add_record(record=load_record('demo_faq', name='faq1', question='q', answer='a'))
+    gzipped.add_tar(name='faq1', root_dir=tmp_path / 'work')
+    assert gzipped.tar_path('demo_faq', 'faq1').name == 'faq1.tar.gz'
+    database.add_tar(name='faq1', tar=gzipped.get_tar(name='faq1', raw=True))
+    assert database.get_tar(name='faq1').extractfile('faq1/result.txt').read() == b'result'
+    assert not (tmp_path / 'demo_faq' / 'faq1.tar.gz').exists()
+
+def test_copy_records_tar_stream(tmp_path, database):
+    """Tests copying tar archives between databases as streams"""
+    folder = tmp_path / 'work' / 'faq1'
+    folder.mkdir(parents=True)
+    (folder / 'result.txt').write_text('result', encoding='UTF-8')
+    database.add_tar(name='faq1', root_dir=tmp_path / 'work')
+
+    with database.get_tar(name='faq1', stream=True) as f:
+        assert f.read(2) == b'\x1f\x8b'
+
+    dest = load_database(style='local', host=tmp_path / 'dest', tarindex=True)
+    database.copy_records(dest, record_style='demo_faq')
+    assert dest.count_records('demo_faq') == 3
+    assert dest.tar_path('demo_faq', 'faq1').name == 'faq1.tar'
+    assert dest.get_tar(name='faq1').extractfile('faq1/result.txt').read() == b'result'
+
+    # Existing tars are only replaced if overwrite is True
+    (folder / 'result.txt').write_text('changed', encoding='UTF-8')
+    database.update_tar(name='faq1', root_dir=tmp_path / 'work')
+    database.copy_records(dest, record_style='demo_faq')
+    assert dest.get_tar(name='faq1').extractfile('faq1/result.txt').read() == b'result'
+    database.copy_records(dest, record_style='demo_faq', overwrite=True)
+    assert dest.get_tar(name='faq1').extractfile('faq1/result.txt').read() == b'changed'
+
+def test_copy_records_tar_errors(tmp_path, database, monkeypatch, capsys):
+    """Tests that failed tar updates are reported without stopping the copy"""
+    for name in ['faq0', 'faq1', 'faq2']:
+        folder = tmp_path / 'work' / name
+        folder.mkdir(parents=True)
+        (folder / 'result.txt').write_text(name, encoding='UTF-8')
+        database.add_tar(name=name, root_dir=tmp_path / 'work')
+    dest = load_database(style='local', host=tmp_path / 'dest')
+    database.copy_records(dest, record_style='demo_faq')
+
+    for name in ['faq0', 'faq1', 'faq2']:
+        (tmp_path / 'work' / name / 'result.txt').write_text('changed', encoding='UTF-8')
+        database.update_tar(name=name, root_dir=tmp_path / 'work')
+    update_tar = dest.update_tar
+    def failing_update_tar(record=None, **kwargs):
+        if record.name == 'faq1':
+            raise OSError('disk full')
+        update_tar(record=record, **kwargs)
+    monkeypatch.setattr(dest, 'update_tar', failing_update_tar)
+
+    capsys.readouterr()
+    database.copy_records(dest, record_style='demo_faq', overwrite=True)
+    out = capsys.readouterr().out
+    assert '2 tars added/updated' in out
+    assert '1 tars failed to update' in out and 'faq1: disk full' in out
+    for name, content in [('faq0', b'changed'), ('faq1', b'faq1'), ('faq2', b'changed')]:
+        tar = dest.get_tar(name=name)
+        assert tar.extractfile(f'{name}/result.txt').read() == content
+
+def test_aggregate_metadata(database):
+    """Tests computing grouped summary values of the metadata"""
+    database.add_record(record=load_record('demo_faq', name='faq3',
+                                           question='question 3', answer='answer 0'))
+
+    df = database.aggregate_metadata('demo_faq', groupby='answer',
+                                     min='question', max='question')
+    assert df.keys().tolist() == ['answer', 'count', 'question_min', 'question_max']
+    assert df.answer.tolist() == ['answer 0', 'answer 1', 'answer 2']
+    assert df['count'].tolist() == [2, 1, 1]
+    assert df.question_min.tolist() == ['question 0', 'question 1', 'question 2']
+    assert df.question_max.tolist() == ['question 3', 'question 1', 'question 2']
+
+    # Without groupby and with search parameters
+    df = database.aggregate_metadata('demo_faq', name=['faq1', 'faq3'])
+    assert df['count'].tolist() == [2]
+    df = database.aggregate_metadata('demo_faq', groupby='answer', name='missing')
+    assert len(df) == 0 and df.keys().tolist() == ['answer', 'count']
+
+    with pytest.raises(ValueError):
+        database.aggregate_metadata('demo_faq', groupby='bad')
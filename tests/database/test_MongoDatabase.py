@@ -0,0 +1,680 @@
+# coding: utf-8
+
+# Standard Python libraries
+import datetime
+import itertools
+from pathlib import Path
+import sys
+import threading
+
+# https://docs.pytest.org/en/latest/
+import pytest
+
+# https://pymongo.readthedocs.io/
+import bson
+import pymongo
+
+# http://www.numpy.org/
+import numpy as np
+
+# https://pandas.pydata.org/
+import pandas as pd
+
+# https://github.com/usnistgov/DataModelDict
+from DataModelDict import DataModelDict as DM
+
+from yabadaba import load_database, load_record, recordmanager
+from yabadaba.database import Database
+from yabadaba.record import Record
+from yabadaba.database.MongoDatabase import MongoDatabase, _bson_metadata, _restore_metadata
+
+# Load the demo record styles
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'doc'))
+import yabadaba_demo
+
+class DemoValues(Record):
+    """Record style with one value of each built-in value style"""
+
+    @property
+    def style(self):
+        return 'demo_values'
+
+    @property
+    def modelroot(self):
+        return 'demo-values'
+
+    def _init_values(self):
+        self._add_value('str', 'text')
+        self._add_value('strlist', 'tags')
+        self._add_value('longstr', 'notes')
+        self._add_value('float', 'ratio')
+        self._add_value('int', 'count')
+        self._add_value('bool', 'flag')
+        self._add_value('date', 'day')
+        self._add_value('month', 'month')
+        self._add_value('floatarray', 'vector', metadatakey='vector')
+        self._add_value('intarray', 'indices', metadatakey='indices')
+
+recordmanager.import_style('demo_values', __name__, classname='DemoValues')
+
+def roundtrip(document):
+    """Encodes and decodes a document like a Mongo server would"""
+    return bson.decode(bson.encode(document),
+                       codec_options=bson.CodecOptions(document_class=DM))
+
+class FakeCursor():
+    """List-backed stand-in for a pymongo Cursor"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.closed = False
+        self.sortspec = None
+        self.diskuse = None
+
+    def sort(self, spec):
+        self.sortspec = spec
+        return self
+
+    def allow_disk_use(self, allow):
+        self.diskuse = allow
+        return self
+
+    def skip(self, skip):
+        self.documents = self.documents[skip:]
+        return self
+
+    def limit(self, limit):
+        self.documents = self.documents[:limit]
+        return self
+
+    def batch_size(self, batchsize):
+        return self
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        return iter(self.documents)
+
+def matches(document, query):
+    """Evaluates the subset of Mongo queries used by MongoDatabase"""
+    for key, condition in query.items():
+        if key == '$and':
+            if not all(matches(document, q) for q in condition):
+                return False
+        elif isinstance(condition, dict) and '$in' in condition:
+            if document.get(key) not in condition['$in']:
+                return False
+        elif isinstance(condition, dict) and '$exists' in condition:
+            if (key in document) is not condition['$exists']:
+                return False
+        elif document.get(key) != condition:
+            return False
+    return True
+
+_missing = object()
+
+def evaluate(document, expression):
+    """Evaluates the subset of Mongo aggregation expressions used by MongoDatabase"""
+    if isinstance(expression, str) and expression.startswith('$'):
+        value = document
+        for key in expression[1:].split('.'):
+            value = value.get(key, _missing) if isinstance(value, dict) else _missing
+        return value
+    if isinstance(expression, dict) and '$type' in expression:
+        return 'missing' if evaluate(document, expression['$type']) is _missing else 'object'
+    if isinstance(expression, dict) and '$eq' in expression:
+        first, second = [evaluate(document, e) for e in expression['$eq']]
+        return first == second
+    if isinstance(expression, dict) and '$cond' in expression:
+        test, true, false = expression['$cond']
+        return evaluate(document, true) if evaluate(document, test) else evaluate(document, false)
+    return expression
+
+def accumulate(operator, values):
+    """Evaluates the Mongo $group accumulators used by MongoDatabase"""
+    if operator == '$sum':
+        return sum(values)
+    values = [value for value in values if value is not _missing and value is not None]
+    if operator == '$avg':
+        values = [value for value in values
+                  if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        return sum(values) / len(values) if len(values) > 0 else None
+    if len(values) == 0:
+        return None
+    return min(values) if operator == '$min' else max(values)
+
+class FakeCollection():
+    """In-memory stand-in for a pymongo Collection that records its calls"""
+
+    def __init__(self):
+        self.documents = []
+        self.calls = []
+        self.indexes = {'_id_': {'key': [('_id', 1)]}}
+        self.ops = {}
+
+    def find(self, query=None, projection=None):
+        documents = [doc for doc in self.documents if matches(doc, query or {})]
+        if projection is not None:
+            keep = [key for key, value in projection.items() if value]
+            documents = [DM([(key, doc[key]) for key in keep if key in doc])
+                         for doc in documents]
+        return FakeCursor(documents)
+
+    def find_one(self, query=None, projection=None):
+        for doc in self.find(query, projection):
+            return doc
+        return None
+
+    def distinct(self, key, query=None):
+        return [doc[key] for doc in self.find(query)]
+
+    def count_documents(self, query):
+        return len(self.find(query).documents)
+
+    def aggregate(self, pipeline):
+        self.calls.append(('aggregate', len(pipeline), {}))
+        documents = self.documents
+        for stage in pipeline:
+            if '$indexStats' in stage:
+                documents = [{'name': name, 'accesses': {'ops': self.ops.get(name, 0)}}
+                             for name in self.indexes]
+            elif '$match' in stage:
+                documents = [doc for doc in documents if matches(doc, stage['$match'])]
+            elif '$group' in stage:
+                spec = stage['$group']
+                groups = {}
+                for doc in documents:
+                    if spec['_id'] is None:
+                        _id = None
+                    else:
+                        _id = {key: evaluate(doc, path) for key, path in spec['_id'].items()}
+                        _id = {key: value for key, value in _id.items() if value is not _missing}
+                    groups.setdefault(repr(_id), (_id, []))[1].append(doc)
+                documents = []
+                for _id, docs in groups.values():
+                    result = {'_id': _id}
+                    for column, accumulator in spec.items():
+                        if column != '_id':
+                            (operator, expression), = accumulator.items()
+                            result[column] = accumulate(operator,
+                                                        [evaluate(doc, expression) for doc in docs])
+                    documents.append(result)
+            elif '$sort' in stage:
+                for path in reversed(list(stage['$sort'])):
+                    # Missing values sort first
+                    def sortkey(doc, path=path):
+                        value = evaluate(doc, f'${path}')
+                        return (False, 0) if value is _missing else (True, value)
+                    documents = sorted(documents, key=sortkey)
+        return iter(documents)
+
+    def add_index(self, index):
+        """Adds an index, failing like a Mongo server for conflicts and duplicates"""
+        document = index.document
+        info = {'key': list(document['key'].items())}
+        if document.get('unique', False):
+            info['unique'] = True
+        if document['name'] in self.indexes:
+            if self.indexes[document['name']] != info:
+                raise pymongo.errors.OperationFailure('Index already exists with different options',
+                                                      code=85)
+        elif info.get('unique', False):
+            keys = [tuple(evaluate(doc, f'${key}') for key, direction in info['key'])
+                    for doc in self.documents]
+            if len(set(keys)) < len(keys):
+                raise pymongo.errors.DuplicateKeyError('E11000 duplicate key error', code=11000)
+        self.indexes[document['name']] = info
+        return document['name']
+
+    def create_index(self, keys, unique=False):
+        self.calls.append(('create_index', 1, {'unique': unique}))
+        return self.add_index(pymongo.IndexModel(keys, unique=unique))
+
+    def create_indexes(self, indexes):
+        self.calls.append(('create_indexes', len(indexes), {}))
+        return [self.add_index(index) for index in indexes]
+
+    def index_information(self):
+        return self.indexes
+
+    def insert_one(self, document):
+        self.calls.append(('insert_one', 1, {}))
+        self.documents.append(roundtrip(document))
+
+    def insert_many(self, documents, ordered=True):
+        self.calls.append(('insert_many', len(documents), {'ordered': ordered}))
+        self.documents.extend(roundtrip(doc) for doc in documents)
+
+    def replace_one(self, query, document, upsert=False):
+        self.calls.append(('replace_one', 1, {'upsert': upsert}))
+        for i, doc in enumerate(self.documents):
+            if matches(doc, query):
+                self.documents[i] = roundtrip(document)
+                return type('UpdateResult', (), {'matched_count': 1})()
+        return type('UpdateResult', (), {'matched_count': 0})()
+
+    def bulk_write(self, operations, ordered=True):
+        self.calls.append(('bulk_write', len(operations),
+                           {'ordered': ordered,
+                            'upsert': [op._upsert for op in operations]}))
+        for op in operations:
+            for i, doc in enumerate(self.documents):
+                if matches(doc, op._filter):
+                    self.documents[i] = roundtrip(op._doc)
+                    break
+            else:
+                if op._upsert:
+                    self.documents.append(roundtrip(op._doc))
+
+    def delete_many(self, query):
+        count = len(self.documents)
+        self.documents = [doc for doc in self.documents if not matches(doc, query)]
+        return type('DeleteResult', (), {'deleted_count': count - len(self.documents)})()
+
+class FakeMongo(dict):
+    """In-memory stand-in for a pymongo Database"""
+
+    def __missing__(self, style):
+        self[style] = FakeCollection()
+        return self[style]
+
+    def list_collection_names(self):
+        return list(self)
+
+@pytest.fixture
+def mongodb(monkeypatch):
+    """In-memory collections used by all MongoDatabase objects"""
+    mongodb = FakeMongo()
+    monkeypatch.setattr(MongoDatabase, 'mongodb', property(lambda self: mongodb))
+    return mongodb
+
+@pytest.fixture
+def database(mongodb):
+    """A MongoDatabase whose collections are held in memory"""
+    return load_database(style='mongo', serverSelectionTimeoutMS=100)
+
+def demo_records():
+    """Records covering every value style used by the demo records"""
+    records = []
+    records.append(load_record('demo_values', name='values', text='t', tags=['a', 'b'],
+                               notes='n', ratio=1.5, count=3, flag=True,
+                               day='2020-01-02', month=5, vector=[1.0, 2.5],
+                               indices=[1, 2]))
+    album = load_record('album', name='album', artist='artist', producer='producer',
+                        album='title', releasedate='2001-02-03', genre=['rock'])
+    album.add_track(title='song', number=1, duration='3 min 2 s', lyrics='la')
+    album.add_track(title='other', number=2, duration='45 s', lyrics='la la')
+    records.append(album)
+    records.append(load_record('FAQ', name='faq', question='q', answer='a'))
+    return records
+
+@pytest.mark.parametrize('index', range(3))
+def test_bson_metadata_roundtrip(index):
+    """Tests that stored metadata round-trips through BSON"""
+    record = demo_records()[index]
+    metadata = record.metadata()
+
+    restored = _restore_metadata(roundtrip({'metadata': _bson_metadata(metadata)})['metadata'])
+    np.testing.assert_equal(restored, metadata)
+
+    if record.style == 'album':
+        assert isinstance(restored['releasedate'], datetime.date)
+        assert restored['tracks'][0]['duration'] == pd.Timedelta('3 min 2 s')
+
+def test_bson_metadata_invalid():
+    """Tests that values BSON cannot store raise a TypeError"""
+    with pytest.raises(TypeError):
+        _bson_metadata({'value': object()})
+    with pytest.raises(TypeError):
+        _bson_metadata({1: 'value'})
+    with pytest.raises(TypeError):
+        _bson_metadata({'value': 2**64})
+
+def test_add_record_metadata(database):
+    """Tests that records are saved with metadata that get_records_df reads"""
+    for record in demo_records():
+        database.add_record(record=record)
+        entry = database.mongodb[record.style].find_one({'name': record.name})
+        assert 'metadata' in entry
+
+        df = database.get_records_df(record.style)
+        np.testing.assert_equal(df.iloc[0].dropna().to_dict(), record.metadata())
+
+def test_add_record_unstorable_metadata(database, monkeypatch):
+    """Tests that metadata BSON cannot store is built from content instead"""
+    record = demo_records()[2]
+    monkeypatch.setattr(type(record), 'metadata',
+                        lambda self: {'name': self.name, 'value': object()})
+    database.add_record(record=record)
+    entry = database.mongodb['FAQ'].find_one({'name': 'faq'})
+    assert 'metadata' not in entry
+    assert 'content' in entry
+
+def test_delete_records(database):
+    """Tests that delete_records checks that the records exist"""
+    database.add_records(demo_records())
+    database.add_record(record=load_record('demo_values', name='faq'))
+
+    with pytest.raises(ValueError, match='missing'):
+        database.delete_records(style='album', names=['album', 'missing'])
+    with pytest.raises(ValueError, match='missing'):
+        database.delete_records(names=['album', 'missing'])
+    with pytest.raises(ValueError, match='multiple'):
+        database.delete_records(names=['faq'])
+    assert database.count_records('album') == 1
+
+    # Styles are resolved from names
+    database.delete_records(names=['album', 'values'])
+    assert database.count_records('album') == 0
+    assert database.count_records('demo_values') == 1
+    database.delete_records(style='FAQ', names=['faq'])
+    assert database.count_records('FAQ') == 0
+
+@pytest.mark.parametrize('groupby', [None, 'flag', ['flag', 'month']])
+def test_aggregate_metadata(database, groupby):
+    """Tests that the server-side aggregation matches the client-side one"""
+    records = []
+    for i in range(6):
+        records.append(load_record('demo_values', name=f'values{i}', text=f't{i}',
+                                   ratio=0.5 * i, count=i, flag=i % 2 == 0,
+                                   month=i % 3 + 1, day=f'2020-01-0{i + 1}'))
+    database.add_records(records)
+    kwargs = dict(groupby=groupby, min=['ratio', 'day'], max=['count', 'text'],
+                  mean=['ratio', 'count', 'flag'])
+
+    server = database.aggregate_metadata('demo_values', **kwargs)
+    client = Database.aggregate_metadata(database, 'demo_values', **kwargs)
+    assert database.mongodb['demo_values'].calls[-1][0] == 'aggregate'
+    pd.testing.assert_frame_equal(server, client, check_dtype=False)
+    assert server['flag_mean'].isna().all()
+
+    # Entries without stored metadata are aggregated client-side
+    database.mongodb['demo_values'].documents[0].pop('metadata')
+    fallback = database.aggregate_metadata('demo_values', **kwargs)
+    pd.testing.assert_frame_equal(fallback, client, check_dtype=False)
+
+def test_index_keys(database):
+    """Tests that index keys are the name and the paths of the style's queries"""
+    assert database.index_keys('demo_values') == [
+        'name', 'content.demo-values.text', 'content.demo-values.tags',
+        'content.demo-values.notes', 'content.demo-values.ratio',
+        'content.demo-values.count', 'content.demo-values.flag',
+        'content.demo-values.day', 'content.demo-values.month']
+    assert database.index_keys('album')[-2:] == ['content.album.tracks.title',
+                                                 'content.album.tracks.lyrics']
+
+def test_ensure_indexes(database, capsys):
+    """Tests that ensure_indexes creates a unique name index and query indexes"""
+    names = database.ensure_indexes(['FAQ', 'album'], verbose=True)
+    assert 'ensured for FAQ' in capsys.readouterr().out
+
+    indexes = database.mongodb['FAQ'].indexes
+    assert names[:3] == ['name_1', 'content.faq.question_1', 'content.faq.answer_1']
+    assert len(names) == 3 + len(database.index_keys('album'))
+    assert indexes['name_1'] == {'key': [('name', 1)], 'unique': True}
+    assert indexes['content.faq.question_1'] == {'key': [('content.faq.question', 1)]}
+
+    # All collections of loaded styles are indexed by default
+    database.mongodb['demo_values']
+    names = database.ensure_indexes()
+    assert 'content.demo-values.text_1' in names
+    assert database.mongodb['FAQ'].calls[-2:] == [('create_index', 1, {'unique': True}),
+                                                  ('create_indexes', 2, {})]
+
+def test_ensure_indexes_duplicate_names(database, capsys):
+    """Tests that duplicate names give a non-unique name index"""
+    collection = database.mongodb['FAQ']
+    collection.documents.extend([DM(name='faq'), DM(name='faq')])
+    names = database.ensure_indexes('FAQ', verbose=True)
+    assert 'duplicate names' in capsys.readouterr().out
+    assert names == ['name_1', 'content.faq.question_1', 'content.faq.answer_1']
+    assert collection.indexes['name_1'] == {'key': [('name', 1)]}
+
+    report = database.index_report('FAQ')
+    row = report[report.key == 'name'].iloc[0]
+    assert row['status'] == 'nonunique' and row['unique'] == False
+
+    # The existing non-unique index is kept once the duplicates are removed
+    collection.documents.pop()
+    assert database.ensure_indexes('FAQ') == names
+    assert collection.indexes['name_1'] == {'key': [('name', 1)]}
+
+    # Autoindexed queries work on collections with duplicate names
+    database = load_database(style='mongo', autoindex=True, serverSelectionTimeoutMS=100)
+    database.mongodb['album'].documents.extend([DM(name='a'), DM(name='a')])
+    assert database.count_records('album') == 2
+
+def test_autoindex(mongodb):
+    """Tests that autoindex ensures each style's indexes once on first use"""
+    database = load_database(style='mongo', serverSelectionTimeoutMS=100)
+    assert database.autoindex is False
+    database.add_records(demo_records())
+    assert 'create_indexes' not in [call[0] for call in mongodb['FAQ'].calls]
+
+    database = load_database(style='mongo', autoindex=True, serverSelectionTimeoutMS=100)
+    assert database.autoindex is True
+    database.get_records('FAQ')
+    database.add_record(record=load_record('FAQ', name='faq2', question='q', answer='a'))
+    database.count_records('FAQ')
+    assert [call[0] for call in mongodb['FAQ'].calls].count('create_index') == 1
+    assert [call[0] for call in mongodb['FAQ'].calls].count('create_indexes') == 1
+    assert 'create_index' not in [call[0] for call in mongodb['album'].calls]
+
+def test_index_report(database):
+    """Tests that index_report flags missing, unused and unexpected indexes"""
+    collection = database.mongodb['FAQ']
+    collection.create_indexes([pymongo.IndexModel([('name', pymongo.ASCENDING)], unique=True),
+                               pymongo.IndexModel([('content.faq.question', pymongo.ASCENDING),
+                                                   ('name', pymongo.ASCENDING)])])
+    collection.ops['name_1'] = 4
+
+    report = database.index_report('FAQ')
+    assert report.columns.tolist() == ['style', 'index', 'key', 'expected', 'unique',
+                                       'ops', 'status']
+    rows = {key: row for key, row in zip(report.key, report.to_dict('records'))}
+    assert len(report) == 4
+    assert rows['name']['status'] == 'used' and rows['name']['ops'] == 4
+    assert rows['name']['unique'] == True
+    assert rows['content.faq.question, name']['expected'] == False
+    assert rows['content.faq.question, name']['status'] == 'unused'
+    assert rows['content.faq.question']['status'] == 'missing'
+    assert rows['content.faq.answer']['status'] == 'missing'
+
+    # Once ensured, all expected indexes exist
+    database.ensure_indexes('FAQ')
+    report = database.index_report('FAQ')
+    assert 'missing' not in report.status.tolist()
+    assert report.expected.sum() == 3
+
+def faq_records(count, answer='a'):
+    """Builds FAQ records named faq0, faq1, ..."""
+    return [load_record('FAQ', name=f'faq{i}', question='q', answer=answer)
+            for i in range(count)]
+
+def test_add_records_entries(database):
+    """Tests the entries that add_records saves"""
+    records = demo_records()
+    database.add_records(records)
+    for record in records:
+        entry = database.mongodb[record.style].find_one({'name': record.name})
+        assert list(entry) == ['name', 'content', 'metadata']
+        assert entry['name'] == record.name
+        assert entry['content'] == record.build_model()
+        assert entry['metadata']['name'] == record.name
+
+    # build rebuilds content from the record attributes
+    record, other = faq_records(2)
+    for faq in (record, other):
+        faq.build_model()
+        faq.answer = 'changed'
+    database.add_records([record], build=True)
+    database.add_records([other])
+    entry = database.mongodb['FAQ'].find_one({'name': 'faq0'})
+    assert entry['content']['faq']['answer'] == 'changed'
+    entry = database.mongodb['FAQ'].find_one({'name': 'faq1'})
+    assert entry['content']['faq']['answer'] == 'a'
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_add_records_batches(database, ordered):
+    """Tests that add_records inserts one batch per insert_many call"""
+    database.add_records(faq_records(5) + demo_records()[:2], ordered=ordered,
+                         batchsize=2)
+    assert database.mongodb['FAQ'].calls == [('insert_many', 2, {'ordered': ordered}),
+                                             ('insert_many', 2, {'ordered': ordered}),
+                                             ('insert_many', 1, {'ordered': ordered})]
+    assert database.mongodb['album'].calls == [('insert_many', 1, {'ordered': ordered})]
+    assert database.count_records('FAQ') == 5
+
+def test_add_records_invalid(database):
+    """Tests that add_records checks all batches before inserting any"""
+    database.add_record(record=faq_records(5)[4])
+    with pytest.raises(ValueError, match='faq4 already exists'):
+        database.add_records(faq_records(5), batchsize=2)
+    with pytest.raises(ValueError, match='duplicate'):
+        database.add_records(faq_records(1) + faq_records(1))
+    with pytest.raises(ValueError, match='batchsize'):
+        database.add_records(faq_records(1), batchsize=0)
+    assert database.count_records('FAQ') == 1
+    assert [call[0] for call in database.mongodb['FAQ'].calls] == ['insert_one']
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_update_records_batches(database, ordered):
+    """Tests that update_records replaces one batch per bulk_write call"""
+    database.add_records(faq_records(5))
+    database.update_records(faq_records(5, answer='b'), ordered=ordered, batchsize=3)
+    assert database.mongodb['FAQ'].calls[1:] == [
+        ('bulk_write', 3, {'ordered': ordered, 'upsert': [False] * 3}),
+        ('bulk_write', 2, {'ordered': ordered, 'upsert': [False] * 2})]
+    df = database.get_records_df('FAQ')
+    assert len(df) == 5
+    assert (df.answer == 'b').all()
+
+def test_update_records_upsert(database):
+    """Tests that update_records checks existence unless upserting"""
+    database.add_records(faq_records(2))
+    with pytest.raises(ValueError, match='faq2'):
+        database.update_records(faq_records(4, answer='b'), batchsize=2)
+    assert [call[0] for call in database.mongodb['FAQ'].calls] == ['insert_many']
+
+    database.update_records(faq_records(4, answer='b'), upsert=True, batchsize=2)
+    assert database.mongodb['FAQ'].calls[1:] == [
+        ('bulk_write', 2, {'ordered': False, 'upsert': [True, True]}),
+        ('bulk_write', 2, {'ordered': False, 'upsert': [True, True]})]
+    df = database.get_records_df('FAQ')
+    assert df.name.tolist() == ['faq0', 'faq1', 'faq2', 'faq3']
+    assert (df.answer == 'b').all()
+
+class StreamCursor(FakeCursor):
+    """Fake cursor that yields entries from a generator function"""
+
+    def __init__(self, entries):
+        super().__init__([])
+        self.entries = entries
+        self.fetched = 0
+        self.thread = None
+
+    def __iter__(self):
+        self.thread = threading.current_thread()
+        for entry in self.entries():
+            self.fetched += 1
+            yield entry
+
+def failing_entries():
+    """Yields four entries then fails"""
+    yield from range(4)
+    raise RuntimeError('cursor failed')
+
+def test_prefetch_batches(database):
+    """Tests that __prefetch yields the cursor's entries in batches"""
+    cursor = StreamCursor(lambda: iter(range(7)))
+    batches = list(database._MongoDatabase__prefetch(cursor, 3))
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert cursor.closed
+    assert cursor.thread is not threading.current_thread()
+    assert not cursor.thread.is_alive()
+
+    with pytest.raises(ValueError, match='batchsize'):
+        next(database._MongoDatabase__prefetch(StreamCursor(lambda: iter([])), 0))
+
+def test_prefetch_error(database, monkeypatch):
+    """Tests that errors raised while fetching are raised by __prefetch"""
+    cursor = StreamCursor(failing_entries)
+    prefetch = database._MongoDatabase__prefetch(cursor, 2)
+    assert next(prefetch) == [0, 1]
+    assert next(prefetch) == [2, 3]
+    with pytest.raises(RuntimeError, match='cursor failed'):
+        next(prefetch)
+    assert cursor.closed
+    assert not cursor.thread.is_alive()
+
+    # Errors reach the callers of get_records
+    monkeypatch.setattr(FakeCollection, 'find',
+                        lambda self, *args, **kwargs: StreamCursor(failing_entries))
+    with pytest.raises(RuntimeError, match='cursor failed'):
+        database.get_records('FAQ', sort=None)
+
+def test_prefetch_close(database):
+    """Tests that closing __prefetch early stops the thread and the cursor"""
+    cursor = StreamCursor(itertools.count)
+    prefetch = database._MongoDatabase__prefetch(cursor, 5)
+    assert next(prefetch) == [0, 1, 2, 3, 4]
+    prefetch.close()
+    assert cursor.closed
+    assert not cursor.thread.is_alive()
+
+    # At most the used batch, one queued batch and one partial batch are fetched
+    assert cursor.fetched <= 15
+
+def test_metadata_matches_content(database):
+    """Tests that stored metadata is built from the stored content"""
+    def modified(name):
+        record = load_record('FAQ', name=name, question='q', answer='a')
+        record = load_record('FAQ', model=record.build_model(), name=name)
+        record.answer = 'changed'
+        return record
+
+    database.add_record(record=modified('faq0'))
+    database.add_records([modified('faq1')])
+    database.add_record(record=load_record('FAQ', name='faq2', question='q', answer='b'))
+    database.update_record(record=modified('faq2'))
+
+    for name in ['faq0', 'faq1', 'faq2']:
+        entry = database.mongodb['FAQ'].find_one({'name': name})
+        assert entry['content']['faq']['answer'] == 'a'
+        assert entry['metadata']['answer'] == 'a'
+    assert database.get_records_df('FAQ', answer='changed').empty
+
+    # Rebuilt content and metadata both use the attributes
+    database.update_records([modified('faq1')], build=True)
+    entry = database.mongodb['FAQ'].find_one({'name': 'faq1'})
+    assert entry['content']['faq']['answer'] == 'changed'
+    assert entry['metadata']['answer'] == 'changed'
+
+def test_find_sort(database, monkeypatch):
+    """Tests that server-side sorts are allowed to use temporary files"""
+    cursors = []
+    find = FakeCollection.find
+    def recording_find(self, *args, **kwargs):
+        cursors.append(find(self, *args, **kwargs))
+        return cursors[-1]
+    monkeypatch.setattr(FakeCollection, 'find', recording_find)
+    database.add_records(faq_records(3))
+
+    database.get_records('FAQ')
+    assert cursors[-1].sortspec is not None and cursors[-1].diskuse is True
+    database.get_records_df('FAQ', sort=None)
+    assert cursors[-1].sortspec is None and cursors[-1].diskuse is None
+
+def test_get_records_name_order(database):
+    """Tests that searches for names keep their order unless sort is given"""
+    database.add_records(faq_records(4))
+    names = ['faq2', 'faq0', 'faq3', 'faq0']
+    records = database.get_records('FAQ', name=names)
+    assert [record.name for record in records] == ['faq2', 'faq0', 'faq3']
+    df = database.get_records_df('FAQ', name=names, skip=1, limit=1, batchsize=1)
+    assert df.name.tolist() == ['faq0']
+    records = database.get_records('FAQ', name=names, lazy=True, limit=2)
+    assert [record.name for record in records] == ['faq2', 'faq0']
+    df = database.get_records_df('FAQ', name=names, sort='name')
+    assert df.name.tolist() == ['faq0', 'faq2', 'faq3']
@@ -89,6 +89,22 @@ class TestFloatMatchQuery(BaseTestQuery):
             },
         ])
 
+    def test_sql(self):
+        """Tests sql query"""
+
+        query = load_query(self.style, name='thisguy')
+
+        # Test None value
+        querylist, params = [], []
+        query.sql(querylist, params, None)
+        assert len(querylist) == 0
+
+        # Check single value
+        querylist, params = [], []
+        query.sql(querylist, params, 2.0)
+        assert querylist[0] == '("thisguy" BETWEEN ? AND ?)'
+        assert params[0] < 2.0 < params[1]
+
     def test_pandas(self):
         """Tests pandas filter without a parent element"""
 
@@ -48,6 +48,28 @@ class TestStrContainsQuery(BaseTestQuery):
         assert len(querydict['$and']) == 1
         assert querydict['$and'][0]['content.root.element'] == 'value'
 
+    def test_sql(self):
+        """Tests sql query"""
+
+        query = load_query(self.style, name='thisguy')
+
+        # Test None value
+        querylist, params = [], []
+        query.sql(querylist, params, None)
+        assert len(querylist) == 0
+
+        # Check multiple values
+        querylist, params = [], []
+        query.sql(querylist, params, ['value1', 'value2'])
+        assert querylist == ['instr("thisguy", ?) > 0', 'instr("thisguy", ?) > 0']
+        assert params == ['"value1"', '"value2"']
+
+        # Check that non-str values are left to the pandas filter
+        querylist, params = [], []
+        query.sql(querylist, params, [1, 'value1', 2.0, True])
+        assert querylist == ['instr("thisguy", ?) > 0']
+        assert params == ['"value1"']
+
     @property
     def df(self) -> pd.DataFrame:
         """pd.Dataframe: demo data for filter testing"""
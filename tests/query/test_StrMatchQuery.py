@@ -84,6 +84,22 @@ class TestStrMatchQuery(BaseTestQuery):
             },
         ])
 
+    def test_sql(self):
+        """Tests sql query"""
+
+        query = load_query(self.style, name='thisguy')
+
+        # Test None value
+        querylist, params = [], []
+        query.sql(querylist, params, None)
+        assert len(querylist) == 0
+
+        # Check multiple values
+        querylist, params = [], []
+        query.sql(querylist, params, ['value1', 'value2'])
+        assert querylist[0] == '"thisguy" IN (?, ?)'
+        assert params == ['value1', 'value2']
+
     def test_pandas(self):
         """Tests pandas filter without a parent element"""
 
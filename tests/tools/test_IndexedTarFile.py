@@ -0,0 +1,48 @@
+# coding: utf-8
+# Standard Python libraries
+from io import BytesIO
+import tarfile
+
+# https://docs.pytest.org/en/latest/
+import pytest
+
+from yabadaba.tools import IndexedTarFile
+
+def build_tar():
+    """Builds an uncompressed tar archive with several members"""
+    buffer = BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:') as tar:
+        for i in range(5):
+            content = f'content {i}'.encode() * (i + 1)
+            info = tarfile.TarInfo(f'rec/file{i}.txt')
+            info.size = len(content)
+            tar.addfile(info, BytesIO(content))
+        content = b'long name'
+        info = tarfile.TarInfo('rec/' + 'x' * 150 + '.txt')
+        info.size = len(content)
+        tar.addfile(info, BytesIO(content))
+    return buffer.getvalue()
+
+def test_IndexedTarFile():
+    content = build_tar()
+    with tarfile.open(fileobj=BytesIO(content), mode='r:') as tar:
+        index = IndexedTarFile.build_index(tar, len(content))
+    assert len(index['members']) == 6
+
+    tar = IndexedTarFile.open(fileobj=BytesIO(content), mode='r:', index=index)
+    assert tar.indexed
+    assert tar.extractfile('rec/file3.txt').read() == b'content 3' * 4
+    assert tar.extractfile('rec/' + 'x' * 150 + '.txt').read() == b'long name'
+    assert tar.getnames()[0] == 'rec/file0.txt'
+    with pytest.raises(KeyError):
+        tar.getmember('rec/missing.txt')
+
+    # Members are found without loading the full member list
+    assert len(tar.members) <= 1
+    assert [member.name for member in tar][-1] == 'rec/' + 'x' * 150 + '.txt'
+
+    # Indices that do not match the archive are ignored
+    index['size'] += 1
+    tar = IndexedTarFile.open(fileobj=BytesIO(content), mode='r:', index=index)
+    assert not tar.indexed
+    assert tar.extractfile('rec/file1.txt').read() == b'content 1' * 2
@@ -1,14 +1,21 @@
 # coding: utf-8
 # Standard Python libraries
 from pathlib import Path
-import shutil
 import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from io import BytesIO
-from typing import Optional, Tuple, Union
+import functools
+import itertools
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Optional, Tuple, Union
 
 # https://github.com/usnistgov/pycdcs
 from cdcs import CDCS
 
+# https://requests.readthedocs.io/
+import requests
+
 # http://www.numpy.org/
 import numpy as np
 
@@ -21,7 +28,12 @@ from DataModelDict import DataModelDict as DM
 # Relative imports
 from ..tools import aslist, iaslist
 from . import Database
-from ..record import recordmanager, load_record, Record
+from .Database import _namesort
+from ..record import recordmanager, load_record, Record, RecordProxy
+
+def _invalid_page(err: requests.HTTPError) -> bool:
+    """Checks if an HTTPError is the response for a page past the last page"""
+    return err.response is not None and err.response.status_code == 404
 
 class CDCSDatabase(Database):
 
@@ -33,7 +45,8 @@ class CDCSDatabase(Database):
                  cert: Union[str, Tuple[str], None] = None, 
                  certification: Union[str, Tuple[str], None] = None,
                  verify: Optional[bool] = True,
-                 cdcsversion: Optional[str] = None):
+                 cdcsversion: Optional[str] = None,
+                 spoolsize: int = 134217728):
         """
         Initializes a database of style curator.
         
@@ -66,6 +79,11 @@ class CDCSDatabase(Database):
             calls.  This can be specified as "#.#.#", or if None is given will
             default to "2.15.0".  For CDCS versions 3.X.X, this is ignored as
             version info is obtained directly from the database.
+        spoolsize : int, optional
+            The size in bytes up to which tar archives built by add_tar are
+            held in memory before being spooled to a temporary file in the
+            system's temporary directory.  Default value is 134217728 (128
+            MiB).
         """
         # Fetch password from file if needed
         try:
@@ -82,6 +100,13 @@ class CDCSDatabase(Database):
         # Pass host to Database initializer
         Database.__init__(self, host)
 
+        self.__spoolsize = spoolsize
+
+    @property
+    def spoolsize(self) -> int:
+        """int: The size in bytes up to which new tar archives are held in memory"""
+        return self.__spoolsize
+
     @property
     def style(self) -> str:
         """str: The database style"""
@@ -98,6 +123,12 @@ class CDCSDatabase(Database):
                     name: Union[str, list, None] = None,
                     query: Optional[dict] = None,
                     keyword: Optional[str] = None,
+                    lazy: bool = False,
+                    sort: Union[str, list, None] = _namesort,
+                    ascending: bool = True,
+                    skip: int = 0,
+                    limit: Optional[int] = None,
+                    threads: int = 4,
                     **kwargs) -> Union[list, Tuple[list, pd.DataFrame]]:
         """
         Produces a list of all matching records in the database.
@@ -107,7 +138,9 @@ class CDCSDatabase(Database):
         style : str, optional
             The record style to search. If not given, a prompt will ask for it.
         name : str or list, optional
-            Record name(s) to delimit by. 
+            Record name(s) to delimit by.  CDCS only supports matching one
+            record title per request, so each unique name is queried
+            separately, with up to threads queries running concurrently.
         return_df : bool, optional
             If True, then the corresponding pandas.Dataframe of metadata
             will also be returned
@@ -118,6 +151,34 @@ class CDCSDatabase(Database):
         keyword : str, optional
             Allows for a search of records whose contents contain a keyword.
             Alternative to giving query or kwargs.
+        lazy : bool, optional
+            If True, then RecordProxy objects are returned that only parse the
+            record content when an attribute other than name is accessed.  As
+            the metadata is generated from the content, this has no effect if
+            return_df is True or sort is not 'name' or None.  Default value is
+            False.
+        sort : str, list or None, optional
+            The metadata key(s) to sort the records by.  By default, records
+            are sorted by name, or kept in the order of the names if name is
+            given.  CDCS queries cannot be sorted on the server, so if sort
+            is not None then all matching records are retrieved and sorted
+            before skip and limit are applied.  If None, then the records are
+            returned in the server's order and only the pages containing the
+            requested records are retrieved.
+        ascending : bool, optional
+            Indicates if the sort is in ascending (True, default) or
+            descending (False) order.
+        skip : int, optional
+            The number of matching records to skip.  Default value is 0.
+        limit : int, optional
+            The maximum number of records to return.  If None (default), then
+            all matching records after skip are returned.
+        threads : int, optional
+            The number of names queried concurrently when multiple names are
+            given.  Results are combined in the order of the names.  If any
+            query fails, the error of the first failing name in that order is
+            raised after the queries that have not started are cancelled.
+            Default value is 4.
         **kwargs : any, optional
             Any of the record-specific metadata keywords that can be searched
             for.
@@ -134,27 +195,41 @@ class CDCSDatabase(Database):
         if style is None:
             style = self.select_record_style()
 
-        # Setup keyword search
-        if keyword is not None:
-            assert len(kwargs) == 0, 'keyword cannot be given with kwargs'
-            assert query is None, 'keyword cannot be given with query'
-
-        # Setup query
-        elif query is not None:
-            assert len(kwargs) == 0, 'query cannot be given with kwargs'
-        else:
-            query = load_record(style).cdcsquery(**kwargs)
-
-        def build_records(series):
-            return load_record(series.template_title, model=series.xml_content,
-                               name=series.title, database=self)
-
-        # Build records by querying for each record name (or None)
+        # Keep the order of given names by default
+        if sort is _namesort and name is not None:
+            sort = None
+
+        # Only retrieve the pages containing the requested records
+        pageskip, pagelimit = 0, None
+        if sort is None and (name is None or isinstance(name, str)):
+            pageskip, pagelimit = skip, limit
+            skip, limit = 0, None
+
+        # Iterate over the query results for each record name (or None)
+        rows = itertools.chain.from_iterable(
+            data.itertuples() for data in self.__iter_pages(style, name=name,
+                                                            query=query,
+                                                            keyword=keyword,
+                                                            skip=pageskip,
+                                                            limit=pagelimit,
+                                                            threads=threads,
+                                                            **kwargs))
+        stop = None if limit is None else skip + limit
+        if sort is None:
+            rows = itertools.islice(rows, skip, stop)
+
+        # Build records or record proxies
+        lazy = lazy and not return_df and sort in [None, 'name']
         records = []
-        for n in iaslist(name):
-            data = self.cdcs.query(title=n, template=style, mongoquery=query, keyword=keyword)
-            if len(data) > 0:
-                records.extend(data.apply(build_records, axis=1))
+        for row in rows:
+            loader = functools.partial(load_record, row.template_title,
+                                       model=row.xml_content,
+                                       name=row.title, database=self)
+            if lazy:
+                records.append(RecordProxy(row.template_title, {'name': row.title},
+                                           loader, database=self))
+            else:
+                records.append(loader())
         records = np.array(records)
 
         # Build df
@@ -167,9 +242,10 @@ class CDCSDatabase(Database):
             r = load_record(style)
             df = pd.DataFrame(columns=r.metadatakeys)
 
-        # Sort by name
-        df = df.sort_values('name')
-        records = records[df.index.tolist()]
+        # Sort and select the requested records
+        if sort is not None:
+            df = df.sort_values(sort, ascending=ascending, kind='stable').iloc[skip:stop]
+            records = records[df.index.tolist()]
 
         # Return records (and df)
         if return_df:
@@ -182,6 +258,11 @@ class CDCSDatabase(Database):
                        name: Union[str, list, None] = None,
                        query: Optional[dict] = None,
                        keyword: Optional[str] = None,
+                       sort: Union[str, list, None] = _namesort,
+                       ascending: bool = True,
+                       skip: int = 0,
+                       limit: Optional[int] = None,
+                       threads: int = 4,
                        **kwargs) -> pd.DataFrame:
         """
         Produces a list of all matching records in the database.
@@ -199,6 +280,28 @@ class CDCSDatabase(Database):
         keyword : str, optional
             Allows for a search of records whose contents contain a keyword.
             Alternative to giving query or kwargs.
+        sort : str, list or None, optional
+            The metadata key(s) to sort the records by.  By default, records
+            are sorted by name, or kept in the order of the names if name is
+            given.  CDCS queries cannot be sorted on the server, so if sort
+            is not None then all matching records are retrieved and sorted
+            before skip and limit are applied.  If None, then the records are
+            returned in the server's order and only the pages containing the
+            requested records are retrieved.
+        ascending : bool, optional
+            Indicates if the sort is in ascending (True, default) or
+            descending (False) order.
+        skip : int, optional
+            The number of matching records to skip.  Default value is 0.
+        limit : int, optional
+            The maximum number of records to return.  If None (default), then
+            all matching records after skip are returned.
+        threads : int, optional
+            The number of names queried concurrently when multiple names are
+            given.  Results are combined in the order of the names.  If any
+            query fails, the error of the first failing name in that order is
+            raised after the queries that have not started are cancelled.
+            Default value is 4.
         **kwargs : any, optional
             Any of the record-specific metadata keywords that can be searched
             for.
@@ -208,7 +311,211 @@ class CDCSDatabase(Database):
         records_df : pandas.DataFrame
             The corresponding metadata values for the records.
         """
-        return self.get_records(style, name=name, query=query, keyword=keyword, return_df=True, **kwargs)[1]
+        return self.get_records(style, name=name, query=query, keyword=keyword,
+                                sort=sort, ascending=ascending, skip=skip,
+                                limit=limit, return_df=True, threads=threads,
+                                **kwargs)[1]
+
+    def iter_records(self,
+                     style: Optional[str] = None,
+                     chunksize: int = 100,
+                     name: Union[str, list, None] = None,
+                     query: Optional[dict] = None,
+                     keyword: Optional[str] = None,
+                     **kwargs):
+        """
+        Iterates over all matching records in the database.  The query
+        results are retrieved one page at a time.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search. If not given, a prompt will ask for it.
+        chunksize : int, optional
+            Not used as the page size is set by the CDCS server.  Included
+            for compatibility with the other database styles.
+        name : str or list, optional
+            Record name(s) to delimit by. 
+        query : dict, optional
+            A custom-built CDCS-style query to use for the record search.
+            Alternative to passing in the record-specific metadata kwargs.
+            Note that name can be given with query.
+        keyword : str, optional
+            Allows for a search of records whose contents contain a keyword.
+            Alternative to giving query or kwargs.
+        **kwargs : any, optional
+            Any of the record-specific metadata keywords that can be searched
+            for.
+
+        Yields
+        ------
+        Record
+            Each record from the database matching the given parameters.
+        """
+        for data in self.__iter_pages(style, name=name, query=query,
+                                      keyword=keyword, paged=True, **kwargs):
+            for series in data.itertuples():
+                yield load_record(series.template_title, model=series.xml_content,
+                                  name=series.title, database=self)
+
+    def iter_records_df(self,
+                        style: Optional[str] = None,
+                        chunksize: int = 100,
+                        name: Union[str, list, None] = None,
+                        query: Optional[dict] = None,
+                        keyword: Optional[str] = None,
+                        **kwargs):
+        """
+        Iterates over the metadata of all matching records in the database
+        in chunks.  The query results are retrieved one page at a time.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search. If not given, a prompt will ask for it.
+        chunksize : int, optional
+            The maximum number of records in each chunk.  Default value is 100.
+        name : str or list, optional
+            Record name(s) to delimit by. 
+        query : dict, optional
+            A custom-built CDCS-style query to use for the record search.
+            Alternative to passing in the record-specific metadata kwargs.
+            Note that name can be given with query.
+        keyword : str, optional
+            Allows for a search of records whose contents contain a keyword.
+            Alternative to giving query or kwargs.
+        **kwargs : any, optional
+            Any of the record-specific metadata keywords that can be searched
+            for.
+
+        Yields
+        ------
+        pandas.DataFrame
+            The metadata for a chunk of the matching records.
+        """
+        chunk = []
+        for record in self.iter_records(style, name=name, query=query,
+                                        keyword=keyword, **kwargs):
+            chunk.append(record.metadata())
+            if len(chunk) == chunksize:
+                yield pd.DataFrame(chunk)
+                chunk = []
+        if len(chunk) > 0:
+            yield pd.DataFrame(chunk)
+
+    def __iter_pages(self,
+                     style: Optional[str] = None,
+                     name: Union[str, list, None] = None,
+                     query: Optional[dict] = None,
+                     keyword: Optional[str] = None,
+                     skip: int = 0,
+                     limit: Optional[int] = None,
+                     paged: bool = False,
+                     threads: int = 1,
+                     **kwargs):
+        """
+        Iterates over the pages of query results for matching records.  The
+        results for each record name start after skip records and contain
+        at most limit records.  If multiple names are given, up to threads
+        names are queried concurrently and the pages are yielded in the order
+        of the names.
+
+        Yields
+        ------
+        pandas.DataFrame
+            The CDCS query results for one page.
+        """
+        # Set default search parameters
+        if style is None:
+            style = self.select_record_style()
+
+        # Setup keyword search
+        if keyword is not None:
+            assert len(kwargs) == 0, 'keyword cannot be given with kwargs'
+            assert query is None, 'keyword cannot be given with query'
+
+        # Setup query
+        elif query is not None:
+            assert len(kwargs) == 0, 'query cannot be given with kwargs'
+        else:
+            query = load_record(style).cdcsquery(**kwargs)
+
+        # Query each unique record name (or None) one page at a time
+        names = list(dict.fromkeys(iaslist(name)))
+        if threads == 1 or len(names) == 1:
+            for n in names:
+                yield from self.__name_pages(style, n, query, keyword, skip,
+                                             limit, paged)
+            return
+
+        # Query the names concurrently
+        def pages(n):
+            return list(self.__name_pages(style, n, query, keyword, skip,
+                                          limit, paged))
+        executor = ThreadPoolExecutor(max_workers=threads)
+        try:
+            for data in executor.map(pages, names):
+                yield from data
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def __name_pages(self,
+                     style: str,
+                     name: Optional[str],
+                     query: Optional[dict],
+                     keyword: Optional[str],
+                     skip: int = 0,
+                     limit: Optional[int] = None,
+                     paged: bool = False):
+        """
+        Iterates over the query results for one record name (or None).  All
+        results are retrieved with one pycdcs query unless skip or limit are
+        given or paged is True, in which case only the pages containing the
+        requested records are retrieved, one at a time.
+        """
+        def get_page(page):
+            return self.cdcs.query(title=name, template=style, mongoquery=query,
+                                   keyword=keyword, page=page)
+
+        # Let pycdcs retrieve and combine all pages
+        if not paged and skip == 0 and limit is None:
+            data = get_page(None)
+            if len(data) > 0:
+                yield data
+            return
+
+        # Find the end of the requested records
+        stop = self.cdcs.query_count(title=name, template=style,
+                                     mongoquery=query, keyword=keyword)
+        if limit is not None:
+            stop = min(stop, skip + limit)
+        if skip >= stop:
+            return
+
+        # The first page shows the server's page size, which is used to find
+        # the page containing the first requested record
+        page = 1
+        start = 0
+        data = get_page(page)
+        if 0 < len(data) <= skip:
+            page = skip // len(data) + 1
+            start = (page - 1) * len(data)
+            try:
+                data = get_page(page)
+            except requests.HTTPError as err:
+                # Records deleted since counting can put the page past the end
+                if _invalid_page(err):
+                    return
+                raise
+
+        while len(data) > 0:
+            end = start + len(data)
+            yield data.iloc[max(skip - start, 0):stop - start]
+            if end >= stop:
+                break
+            page += 1
+            start = end
+            data = get_page(page)
 
     def get_record(self, 
                    style: Optional[str] = None,
@@ -270,6 +577,7 @@ class CDCSDatabase(Database):
                       name: Union[str, list, None] = None,
                       query: Optional[dict] = None,
                       keyword: Optional[str] = None,
+                      threads: int = 4,
                       **kwargs) -> int:
         """
         Retrieves a count of matching records from the database.  Much faster
@@ -288,6 +596,12 @@ class CDCSDatabase(Database):
         keyword : str, optional
             Allows for a search of records whose contents contain a keyword.
             Alternative to giving query or kwargs.
+        threads : int, optional
+            The number of names queried concurrently when multiple names are
+            given.  Results are combined in the order of the names.  If any
+            query fails, the error of the first failing name in that order is
+            raised after the queries that have not started are cancelled.
+            Default value is 4.
         **kwargs : any, optional
             Any of the record-specific metadata keywords that can be searched
             for.
@@ -312,11 +626,18 @@ class CDCSDatabase(Database):
         else:
             query = load_record(style).cdcsquery(**kwargs)
 
-        count = 0
-        for n in iaslist(name):
-            count += self.cdcs.query_count(title=n, template=style, mongoquery=query, keyword=keyword)
+        def count(n):
+            return self.cdcs.query_count(title=n, template=style, mongoquery=query, keyword=keyword)
 
-        return count
+        # Count each unique record name (or None)
+        names = list(dict.fromkeys(iaslist(name)))
+        if threads == 1 or len(names) == 1:
+            return sum(count(n) for n in names)
+        executor = ThreadPoolExecutor(max_workers=threads)
+        try:
+            return sum(executor.map(count, names))
+        finally:
+            executor.shutdown(cancel_futures=True)
 
     def add_record(self,
                    record: Optional[Record] = None,
@@ -537,6 +858,186 @@ class CDCSDatabase(Database):
         if verbose:
             print(f'{record} deleted from {self.host}')
 
+    def add_records(self,
+                    records: list,
+                    build: bool = False,
+                    verbose: bool = False,
+                    workspace: Union[str, pd.Series, None] = None,
+                    auto_set_pid_off: bool = False,
+                    threads: int = 4) -> list:
+        """
+        Adds multiple new records to the database using concurrent uploads.
+        
+        Parameters
+        ----------
+        records : list
+            The new records to add to the database.
+        build : bool, optional
+            If True, then the uploaded content will be (re)built based on the
+            records' attributes.  If False (default), then records' existing
+            content will be loaded if it exists, or built if it doesn't exist.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+        workspace : str or pandas.Series, optional
+            The name of a workspace to assign the records to.  If not given
+            then the records are not assigned to a workspace and will only be
+            accessible to the user who uploaded them.
+        auto_set_pid_off : bool
+            If True, the database's auto_set_pid setting will be turned off
+            while the records are uploaded.
+        threads : int, optional
+            The number of concurrent uploads.  Default value is 4.
+
+        Returns
+        ------
+        list
+            The added records.
+        """
+        records = aslist(records)
+        contents = self.__build_contents(records, build)
+
+        def upload(record, content):
+            self.cdcs.upload_record(template=record.style, content=content,
+                                    title=record.name)
+            if workspace is not None:
+                self.cdcs.assign_records(workspace, template=record.style,
+                                         title=record.name)
+
+        self.__run_concurrent(upload, records, contents, auto_set_pid_off, threads)
+
+        if verbose:
+            print(f'{len(records)} records added to {self.host}')
+
+        return records
+
+    def update_records(self,
+                       records: list,
+                       build: bool = False,
+                       verbose: bool = False,
+                       workspace: Union[str, pd.Series, None] = None,
+                       auto_set_pid_off: bool = False,
+                       threads: int = 4) -> list:
+        """
+        Replaces multiple existing records with new content using concurrent
+        uploads.
+        
+        Parameters
+        ----------
+        records : list
+            The records with new content to update in the database.
+        build : bool, optional
+            If True, then the uploaded content will be (re)built based on the
+            records' attributes.  If False (default), then records' existing
+            content will be loaded if it exists, or built if it doesn't exist.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+        workspace : str or pandas.Series, optional
+            The name of a workspace to assign the records to.
+        auto_set_pid_off : bool
+            If True, the database's auto_set_pid setting will be turned off
+            while the records are uploaded.
+        threads : int, optional
+            The number of concurrent uploads.  Default value is 4.
+
+        Returns
+        ------
+        list
+            The updated records.
+        """
+        records = aslist(records)
+        contents = self.__build_contents(records, build)
+
+        def update(record, content):
+            self.cdcs.update_record(template=record.style, content=content,
+                                    title=record.name)
+            if workspace is not None:
+                self.cdcs.assign_records(workspace, template=record.style,
+                                         title=record.name)
+
+        self.__run_concurrent(update, records, contents, auto_set_pid_off, threads)
+
+        if verbose:
+            print(f'{len(records)} records updated in {self.host}')
+
+        return records
+
+    def delete_records(self,
+                       records: Optional[list] = None,
+                       style: Optional[str] = None,
+                       names: Optional[list] = None,
+                       verbose: bool = False,
+                       threads: int = 4):
+        """
+        Permanently deletes multiple records from the database using
+        concurrent requests.
+        
+        Parameters
+        ----------
+        records : list, optional
+            The records to delete from the database.  If not given, names
+            and style are needed to identify the records to delete.
+        style : str, optional
+            The style of the records to delete.
+        names : list, optional
+            The names of the records to delete.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+        threads : int, optional
+            The number of concurrent requests.  Default value is 4.
+        
+        Raises
+        ------
+        ValueError
+            If style and/or names given with records.
+        """
+        if records is not None:
+            if style is not None or names is not None:
+                raise ValueError('kwargs style and names cannot be given with kwarg records')
+            keys = [(record.style, record.name) for record in aslist(records)]
+        else:
+            keys = [(style, name) for name in aslist(names)]
+
+        def delete(style, name):
+            self.cdcs.delete_record(template=style, title=name)
+
+        if len(keys) > 0:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(delete, *zip(*keys)))
+
+        if verbose:
+            print(f'{len(keys)} records deleted from {self.host}')
+
+    def __build_contents(self,
+                         records: list,
+                         build: bool) -> list:
+        """Retrieves/builds the XML content of records"""
+        contents = []
+        for record in records:
+            try:
+                assert build is False
+                contents.append(record.model.xml())
+            except Exception:
+                contents.append(record.build_model().xml())
+        return contents
+
+    def __run_concurrent(self,
+                         fxn,
+                         records: list,
+                         contents: list,
+                         auto_set_pid_off: bool,
+                         threads: int):
+        """Calls fxn(record, content) for all records using a thread pool"""
+        if len(records) == 0:
+            return
+        with ExitStack() as stack:
+            if auto_set_pid_off:
+                stack.enter_context(self.cdcs.auto_set_pid_off())
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(fxn, records, contents))
+
     def assign_records(self,
                        records: Union[Record, list],
                        workspace: Union[str, pd.Series],
@@ -565,7 +1066,7 @@ class CDCSDatabase(Database):
                 record: Optional[Record] = None,
                 style: Optional[str] = None,
                 name: Optional[str] = None,
-                tar: Optional[bytes] = None,
+                tar: Union[bytes, BinaryIO, None] = None,
                 root_dir: Optional[Path] = None):
         """
         Archives and stores a folder associated with a record.
@@ -580,8 +1081,9 @@ class CDCSDatabase(Database):
             The name to use in uniquely identifying the record.
         style : str, optional
             The style to use in uniquely identifying the record.
-        tar : bytes, optional
-            The bytes content of a tar file to save.  tar cannot be given
+        tar : bytes or file-like object, optional
+            The bytes content of a tar file to save, or a readable binary
+            file-like object to read the content from.  tar cannot be given
             with root_dir.
         root_dir : str, optional
             Specifies the root directory for finding the directory to archive.
@@ -618,40 +1120,49 @@ class CDCSDatabase(Database):
             if root_dir is None:
                 root_dir = Path.cwd()
 
-            # Make archive
-            basename = Path(root_dir, record.name)
-            filename = Path(root_dir, record.name + '.tar.gz')
-            shutil.make_archive(basename, 'gztar', root_dir=root_dir,
-                                base_dir=record.name)
-
-            # Upload archive
-            tries = 0
-            while tries < 2:
-                tries += 1
-                try:
-                    url = self.cdcs.upload_blob(filename.as_posix())
-                    break
-                except Exception as err:
-                    if tries == 2:
-                        raise ValueError('Failed to upload archive 2 times') from err
-
-            # Remove local archive copy
-            filename.unlink()
+            # Make archive in a buffer that only spills to the temp directory
+            # for large archives
+            target = Path(root_dir, record.name)
+            filename = Path(record.name + '.tar.gz')
+            with SpooledTemporaryFile(max_size=self.spoolsize) as f:
+                with tarfile.open(fileobj=f, mode='w|gz') as tar:
+                    tar.add(target, record.name)
+
+                # Upload archive
+                tries = 0
+                while tries < 2:
+                    tries += 1
+                    try:
+                        f.seek(0)
+                        url = self.cdcs.upload_blob(filename=filename, blobbytes=f)
+                        break
+                    except Exception as err:
+                        if tries == 2:
+                            raise ValueError('Failed to upload archive 2 times') from err
 
         # Upload pre-existing tar object
         elif root_dir is None:
             filename = Path(record.name + '.tar.gz')
+            if not hasattr(tar, 'read'):
+                tar = BytesIO(tar)
+
+            # Streams can only be uploaded again if they are seekable
+            retry = tar.seekable()
+            if retry:
+                start = tar.tell()
 
             # Upload archive
             tries = 0
             while tries < 2:
                 tries += 1
                 try:
-                    url = self.cdcs.upload_blob(filename=filename, blobbytes=BytesIO(tar))
+                    if retry:
+                        tar.seek(start)
+                    url = self.cdcs.upload_blob(filename=filename, blobbytes=tar)
                     break
                 except Exception as err:
-                    if tries == 2:
-                        raise ValueError('Failed to upload archive 2 times') from err
+                    if tries == 2 or not retry:
+                        raise ValueError(f'Failed to upload archive {tries} times') from err
 
         else:
             raise ValueError('tar and root_dir cannot both be given')
@@ -660,7 +1171,8 @@ class CDCSDatabase(Database):
                 record: Optional[Record] = None,
                 style: Optional[str] = None,
                 name: Optional[str] = None,
-                raw: bool = False) -> Union[tarfile.TarFile, bytes]:
+                raw: bool = False,
+                stream: bool = False) -> Union[tarfile.TarFile, bytes, BinaryIO]:
         """
         Retrieves the tar archive associated with a record in the database.
         
@@ -675,12 +1187,17 @@ class CDCSDatabase(Database):
         raw : bool, optional
             If True, return the archive as raw binary content. If 
             False, return as an open tarfile. (Default is False)
+        stream : bool, optional
+            If True, return the archive\'s raw binary content as a readable
+            file-like object so that it does not have to be loaded into
+            memory.  The caller is responsible for closing it.  Overrides
+            raw.  (Default is False)
             
         Returns
         -------
-        tarfile or str
-            The tar archive as an open tarfile if raw=False, or as a binary str if
-            raw=True.
+        tarfile, bytes or file-like object
+            The tar archive as an open tarfile if raw=False, as a binary str if
+            raw=True, or as a readable binary file-like object if stream=True.
             
         Raises
         ------
@@ -698,6 +1215,13 @@ class CDCSDatabase(Database):
 
         filename = Path(record.name + '.tar.gz')
 
+        # Stream the tar file's content
+        if stream is True:
+            blob = self.cdcs.get_blob(filename=filename)
+            response = self.cdcs.get(f'/rest/blob/download/{blob.id}', stream=True)
+            response.raw.decode_content = True
+            return response.raw
+
         # Download tar file
         tardata = self.cdcs.get_blob_contents(filename=filename)
 
@@ -744,7 +1268,7 @@ class CDCSDatabase(Database):
                    record: Optional[Record] = None,
                    style: Optional[str] = None,
                    name: Optional[str] = None,
-                   tar: Optional[bytes] = None,
+                   tar: Union[bytes, BinaryIO, None] = None,
                    root_dir: Optional[Path] = None):
         """
         Archives and stores a folder associated with a record.
@@ -759,8 +1283,9 @@ class CDCSDatabase(Database):
             The name to use in uniquely identifying the record.
         style : str, optional
             The style to use in uniquely identifying the record.
-        tar : bytes, optional
-            The bytes content of a tar file to save.  tar cannot be given
+        tar : bytes or file-like object, optional
+            The bytes content of a tar file to save, or a readable binary
+            file-like object to read the content from.  tar cannot be given
             with root_dir.
         root_dir : str, optional
             Specifies the root directory for finding the directory to archive.
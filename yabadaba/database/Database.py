@@ -1,7 +1,8 @@
 # coding: utf-8
 # Standard Python libraries
+from numbers import Number
 from pathlib import Path
-from typing import Optional, Tuple, Union
+from typing import BinaryIO, Optional, Tuple, Union
 import tarfile
 
 from tqdm import tqdm
@@ -13,7 +14,19 @@ from DataModelDict import DataModelDict as DM
 
 # iprPy imports
 from ..record import recordmanager, load_record, Record
-from ..tools import screen_input
+from ..tools import aslist, screen_input
+
+class _NameSort(str):
+    """Type of the default sort, which is by name unless names are given"""
+
+# Default sort of record searches: by name, or in the order of the names if
+# the search is limited to given names.  It is a distinct object from 'name'
+# so that `sort is _namesort` only holds if sort is not given.
+_namesort = _NameSort('name')
+
+def _isnumber(value) -> bool:
+    """Checks if a metadata value is an int or float but not a bool"""
+    return isinstance(value, Number) and not isinstance(value, bool)
 
 class Database():
     """
@@ -60,6 +73,11 @@ class Database():
     def get_records(self, 
                     style: Optional[str] = None,
                     return_df: bool = False,
+                    lazy: bool = False,
+                    sort: Union[str, list, None] = _namesort,
+                    ascending: bool = True,
+                    skip: int = 0,
+                    limit: Optional[int] = None,
                     **kwargs) -> Union[list, Tuple[list, pd.DataFrame]]:
         """
         Produces a list of all matching records in the database.
@@ -71,6 +89,23 @@ class Database():
         return_df : bool, optional
             If True, then the corresponding pandas.Dataframe of metadata
             will also be returned
+        lazy : bool, optional
+            If True, then RecordProxy objects are returned that only load the
+            full records when an attribute not in the metadata is accessed.
+            Default value is False.
+        sort : str, list or None, optional
+            The metadata key(s) to sort the records by.  By default, records
+            are sorted by name, or kept in the order of the names if a name
+            search parameter is given.  If None, then the database's order
+            is used.
+        ascending : bool, optional
+            Indicates if the sort is in ascending (True, default) or
+            descending (False) order.
+        skip : int, optional
+            The number of matching records to skip.  Default value is 0.
+        limit : int, optional
+            The maximum number of records to return.  If None (default), then
+            all matching records after skip are returned.
         **kwargs : any, optional
             Any extra options specific to the database style or metadata search
             parameters specific to the record style.
@@ -143,6 +178,66 @@ class Database():
         """
         raise AttributeError('get_records_df not defined for Database style')
 
+    def iter_records(self,
+                     style: Optional[str] = None,
+                     chunksize: int = 100,
+                     **kwargs):
+        """
+        Iterates over all matching records in the database.  Records are
+        retrieved in chunks so that the full result is never held in memory.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search. If not given, a prompt will ask for it.
+        chunksize : int, optional
+            The number of records to retrieve at a time.  Default value is 100.
+        **kwargs : any, optional
+            Any extra options specific to the database style or metadata search
+            parameters specific to the record style.
+
+        Yields
+        ------
+        Record
+            Each record from the database matching the given parameters.
+        
+        Raises
+        ------
+        AttributeError
+            If iter_records is not defined for database style.
+        """
+        raise AttributeError('iter_records not defined for Database style')
+
+    def iter_records_df(self,
+                        style: Optional[str] = None,
+                        chunksize: int = 100,
+                        **kwargs):
+        """
+        Iterates over the metadata of all matching records in the database
+        in chunks.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search. If not given, a prompt will ask for it.
+        chunksize : int, optional
+            The maximum number of records in each chunk.  Default value is 100.
+        **kwargs : any, optional
+            Any extra options specific to the database style or metadata search
+            parameters specific to the record style.
+
+        Yields
+        ------
+        pandas.DataFrame
+            The metadata for a chunk of the matching records.
+        
+        Raises
+        ------
+        AttributeError
+            If iter_records_df is not defined for database style.
+        """
+        raise AttributeError('iter_records_df not defined for Database style')
+
     def count_records(self,
                       style: Optional[str] = None,
                       **kwargs) -> int:
@@ -171,6 +266,118 @@ class Database():
         """
         raise AttributeError('count_records not defined for Database style')
 
+    def aggregate_metadata(self,
+                           style: Optional[str] = None,
+                           groupby: Union[str, list, None] = None,
+                           count: bool = True,
+                           min: Union[str, list, None] = None,
+                           max: Union[str, list, None] = None,
+                           mean: Union[str, list, None] = None,
+                           **kwargs) -> pd.DataFrame:
+        """
+        Computes summary values of the metadata of matching records, grouped
+        by metadata keys.  The base implementation evaluates the metadata
+        returned by get_records_df.  Database styles can override this to
+        compute the values on the server.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search.  If not given, a prompt will ask for it.
+        groupby : str or list, optional
+            The metadata key(s) to group the records by.  If not given, the
+            values are computed for all matching records.
+        count : bool, optional
+            If True (default), the number of records in each group is
+            included as column 'count'.
+        min : str or list, optional
+            Metadata key(s) to find the minimum values of.  Included as
+            columns '<key>_min'.
+        max : str or list, optional
+            Metadata key(s) to find the maximum values of.  Included as
+            columns '<key>_max'.
+        mean : str or list, optional
+            Metadata key(s) to find the mean values of.  Included as columns
+            '<key>_mean'.  Only int and float values are averaged: other
+            values are ignored, and groups without any give NaN.
+        **kwargs : any, optional
+            Any extra options specific to the database style or metadata search
+            parameters specific to the record style.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row for each group, sorted by the groupby keys.
+        
+        Raises
+        ------
+        ValueError
+            If a key is not a metadata key of the record style.
+        """
+        # Set default search parameters
+        if style is None:
+            style = self.select_record_style()
+        groupby, aggregations = self._aggregate_spec(style, groupby, count,
+                                                     min, max, mean)
+        columns = groupby + [column for column, key, func in aggregations]
+
+        df = self.get_records_df(style, sort=None, **kwargs)
+        if len(df) == 0:
+            return pd.DataFrame(columns=columns)
+
+        # Add keys that no matching records have values for
+        for key in groupby + [key for column, key, func in aggregations]:
+            if key is not None and key not in df:
+                df[key] = float('nan')
+
+        # Group and compute the values
+        spec = {}
+        for column, key, func in aggregations:
+            if func == 'count':
+                spec[column] = (df.columns[0], 'size')
+            elif func == 'mean':
+                # Average only numbers, like server-side means do
+                df[column] = pd.to_numeric(df[key].where(df[key].map(_isnumber)))
+                spec[column] = (column, func)
+            else:
+                spec[column] = (key, func)
+        grouper = groupby if len(groupby) > 0 else [0] * len(df)
+        result = df.groupby(grouper, dropna=False, sort=True).agg(**spec)
+        result = result.reset_index(drop=len(groupby) == 0)
+
+        return result[columns]
+
+    def _aggregate_spec(self,
+                        style: str,
+                        groupby: Union[str, list, None],
+                        count: bool,
+                        min: Union[str, list, None],
+                        max: Union[str, list, None],
+                        mean: Union[str, list, None]) -> Tuple[list, list]:
+        """
+        Checks the aggregate_metadata parameters and returns the list of
+        groupby keys and the list of (column, key, function) aggregations.
+        """
+        metadatakeys = load_record(style).metadatakeys
+
+        groupby = aslist(groupby) if groupby is not None else []
+        aggregations = []
+        if count:
+            aggregations.append(('count', None, 'count'))
+        for func, keys in (('min', min), ('max', max), ('mean', mean)):
+            if keys is not None:
+                for key in aslist(keys):
+                    aggregations.append((f'{key}_{func}', key, func))
+
+        # Check the keys
+        for key in groupby + [key for column, key, func in aggregations]:
+            if key is not None and key not in metadatakeys:
+                raise ValueError(f'{key} is not a metadata key of {style}')
+        if len(aggregations) == 0:
+            raise ValueError('no values to aggregate')
+
+        return groupby, aggregations
+
     def retrieve_record(self,
                         style: Optional[str] = None,
                         dest: Optional[Path] = None,
@@ -347,11 +554,107 @@ class Database():
         """
         raise AttributeError('delete_record not defined for Database style')
 
+    def add_records(self,
+                    records: list,
+                    build: bool = False,
+                    verbose: bool = False) -> list:
+        """
+        Adds multiple new records to the database.  Database styles can
+        override this to add the records in bulk, otherwise add_record is
+        called for each record.
+        
+        Parameters
+        ----------
+        records : list
+            The new records to add to the database.
+        build : bool, optional
+            If True, then the uploaded content will be (re)built based on the
+            records' attributes.  If False (default), then records' existing
+            content will be loaded if it exists, or built if it doesn't exist.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+
+        Returns
+        ------
+        list
+            The added records.
+        """
+        return [self.add_record(record=record, build=build, verbose=verbose)
+                for record in aslist(records)]
+
+    def update_records(self,
+                       records: list,
+                       build: bool = False,
+                       verbose: bool = False) -> list:
+        """
+        Replaces multiple existing records with new content.  Database styles
+        can override this to update the records in bulk, otherwise
+        update_record is called for each record.
+        
+        Parameters
+        ----------
+        records : list
+            The records with new content to update in the database.
+        build : bool, optional
+            If True, then the uploaded content will be (re)built based on the
+            records' attributes.  If False (default), then records' existing
+            content will be loaded if it exists, or built if it doesn't exist.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+
+        Returns
+        ------
+        list
+            The updated records.
+        """
+        return [self.update_record(record=record, build=build, verbose=verbose)
+                for record in aslist(records)]
+
+    def delete_records(self,
+                       records: Optional[list] = None,
+                       style: Optional[str] = None,
+                       names: Optional[list] = None,
+                       verbose: bool = False):
+        """
+        Permanently deletes multiple records from the database.  Database
+        styles can override this to delete the records in bulk, otherwise
+        delete_record is called for each record.
+        
+        Parameters
+        ----------
+        records : list, optional
+            The records to delete from the database.  If not given, names
+            (and style) are needed to identify the records to delete.
+        style : str, optional
+            The style of the records to delete.
+        names : list, optional
+            The names of the records to delete.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+        
+        Raises
+        ------
+        ValueError
+            If style and/or names given with records.
+        """
+        if records is not None:
+            if style is not None or names is not None:
+                raise ValueError('kwargs style and names cannot be given with kwarg records')
+            for record in aslist(records):
+                self.delete_record(record=record, verbose=verbose)
+        else:
+            for name in aslist(names):
+                self.delete_record(style=style, name=name, verbose=verbose)
+
     def get_tar(self,
                 record: Optional[Record] = None,
                 style: Optional[str] = None,
                 name: Optional[str] = None,
-                raw: bool = False) -> Union[tarfile.TarFile, bytes]:
+                raw: bool = False,
+                stream: bool = False) -> Union[tarfile.TarFile, bytes, BinaryIO]:
         """
         Retrieves the tar archive associated with a record in the database.
         
@@ -366,12 +669,17 @@ class Database():
         raw : bool, optional
             If True, return the archive as raw binary content. If
             False, return as an open tarfile. (Default is False)
+        stream : bool, optional
+            If True, return the archive\'s raw binary content as a readable
+            file-like object so that it does not have to be loaded into
+            memory.  The caller is responsible for closing it.  Overrides
+            raw.  (Default is False)
             
         Returns
         -------
-        tarfile or str
-            The tar archive as an open tarfile if raw=False, or as a binary
-            str if raw=True.
+        tarfile, bytes or file-like object
+            The tar archive as an open tarfile if raw=False, as a binary str if
+            raw=True, or as a readable binary file-like object if stream=True.
         
         Raises
         ------
@@ -384,7 +692,7 @@ class Database():
                 record: Optional[Record] = None,
                 style: Optional[str] = None,
                 name: Optional[str] = None,
-                tar: Optional[bytes] = None,
+                tar: Union[bytes, BinaryIO, None] = None,
                 root_dir: Optional[Path] = None):
         """
         Archives and stores a folder associated with a record.
@@ -399,8 +707,9 @@ class Database():
             The style to use in uniquely identifying the record.
         name : str, optional
             The name to use in uniquely identifying the record.
-        tar : bytes, optional
-            The bytes content of a tar file to save.  tar cannot be given
+        tar : bytes or file-like object, optional
+            The bytes content of a tar file to save, or a readable binary
+            file-like object to read the content from.  tar cannot be given
             with root_dir.
         root_dir : str, optional
             Specifies the root directory for finding the directory to archive.
@@ -420,7 +729,7 @@ class Database():
                    record: Optional[Record] = None,
                    style: Optional[str] = None,
                    name: Optional[str] = None,
-                   tar: Optional[bytes] = None,
+                   tar: Union[bytes, BinaryIO, None] = None,
                    root_dir: Optional[Path] = None):
         """
         Replaces an existing tar archive for a record with a new one.
@@ -435,8 +744,9 @@ class Database():
             The style to use in uniquely identifying the record.
         name : str, optional
             The name to use in uniquely identifying the record.
-        tar : bytes, optional
-            The bytes content of a tar file to save.  tar cannot be given
+        tar : bytes or file-like object, optional
+            The bytes content of a tar file to save, or a readable binary
+            file-like object to read the content from.  tar cannot be given
             with root_dir.
         root_dir : str, optional
             Specifies the root directory for finding the directory to archive.
@@ -502,7 +812,8 @@ class Database():
             If False, only the records will be copied. (Default is True).
         overwrite : bool, optional
             If False (default) only new records and tars will be copied.
-            If True, all existing content will be updated.
+            If True, all existing content will be updated.  Tars that fail
+            to update do not stop the copy and are listed once it finishes.
         """
         if record_style is None and records is None:
             # Prompt for record_style
@@ -523,6 +834,7 @@ class Database():
 
         record_count = 0
         tar_count = 0
+        tar_errors = []
         # Copy records
         for record in tqdm(records, 'copying records', ascii=True):
             try:
@@ -538,40 +850,57 @@ class Database():
             # Copy archives
             if includetar:
                 try:
-                    # Get tar if it exists
-                    tar = self.get_tar(record=record, raw=True) 
-                except:
-
-                    # Get folder if it exists
-                    try:
-                        root_dir = self.get_folder(record=record).parent
-                    except:
-                        pass
-                    else:
-                        try:
-                            # Copy tar over
-                            dest.add_tar(record=record, root_dir=root_dir)
-                            tar_count += 1
-                        except:
-                            # Update existing tar
-                            if overwrite:
-                                dest.update_tar(record=record, root_dir=root_dir)
-                                tar_count += 1
-
-                else:
-                    try:
-                        # Copy tar over
-                        dest.add_tar(record=record, tar=tar)
+                    if self.__copy_tar(dest, record, overwrite):
                         tar_count += 1
-                    except:
-                        # Update existing tar
-                        if overwrite:
-                            dest.update_tar(record=record, tar=tar)
-                            tar_count += 1
+                except Exception as err:
+                    tar_errors.append(f'{record.name}: {err}')
 
         print(record_count, 'records added/updated')
         if includetar:
             print(tar_count, 'tars added/updated')
+            if len(tar_errors) > 0:
+                print(len(tar_errors), 'tars failed to update:')
+                for tar_error in tar_errors:
+                    print(tar_error)
+
+    def __copy_tar(self,
+                   dest,
+                   record: Record,
+                   overwrite: bool) -> bool:
+        """
+        Copies the tar archive of a record, or its folder if it has no
+        archive, to another database.  Existing archives are only updated if
+        overwrite is True.  Returns True if an archive was added or updated.
+        """
+        def copy(copy_tar) -> bool:
+            try:
+                # Get tar stream if it exists
+                tar = self.get_tar(record=record, stream=True)
+            except:
+
+                # Get folder if it exists
+                try:
+                    root_dir = self.get_folder(record=record).parent
+                except:
+                    return False
+                copy_tar(record=record, root_dir=root_dir)
+                return True
+
+            try:
+                copy_tar(record=record, tar=tar)
+            finally:
+                tar.close()
+            return True
+
+        try:
+            # Copy tar over
+            return copy(dest.add_tar)
+        except:
+            # Update existing tar from a new stream, as the failed add_tar
+            # may have consumed part of the first one
+            if overwrite:
+                return copy(dest.update_tar)
+            return False
 
     def destroy_records(self,
                         record_style: Optional[str] = None,
@@ -1,10 +1,31 @@
 # coding: utf-8
 # Standard Python libraries
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from io import BytesIO
 import ast
+import bz2
+import functools
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import pickle
 import shutil
+import sqlite3
 import tarfile
-from typing import Optional, Tuple, Union
+import threading
+import time
+from typing import Any, BinaryIO, Optional, Tuple, Union
+import warnings
+
+# Advisory file locking is only available on POSIX systems
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # http://www.numpy.org/
 import numpy as np
@@ -15,17 +36,149 @@ import pandas as pd
 # https://github.com/usnistgov/DataModelDict
 from DataModelDict import DataModelDict as DM
 
+# Optional zstd support from the standard library (Python 3.14+) or zstandard
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+# Optional inotify support for watching record directories
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
 # iprPy imports
-from ..tools import aslist, iaslist
+from ..tools import aslist, iaslist, IndexedTarFile
 from . import Database
-from ..record import recordmanager, load_record, Record
+from .Database import _namesort
+from ..record import recordmanager, load_record, Record, RecordProxy
+
+def _file_hash(fname: Path) -> str:
+    """Computes the sha1 hex digest of a file's content"""
+    filehash = hashlib.sha1()
+    with open(fname, 'rb') as f:
+        for chunk in iter(lambda: f.read(1048576), b''):
+            filehash.update(chunk)
+    return filehash.hexdigest()
+
+def _open_file(fname: Path,
+               compression: Optional[str] = None,
+               mode: str = 'rb'):
+    """Opens a record file using the given compression format"""
+    if compression is None:
+        return open(fname, mode)
+    elif compression == 'gzip':
+        return gzip.open(fname, mode)
+    elif compression == 'bz2':
+        return bz2.open(fname, mode)
+    elif compression == 'lzma':
+        return lzma.open(fname, mode)
+    elif compression == 'zstd':
+        return zstd.open(fname, mode)
+    else:
+        raise ValueError(f'Unsupported compression {compression}')
+
+def _read_file(fname: Path,
+               compression: Optional[str] = None) -> bytes:
+    """Reads the uncompressed content of a record file"""
+    with _open_file(fname, compression) as f:
+        return f.read()
+
+def _tar_compression(fname: Path) -> Optional[str]:
+    """Identifies gzip, bz2 and lzma compressed tar archive files"""
+    with open(fname, 'rb') as f:
+        magic = f.read(6)
+    if magic[:2] == b'\x1f\x8b':
+        return 'gzip'
+    elif magic[:3] == b'BZh':
+        return 'bz2'
+    elif magic == b'\xfd7zXZ\x00':
+        return 'lzma'
+    return None
+
+def _fold_cache(cache: pd.DataFrame,
+                entries: list) -> pd.DataFrame:
+    """
+    Applies change log entries to a metadata cache.  Each entry is a tuple
+    of the names of removed records and the metadata of added records.
+    Later entries for the same record name take precedence.
+    """
+    pending = {}
+    for removenames, newrecords in entries:
+        for name in removenames:
+            pending[name] = None
+        for meta in newrecords:
+            pending[meta['name']] = meta
+    if len(pending) == 0:
+        return cache
+
+    # Delete the changed entries and add the new ones
+    if len(cache) > 0:
+        cache = cache[~cache.name.isin(list(pending))]
+    newrecords = [meta for meta in pending.values() if meta is not None]
+    if len(newrecords) > 0:
+        newrecords = pd.DataFrame(newrecords)
+        if not cache.empty:
+            cache = pd.concat([cache, newrecords], sort=False)
+        else:
+            cache = newrecords
+    return cache.sort_values('name').reset_index(drop=True)
+
+def _sqlname(name: str) -> str:
+    """Quotes a name for use as an SQL identifier"""
+    return '"' + name.replace('"', '""') + '"'
+
+def _sqlvalue(value: Any) -> Any:
+    """
+    Converts a metadata value to the representation stored in SQL columns.
+    Lists and dicts are saved as JSON and other objects as str.
+    """
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, default=str)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if pd.isna(value):
+        return None
+    return str(value)
+
+def _file_metadata(recordclass: type,
+                   fname: Path,
+                   name: str,
+                   hashcheck: bool,
+                   compression: Optional[str] = None) -> dict:
+    """
+    Loads a record file and returns its metadata.  Defined at the module
+    level so that it can be used by process pools.
+    """
+    meta = recordclass(model=_read_file(fname, compression), name=name).metadata()
+    if hashcheck:
+        meta['_hash'] = _file_hash(fname)
+    return meta
 
 class LocalDatabase(Database):
 
     def __init__(self,
                  host: str,
                  format: str = 'json',
-                 indent: Optional[int] = None):
+                 indent: Optional[int] = None,
+                 hashcheck: bool = False,
+                 cacheformat: str = 'csv',
+                 workers: int = 1,
+                 threads: int = 1,
+                 memcache: bool = False,
+                 layout: Optional[str] = None,
+                 shardlevels: Optional[int] = None,
+                 compression: Optional[str] = None,
+                 logcompaction: int = 1000,
+                 tarindex: bool = False):
         """
         Initializes a connection to a local database of JSON/XML records
         stored in a local directory.
@@ -42,6 +195,73 @@ class LocalDatabase(Database):
             then the saved records are compact.  Otherwise, the lines in the
             file will be indented by multiples of this value based on the
             model's element recursion.
+        hashcheck : bool, optional
+            If True, a content hash of each record file will be stored in the
+            metadata cache alongside the file's modification time and size.
+            Files are then only reparsed if their content changed, and
+            changes are detected even if the modification time and size
+            are unaltered.  This requires reading every record file when the
+            cache is checked.  Default value is False.
+        cacheformat : str, optional
+            The file format to use for the metadata cache files.  'csv'
+            (default) saves the metadata as "<style>.csv" text files that
+            must be reinterpreted when loaded.  'pickle' saves the metadata
+            as "<style>.pkl" binary files using pickle protocol 5, which
+            preserves the dtypes and any embedded dict and list values so
+            that the cache can be loaded without further parsing.  'sqlite'
+            stores the metadata for all styles in a "metadata.sqlite" file
+            with an indexed column for each metadata key.  Queries are then
+            translated into SQL so that only the matching entries are loaded.
+        workers : int, optional
+            The default number of worker processes to use for parsing new and
+            modified records when updating the metadata cache.  Default value
+            is 1, which parses the records in the current process.
+        threads : int, optional
+            The default number of threads to use for loading the matching
+            record files in get_records.  Using multiple threads allows for
+            the file access latencies to overlap, which is beneficial for
+            network filesystems.  Default value is 1.
+        memcache : bool, optional
+            If True, then the metadata cache of each style is also kept in
+            memory and reused as long as the modification times of the style's
+            directory and cache file are unchanged.  Records added, updated or
+            deleted through the database or by moving files in and out of the
+            directory are detected, but record files that are edited in place
+            are not until the cache is refreshed.  Default value is False.
+        layout : str, optional
+            The directory layout of the record files.  'flat' saves all files
+            of a style in "<style>/".  'hash' and 'prefix' shard the files
+            into "<style>/ab/cd/" subdirectories named by two-character pieces
+            of the SHA-1 hash of the record name or the start of the record
+            name, respectively.  The layout is saved in a "layout.json" file
+            in the host.  If not given, the saved layout is used, or 'flat' if
+            none is saved.  Use migrate_layout to change the layout of a host
+            that already contains records.
+        shardlevels : int, optional
+            The number of subdirectory levels for the 'hash' and 'prefix'
+            layouts.  If not given, the saved value is used, or 2 if none is
+            saved.
+        compression : str, optional
+            The compression format of the record files: 'gzip', 'bz2', 'lzma'
+            or 'zstd', which are saved with the additional extensions '.gz',
+            '.bz2', '.xz' and '.zst', respectively.  'zstd' requires Python
+            3.14+ or the zstandard package.  Only record files matching the
+            compression are recognized.  If None (default), the record files
+            are not compressed.
+        logcompaction : int, optional
+            For the 'csv' and 'pickle' cacheformats, changes to the metadata
+            are appended to a "<style>.log" change log rather than rewriting
+            the cache file, and the log is folded into the cache file once it
+            holds more than this number of record changes.  Default value is
+            1000.  Setting this to 0 rewrites the cache file for every
+            change.
+        tarindex : bool, optional
+            If True, new tar archives are saved uncompressed as "<name>.tar"
+            along with a "<name>.tar.idx" index of the member offsets so that
+            individual files can be read from the archives without scanning
+            or decompressing them.  If False (default), tar archives are
+            saved as gzip compressed "<name>.tar.gz" files.  Archives saved
+            in either format can be read regardless of this setting.
         """
         # Make the path if needed
         host = Path(host)
@@ -54,128 +274,1525 @@ class LocalDatabase(Database):
         # Pass host to Database initializer
         Database.__init__(self, host)
 
-        # Set default format and indent values
-        self.__format = format
-        self.__indent = indent
+        # Set default format and indent values
+        self.__format = format
+        self.__indent = indent
+        self.__hashcheck = hashcheck
+        self.__tarindex = tarindex
+
+        # Set compression
+        if compression not in self.compressions:
+            raise ValueError(f'Invalid compression {compression}: supported values are {list(self.compressions)}')
+        self.__compression = compression
+
+        # Set cache format
+        if cacheformat not in self.cacheformats:
+            raise ValueError(f'Invalid cacheformat {cacheformat}: supported values are {list(self.cacheformats)}')
+        self.__cacheformat = cacheformat
+
+        # Set change log compaction size
+        if not isinstance(logcompaction, int) or logcompaction < 0:
+            raise ValueError('logcompaction must be a non-negative int')
+        self.__logcompaction = logcompaction
+
+        # Set default number of workers
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError('workers must be a positive int')
+        self.__workers = workers
+
+        # Set default number of threads
+        if not isinstance(threads, int) or threads < 1:
+            raise ValueError('threads must be a positive int')
+        self.__threads = threads
+
+        # Initialize the in-memory caches and change log read states
+        self.__memcache = {} if memcache else None
+        self.__logstates = {}
+
+        # Initialize the watcher states
+        self.__watcher = None
+        self.__watchstop = None
+        self.__watchinterval = None
+        self.__watchlock = threading.RLock()
+        self.__watchstyles = {}
+        self.__watchcaches = {}
+        self.__inotify = None
+
+        # Load the saved layout
+        layoutfile = Path(host, 'layout.json')
+        if layoutfile.is_file():
+            with open(layoutfile, encoding='UTF-8') as f:
+                saved = json.load(f)
+        else:
+            saved = {'layout': 'flat', 'shardlevels': 0}
+        if layout is None:
+            layout = saved['layout']
+        if shardlevels is None:
+            shardlevels = saved['shardlevels'] if layout == saved['layout'] else 2
+        if layout == 'flat':
+            shardlevels = 0
+        self.__set_layout(layout, shardlevels)
+
+        # Check that the layout matches the existing records
+        if (layout, shardlevels) != (saved['layout'], saved['shardlevels']):
+            if layoutfile.is_file() or any(path.is_dir() for path in host.iterdir()):
+                raise ValueError(f"host uses the {saved['layout']} layout: use migrate_layout to change it")
+            self.__save_layout()
+
+    @property
+    def style(self) -> str:
+        """str: The database style"""
+        return 'local'
+
+    @property
+    def format(self) -> str:
+        """str: The format that records are saved as: 'json' or 'xml'"""
+        return self.__format
+
+    @property
+    def indent(self) -> Optional[int]:
+        """int or None: The record indentation setting to use when saving records."""
+        return self.__indent
+
+    @property
+    def hashcheck(self) -> bool:
+        """bool: Indicates if file content hashes are used to detect modified records."""
+        return self.__hashcheck
+
+    @property
+    def tarindex(self) -> bool:
+        """bool: Indicates if new tar archives are saved uncompressed with an index"""
+        return self.__tarindex
+
+    @property
+    def compressions(self) -> dict:
+        """dict: The supported record compression formats and their file extensions."""
+        compressions = {None: '', 'gzip': '.gz', 'bz2': '.bz2', 'lzma': '.xz'}
+        if zstd is not None:
+            compressions['zstd'] = '.zst'
+        return compressions
+
+    @property
+    def compression(self) -> Optional[str]:
+        """str or None: The compression format of the record files."""
+        return self.__compression
+
+    @property
+    def suffix(self) -> str:
+        """str: The file extension of the record files."""
+        return f'.{self.format}' + self.compressions[self.compression]
+
+    @property
+    def cacheformats(self) -> dict:
+        """dict: The supported metadata cache formats and their file extensions."""
+        return {'csv': 'csv', 'pickle': 'pkl', 'sqlite': 'sqlite'}
+
+    @property
+    def cacheformat(self) -> str:
+        """str: The file format used for the metadata cache files."""
+        return self.__cacheformat
+
+    @property
+    def logcompaction(self) -> int:
+        """int: The number of logged record changes that triggers a cache file rewrite."""
+        return self.__logcompaction
+
+    @property
+    def workers(self) -> int:
+        """int: The default number of worker processes used to parse records for the cache."""
+        return self.__workers
+
+    @property
+    def threads(self) -> int:
+        """int: The default number of threads used to load record files."""
+        return self.__threads
+
+    @property
+    def layouts(self) -> tuple:
+        """tuple: The supported record directory layouts"""
+        return ('flat', 'hash', 'prefix')
+
+    @property
+    def layout(self) -> str:
+        """str: The directory layout of the record files"""
+        return self.__layout
+
+    @property
+    def shardlevels(self) -> int:
+        """int: The number of subdirectory levels in the record layout"""
+        return self.__shardlevels
+
+    def __set_layout(self,
+                     layout: str,
+                     shardlevels: int):
+        """Checks and sets the record layout"""
+        if layout not in self.layouts:
+            raise ValueError(f'Invalid layout {layout}: supported values are {list(self.layouts)}')
+        if layout == 'flat':
+            shardlevels = 0
+        elif not isinstance(shardlevels, int) or shardlevels < 1 or shardlevels > 20:
+            raise ValueError('shardlevels must be an int between 1 and 20')
+        self.__layout = layout
+        self.__shardlevels = shardlevels
+
+    def __save_layout(self):
+        """Saves the record layout to the host's layout.json file"""
+        with open(Path(self.host, 'layout.json'), 'w', encoding='UTF-8') as f:
+            json.dump({'layout': self.layout, 'shardlevels': self.shardlevels}, f)
+
+    def record_dir(self,
+                   style: str,
+                   name: str) -> Path:
+        """
+        Returns the directory where a record's file, tar and folder are
+        stored.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        name : str
+            The record name.
+
+        Returns
+        -------
+        pathlib.Path
+            The record's directory.
+        """
+        if self.layout == 'hash':
+            key = hashlib.sha1(name.encode('UTF-8')).hexdigest()
+        elif self.layout == 'prefix':
+            key = name.replace('.', '_').ljust(2 * self.shardlevels, '_')
+        else:
+            key = ''
+        shards = [key[2*i:2*i+2] for i in range(self.shardlevels)]
+        return Path(self.host, style, *shards)
+
+    def record_path(self,
+                    style: str,
+                    name: str) -> Path:
+        """
+        Returns the path to a record's file.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        name : str
+            The record name.
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the record file.
+        """
+        return Path(self.record_dir(style, name), f'{name}{self.suffix}')
+
+    def tar_path(self,
+                 style: str,
+                 name: str) -> Path:
+        """
+        Returns the path to a record's tar archive.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        name : str
+            The record name.
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the tar archive.  If an archive exists, this is the
+            existing archive's path, otherwise it is the path for the format
+            set by tarindex.
+        """
+        uncompressed, compressed = self.tar_files(style, name)[:2]
+        if uncompressed.is_file():
+            return uncompressed
+        elif compressed.is_file() or not self.tarindex:
+            return compressed
+        return uncompressed
+
+    def tar_files(self,
+                  style: str,
+                  name: str) -> list:
+        """
+        Returns the paths to all possible tar archive files of a record.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        name : str
+            The record name.
+
+        Returns
+        -------
+        list of pathlib.Path
+            The paths to the uncompressed archive, the compressed archive and
+            the uncompressed archive's index.
+        """
+        recorddir = self.record_dir(style, name)
+        return [Path(recorddir, f'{name}.tar'), Path(recorddir, f'{name}.tar.gz'),
+                Path(recorddir, f'{name}.tar.idx')]
+
+    def folder_path(self,
+                    style: str,
+                    name: str) -> Path:
+        """
+        Returns the path to a record's folder.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        name : str
+            The record name.
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the folder.
+        """
+        return Path(self.record_dir(style, name), name)
+
+    def shard_dirs(self,
+                   style: str) -> list:
+        """
+        Lists the directories of a style that contain record files.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+
+        Returns
+        -------
+        list
+            The style directory for the flat layout, or the existing leaf
+            shard directories.
+        """
+        dirs = [Path(self.host, style)]
+        if not dirs[0].is_dir():
+            return []
+        for i in range(self.shardlevels):
+            subdirs = []
+            for path in dirs:
+                with os.scandir(path) as entries:
+                    subdirs.extend(Path(entry.path) for entry in entries
+                                   if entry.is_dir() and len(entry.name) == 2)
+            dirs = subdirs
+        return dirs
+
+    def iter_record_files(self,
+                          style: str):
+        """
+        Iterates over the record files of a style.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+
+        Yields
+        ------
+        os.DirEntry
+            The directory entry of each record file.
+        """
+        suffix = self.suffix
+        for path in self.shard_dirs(style):
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.endswith(suffix) and entry.is_file():
+                        yield entry
+
+    def migrate_layout(self,
+                       layout: str,
+                       shardlevels: int = 2,
+                       verbose: bool = False):
+        """
+        Moves all record files, tars and folders in the host to a new
+        directory layout.  The metadata caches remain valid as the moved
+        files keep their modification times.
+
+        Parameters
+        ----------
+        layout : str
+            The new layout: 'flat', 'hash' or 'prefix'.
+        shardlevels : int, optional
+            The number of subdirectory levels for the 'hash' and 'prefix'
+            layouts.  Default value is 2.
+        verbose : bool, optional
+            If True, the number of moved records will be printed.  Default
+            value is False.
+        """
+        # Stop watching during the migration
+        watching = self.watching
+        interval = self.__watchinterval
+        self.unwatch()
+
+        # Collect the records and shard directories under the current layout
+        suffix = self.suffix
+        styles = [path.name for path in Path(self.host).iterdir() if path.is_dir()]
+        records = []
+        olddirs = []
+        for style in styles:
+            for entry in self.iter_record_files(style):
+                name = entry.name[:-len(suffix)]
+                records.append((style, name, self.record_path(style, name),
+                                self.tar_files(style, name), self.folder_path(style, name)))
+            dirs = [Path(self.host, style)]
+            for i in range(self.shardlevels):
+                dirs = [subdir for path in dirs for subdir in path.iterdir()
+                        if subdir.is_dir() and len(subdir.name) == 2]
+                olddirs.extend(dirs)
+
+        # Move the files to the new layout
+        self.__set_layout(layout, shardlevels)
+        for style, name, fname, tar_files, dir_path in records:
+            self.record_dir(style, name).mkdir(parents=True, exist_ok=True)
+            os.replace(fname, self.record_path(style, name))
+            for tar_file, newfile in zip(tar_files, self.tar_files(style, name)):
+                if tar_file.is_file():
+                    os.replace(tar_file, newfile)
+            if dir_path.is_dir():
+                os.replace(dir_path, self.folder_path(style, name))
+
+        # Remove the emptied shard directories
+        for path in sorted(olddirs, key=lambda path: len(path.parts), reverse=True):
+            try:
+                path.rmdir()
+            except OSError:
+                pass
+
+        self.__save_layout()
+        self.clear_memcache()
+        if len(watching) > 0:
+            self.watch(watching, interval=interval)
+        if verbose:
+            print(f'{len(records)} records moved to the {layout} layout')
+
+    @property
+    def memcache(self) -> bool:
+        """bool: Indicates if metadata caches are kept in memory"""
+        return self.__memcache is not None
+
+    def clear_memcache(self):
+        """Removes all metadata caches held in memory."""
+        if self.__memcache is not None:
+            self.__memcache.clear()
+        self.__logstates.clear()
+
+    def __memcache_key(self,
+                       style: str) -> Optional[tuple]:
+        """
+        Builds the key that identifies an unchanged in-memory cache from the
+        modification times and sizes of the style's directory and cache file.
+        Returns None if either was modified too recently for another change
+        to be guaranteed a new modification time.
+        """
+        paths = [Path(self.host, style)]
+        if self.cacheformat != 'sqlite':
+            paths.append(self.cachefile(style))
+            paths.append(self.cachelogfile(style))
+
+        key = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                key.append(None)
+                continue
+            if time.time_ns() - stat.st_mtime_ns < 2000000000:
+                return None
+            key.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(key)
+
+    @property
+    def watching(self) -> list:
+        """list: The record styles whose metadata caches are watched"""
+        return sorted(self.__watchstyles)
+
+    def watch(self,
+              style: Union[str, list, None] = None,
+              interval: float = 1.0):
+        """
+        Starts keeping the metadata caches of record styles up to date with
+        a background watcher thread so that cache() and the queries based on
+        it never have to scan the record directories.  For the 'csv' and
+        'pickle' cacheformats the watched caches are kept in memory, and for
+        'sqlite' the stored metadata is updated in place.
+
+        New, modified and deleted record files are detected with inotify if
+        the inotify_simple package is installed and the layout is 'flat'.
+        Otherwise, the modification times of the style directories and
+        change logs are polled and a changed style is rescanned.  Like
+        memcache, polling does not detect record files that are edited in
+        place.  Changes made through this database object are applied to the
+        watched caches immediately.
+
+        Parameters
+        ----------
+        style : str or list, optional
+            The record style(s) to watch.  If not given, all styles with a
+            directory in the host are watched.
+        interval : float, optional
+            The number of seconds between polls for changes.  inotify events
+            are handled as they arrive.  Default value is 1.0.
+        """
+        if style is None:
+            styles = [path.name for path in Path(self.host).iterdir()
+                      if path.is_dir() and path.name in recordmanager.loaded_style_names]
+        else:
+            styles = aslist(style)
+            for style in styles:
+                recordmanager.assert_style(style)
+
+        # Stop a running watcher to change its interval
+        if self.__watcher is not None and interval != self.__watchinterval:
+            self.__stop_watcher()
+        self.__watchinterval = interval
+
+        with self.__watchlock:
+            for style in styles:
+                if style in self.__watchstyles:
+                    continue
+
+                # Watch the style directory for events or poll it
+                wd = None
+                if INotify is not None and self.layout == 'flat':
+                    if self.__inotify is None:
+                        self.__inotify = INotify()
+                    styledir = Path(self.host, style)
+                    styledir.mkdir(exist_ok=True)
+                    wd = self.__inotify.add_watch(styledir, inotify_flags.CREATE | inotify_flags.DELETE
+                                                  | inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+                                                  | inotify_flags.MOVED_FROM)
+
+                # Build the initial cache
+                self.__watchstyles[style] = {'wd': wd, 'key': self.__memcache_key(style)}
+                self.__watch_update(style)
+
+        if self.__watcher is None and len(self.__watchstyles) > 0:
+            self.__watchstop = threading.Event()
+            self.__watcher = threading.Thread(target=self.__watch_loop,
+                                              args=(self.__watchstop,),
+                                              name=f'LocalDatabase watcher {self.host}',
+                                              daemon=True)
+            self.__watcher.start()
+
+    def unwatch(self,
+                style: Union[str, list, None] = None):
+        """
+        Stops watching the metadata caches of record styles.  The watcher
+        thread is stopped once no styles are watched.
+
+        Parameters
+        ----------
+        style : str or list, optional
+            The record style(s) to stop watching.  If not given, all styles
+            are no longer watched.
+        """
+        with self.__watchlock:
+            styles = self.watching if style is None else aslist(style)
+            for style in styles:
+                state = self.__watchstyles.pop(style, None)
+                self.__watchcaches.pop(style, None)
+                if state is not None and state['wd'] is not None:
+                    try:
+                        self.__inotify.rm_watch(state['wd'])
+                    except OSError:
+                        pass
+
+        if len(self.__watchstyles) == 0:
+            self.__stop_watcher()
+
+    def __stop_watcher(self):
+        """Stops the watcher thread and closes the inotify instance"""
+        if self.__watcher is not None:
+            self.__watchstop.set()
+            if self.__watcher is not threading.current_thread():
+                self.__watcher.join()
+            self.__watcher = None
+        if self.__inotify is not None and len(self.__watchstyles) == 0:
+            self.__inotify.close()
+            self.__inotify = None
+
+    def __watch_loop(self,
+                     stop: threading.Event):
+        """Checks the watched styles for changes until stop is set"""
+        while not stop.is_set():
+
+            # Collect the names of changed records from inotify events
+            eventnames = {}
+            if self.__inotify is not None:
+                with self.__watchlock:
+                    styles = {state['wd']: style for style, state in self.__watchstyles.items()}
+                suffix = self.suffix
+                timeout = int(1000 * min(self.__watchinterval, 0.2))
+                for event in self.__inotify.read(timeout=timeout):
+                    if event.wd in styles and event.name.endswith(suffix):
+                        eventnames.setdefault(styles[event.wd], set()).add(event.name[:-len(suffix)])
+            elif stop.wait(self.__watchinterval):
+                break
+
+            for style in self.watching:
+                with self.__watchlock:
+                    state = self.__watchstyles.get(style)
+                    if state is None:
+                        continue
+                    try:
+                        # Update with the records named by events
+                        if state['wd'] is not None:
+                            if style in eventnames:
+                                self.__watch_update(style, sorted(eventnames[style]))
+                            continue
+
+                        # Rescan styles with changed or recently changed states
+                        key = self.__memcache_key(style)
+                        if key is None or key != state['key']:
+                            state['key'] = key
+                            self.__watch_update(style)
+
+                    except Exception as err:
+                        warnings.warn(f'stopped watching {style}: {err}')
+                        self.unwatch(style)
+
+    def __watch_update(self,
+                       style: str,
+                       names: Optional[list] = None):
+        """
+        Updates the watched cache of a style.  If names are given, only the
+        record files with those names are checked.  Call while holding the
+        watch lock.
+        """
+        if self.cacheformat == 'sqlite':
+            self.__update_sqlite_cache(style)
+            return
+
+        cache = self.__watchcaches.get(style)
+        if cache is None:
+            cache = self.__update_cache(style)
+        else:
+            removenames, newrecords = self._cache_updates(
+                style, cache.set_index('name'), names=names)[:2]
+            cache = _fold_cache(cache, [(removenames, newrecords)])
+        self.__watchcaches[style] = cache
+
+    def cachefile(self,
+                  style: str) -> Path:
+        """
+        Returns the path to the metadata cache file for a given record style.
+        For the 'sqlite' cacheformat, all styles share the same file.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the metadata cache file.
+        """
+        if self.cacheformat == 'sqlite':
+            return Path(self.host, 'metadata.sqlite')
+        return Path(self.host, f'{style}.{self.cacheformats[self.cacheformat]}')
+
+    def cachelogfile(self,
+                     style: str) -> Path:
+        """
+        Returns the path to the change log of the metadata cache file for a
+        given record style.  Not used by the 'sqlite' cacheformat.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the change log file.
+        """
+        return Path(self.host, f'{style}.log')
+
+    @contextmanager
+    def lock_cache(self,
+                   style: str,
+                   shared: bool = False):
+        """
+        Context manager that holds an advisory lock on the metadata cache
+        file and change log of a given record style.  The lock is held on a
+        "<style>.lock" file in the host and is only supported on POSIX
+        systems.  Not needed for the 'sqlite' cacheformat, which uses the
+        SQLite database locks.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        shared : bool, optional
+            If True, a shared lock for reading is obtained.  If False
+            (default), an exclusive lock for writing is obtained.
+        """
+        if fcntl is None:
+            yield
+            return
+
+        with open(Path(self.host, f'{style}.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def __cache_file_key(self,
+                         style: str) -> Optional[tuple]:
+        """Identifies the current version of a cache file"""
+        try:
+            stat = os.stat(self.cachefile(style))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def __append_cache_log(self,
+                           style: str,
+                           removenames: list,
+                           newrecords: list):
+        """
+        Appends an entry of removed record names and added record metadata
+        to the change log of a style.
+        """
+        entry = pickle.dumps((list(removenames), list(newrecords)), protocol=5)
+        with self.lock_cache(style):
+            with open(self.cachelogfile(style), 'ab') as f:
+                f.write(entry)
+
+    def __read_cache_log(self,
+                         style: str,
+                         offset: int = 0) -> Tuple[list, int, bool]:
+        """
+        Reads the change log entries of a style starting at offset.  Returns
+        the entries, the offset after the last complete entry, and a flag
+        indicating if a partially written entry was found.
+        """
+        entries = []
+        try:
+            f = open(self.cachelogfile(style), 'rb')
+        except FileNotFoundError:
+            return entries, 0, False
+
+        with f:
+            f.seek(offset)
+            while True:
+                offset = f.tell()
+                try:
+                    entries.append(pickle.load(f))
+                except EOFError:
+                    return entries, offset, f.tell() > offset
+                except pickle.UnpicklingError:
+                    return entries, offset, True
+
+    def __read_logged_cache(self,
+                            style: str) -> Tuple[pd.DataFrame, tuple, bool]:
+        """
+        Reads the cache file of a style and folds in its change log.  If
+        memcache is set and the cache file is unchanged, only the log entries
+        appended since the last read are folded into the previous result.
+        The log is only removed when the cache file is rewritten, so an
+        unchanged cache file also means that the log was only appended to.
+        Returns the cache, the state to pass to __compact_cache_log and a
+        flag indicating if the log should be compacted.  Call while holding
+        a cache lock.
+        """
+        filekey = self.__cache_file_key(style)
+
+        # Continue from the previous read or load the cache file
+        state = self.__logstates.get(style)
+        if state is not None and state[0] == filekey:
+            filekey, offset, count, cache = state
+        else:
+            offset = count = 0
+            if filekey is not None:
+                cache = self.read_cache_file(style)
+            else:
+                cache = pd.DataFrame()
+            if len(cache) == 0:
+                r = load_record(style)
+                cache = pd.DataFrame(columns=r.metadatakeys)
+
+        # Fold in the new log entries
+        entries, newoffset, partial = self.__read_cache_log(style, offset)
+        cache = _fold_cache(cache, entries)
+        for removenames, newrecords in entries:
+            count += len(set(removenames).union(meta['name'] for meta in newrecords))
+
+        state = (filekey, newoffset, count, cache)
+        if self.memcache:
+            self.__logstates[style] = state
+        return cache, state, partial or count > self.logcompaction
+
+    def __compact_cache_log(self,
+                            style: str,
+                            cache: pd.DataFrame,
+                            state: Optional[tuple]):
+        """
+        Saves a cache to the cache file of a style and removes its change
+        log.  state is the state returned by __read_logged_cache for the
+        read that cache is based on, which is used to fold in entries logged
+        since then.  If the cache file was rewritten by someone else since
+        the read, nothing is saved.
+        """
+        with self.lock_cache(style):
+            if state is not None:
+                filekey, offset = state[:2]
+                if self.__cache_file_key(style) != filekey:
+                    return
+                entries = self.__read_cache_log(style, offset)[0]
+                cache = _fold_cache(cache, entries)
+
+            self.write_cache_file(style, cache)
+            self.cachelogfile(style).unlink(missing_ok=True)
+        self.__logstates.pop(style, None)
+
+    def cache(self,
+              style: str,
+              refresh: bool = False,
+              addnew: bool = True,
+              workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Loads/generates the metadata cache file for a given record style.
+        Along with the record metadata, the cache stores the modification
+        time and size (and optionally a content hash) of each record file so
+        that only new and modified records need to be parsed when the cache
+        is updated.  For the 'csv' and 'pickle' cacheformats, the cache file
+        is read together with its change log under a shared lock, detected
+        changes are appended to the log, and the cache file is only
+        rewritten when the log exceeds logcompaction changes.
+
+        Parameters
+        ----------
+        style : str 
+            The record style to retrieve the metadata content for.
+        refresh : bool, optional
+            If True, then the metadata content will be rebuilt by loading every
+            record of the given style.  If False (default), the stored metadata
+            for records will be used rather than loading from the files.
+        addnew : bool, optional
+            If True (default), then the stored metadata will be updated for
+            any new, modified or deleted record files.  If False, then the
+            stored metadata is returned as is.
+        workers : int, optional
+            The number of worker processes to use for parsing the new and
+            modified records.  If not given, the database's workers setting
+            will be used.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The contents of the cache file.  If memcache is set or the style
+            is watched, this is the in-memory cache and should not be
+            modified.
+        """
+        recordmanager.assert_style(style)
+
+        # SQLite caches are updated in place
+        if self.cacheformat == 'sqlite':
+            self.update_sqlite_cache(style, refresh=refresh, addnew=addnew,
+                                     workers=workers)
+            return self.read_cache_file(style)
+
+        # Use the cache kept up to date by the watcher
+        if refresh is False:
+            cache = self.__watchcaches.get(style)
+            if cache is not None:
+                return cache
+
+        return self.__update_cache(style, refresh=refresh, addnew=addnew,
+                                   workers=workers)
+
+    def __update_cache(self,
+                       style: str,
+                       refresh: bool = False,
+                       addnew: bool = True,
+                       workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Loads and updates the metadata cache of a style for the 'csv' and
+        'pickle' cacheformats.  See cache() for the parameters.
+        """
+        # Use the in-memory cache if the directory and cache file are unchanged
+        if self.memcache and refresh is False:
+            key = self.__memcache_key(style)
+            if key is not None and style in self.__memcache and self.__memcache[style][0] == key:
+                return self.__memcache[style][1]
+
+        if refresh is False:
+
+            # Load cache file and fold in the change log
+            with self.lock_cache(style, shared=True):
+                cache, state, compact = self.__read_logged_cache(style)
+
+        else:
+            # Initialize new cache
+            r = load_record(style)
+            cache = pd.DataFrame(columns=r.metadatakeys)
+            state = None
+            compact = True
+
+        if addnew is True:
+
+            # Compare the cache to the record files
+            removenames, newrecords, current = self._cache_updates(
+                style, cache.set_index('name'), workers=workers)
+
+            # Delete missing and outdated entries
+            if len(removenames) > 0:
+                cache = cache[~cache.name.isin(removenames)]
+
+            # Update stats for unchanged entries
+            if len(cache) > 0:
+                for key in current.keys():
+                    newvalues = cache.name.map(current[key])
+                    if key not in cache or not newvalues.equals(cache[key]):
+                        cache = cache.assign(**{key: newvalues})
+                        compact = True
+
+            # Add new and modified entries
+            if len(newrecords) > 0:
+                newdf = pd.DataFrame(newrecords)
+                if not cache.empty:
+                    cache = pd.concat([cache, newdf], sort=False)
+                else:
+                    cache = newdf
+                cache = cache.sort_values('name').reset_index(drop=True)
+
+            # Log the changes for other readers or build a new cache file
+            if len(removenames) > 0 or len(newrecords) > 0:
+                if state is None or state[0] is None:
+                    compact = True
+                elif not compact:
+                    self.__append_cache_log(style, removenames, newrecords)
+
+        # Refresh cache file
+        if compact:
+            self.__compact_cache_log(style, cache, state)
+
+        # Save the in-memory cache
+        if self.memcache and addnew is True:
+            key = self.__memcache_key(style)
+            if key is not None:
+                self.__memcache[style] = (key, cache)
+
+        return cache
+
+    def _cache_updates(self,
+                       style: str,
+                       stored: pd.DataFrame,
+                       workers: Optional[int] = None,
+                       names: Optional[list] = None) -> Tuple[set, list, pd.DataFrame]:
+        """
+        Compares the stored cache entries to the current record files and
+        loads the metadata for new and modified records.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        stored : pandas.DataFrame
+            The stored cache entries indexed by name.  The file stats are
+            read from the _mtime, _size and _hash columns if they exist.
+        workers : int, optional
+            The number of worker processes to use for parsing the new and
+            modified records.
+        names : list, optional
+            If given, only the entries and record files with these names are
+            compared.
+
+        Returns
+        -------
+        removenames : set
+            The names of the entries to remove as their files were deleted or
+            modified.
+        newrecords : list
+            The metadata and file stats of the new and modified records.
+        current : pandas.DataFrame
+            The current file stats (and hashes) of the unchanged entries,
+            indexed by name.
+        """
+        # Get the current stats of the record files
+        stats = self.record_file_stats(style, names=names)
+        if names is not None:
+            stored = stored[stored.index.isin(names)]
+
+        # Compare names in the cache to file names in the directory
+        cachenames = set(stored.index)
+        filenames = set(stats.index)
+        newnames = filenames.difference(cachenames)
+        deletednames = cachenames.difference(filenames)
+
+        # Compare stored and current stats of existing entries
+        current = stats[stats.index.isin(cachenames)]
+        stored = stored.reindex(current.index)
+        if '_mtime' in stored and '_size' in stored:
+            changed = ((stored['_mtime'] != current['_mtime'])
+                       | (stored['_size'] != current['_size']))
+        else:
+            # Adopt current stats for caches that predate stat tracking
+            changed = pd.Series(False, index=current.index)
+
+        # Use content hashes to check the existing entries
+        if self.hashcheck:
+            current = current.assign(_hash=[self.record_file_hash(style, name)
+                                            for name in current.index])
+            if '_hash' in stored:
+                hashed = stored['_hash'].notna()
+                changed[hashed] = stored['_hash'][hashed] != current['_hash'][hashed]
+        modifiednames = set(changed[changed].index)
+
+        # Load new and modified entries
+        loadnames = sorted(newnames.union(modifiednames))
+        newrecords = self.load_metadata(style, loadnames, workers=workers)
+        for meta in newrecords:
+            meta['_mtime'] = int(stats.at[meta['name'], '_mtime'])
+            meta['_size'] = int(stats.at[meta['name'], '_size'])
+
+        current = current[~current.index.isin(modifiednames)]
+        return deletednames.union(modifiednames), newrecords, current
+
+    def sqlite_connect(self) -> sqlite3.Connection:
+        """
+        Opens a connection to the SQLite metadata cache file.  Use the
+        connection in a with statement to commit changes.
+
+        Returns
+        -------
+        sqlite3.Connection
+            The open connection.
+        """
+        return sqlite3.connect(Path(self.host, 'metadata.sqlite'), timeout=60)
+
+    def update_sqlite_cache(self,
+                            style: str,
+                            refresh: bool = False,
+                            addnew: bool = True,
+                            workers: Optional[int] = None):
+        """
+        Updates the metadata stored for a record style in the SQLite cache
+        file.  Only the names and file stats of the stored entries are read,
+        and new, modified and deleted entries are updated in place.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        refresh : bool, optional
+            If True, then the stored metadata will be deleted and rebuilt by
+            loading every record of the given style.  Default value is False.
+        addnew : bool, optional
+            If True (default), then the stored metadata will be updated for
+            any new, modified or deleted record files.
+        workers : int, optional
+            The number of worker processes to use for parsing the new and
+            modified records.  If not given, the database's workers setting
+            will be used.
+        """
+        # Skip the update if the style is watched
+        if refresh is False and addnew is True and style in self.__watchstyles:
+            return
+
+        # Skip the update if the style's directory is unchanged
+        if self.memcache and refresh is False and addnew is True:
+            key = self.__memcache_key(style)
+            if key is not None and style in self.__memcache and self.__memcache[style][0] == key:
+                return
+
+        self.__update_sqlite_cache(style, refresh=refresh, addnew=addnew,
+                                   workers=workers)
+
+    def __update_sqlite_cache(self,
+                              style: str,
+                              refresh: bool = False,
+                              addnew: bool = True,
+                              workers: Optional[int] = None):
+        """
+        Updates the metadata stored for a record style in the SQLite cache
+        file.  See update_sqlite_cache() for the parameters.
+        """
+        table = _sqlname(style)
+        with closing(self.sqlite_connect()) as con, con:
+            if refresh:
+                con.execute(f'DROP TABLE IF EXISTS {table}')
+            con.execute(f'CREATE TABLE IF NOT EXISTS {table} '
+                        '(name TEXT PRIMARY KEY, _mtime INTEGER, _size INTEGER, _hash TEXT, _meta BLOB)')
+            if addnew is False:
+                return
+
+            # Compare the stored entries to the record files
+            stored = pd.DataFrame(con.execute(f'SELECT name, _mtime, _size, _hash FROM {table}').fetchall(),
+                                  columns=['name', '_mtime', '_size', '_hash'])
+            removenames, newrecords, current = self._cache_updates(
+                style, stored.set_index('name'), workers=workers)
+
+            # Delete missing and outdated entries
+            con.executemany(f'DELETE FROM {table} WHERE name = ?',
+                            [(name,) for name in removenames])
+
+            # Update stats for unchanged entries
+            stored = stored.set_index('name').reindex(current.index)
+            if '_hash' not in current:
+                current = current.assign(_hash=stored['_hash'])
+            changed = ((stored['_mtime'] != current['_mtime'])
+                       | (stored['_size'] != current['_size'])
+                       | (stored['_hash'].fillna('') != current['_hash'].fillna('')))
+            con.executemany(f'UPDATE {table} SET _mtime = ?, _size = ?, _hash = ? WHERE name = ?',
+                            [(int(row._mtime), int(row._size), _sqlvalue(row._hash), name)
+                             for name, row in current[changed].iterrows()])
+
+            # Add new and modified entries
+            self._sqlite_insert(con, style, newrecords)
+
+        # Save the directory's state
+        if self.memcache:
+            key = self.__memcache_key(style)
+            if key is not None:
+                self.__memcache[style] = (key, None)
+
+    def _sqlite_insert(self,
+                       con: sqlite3.Connection,
+                       style: str,
+                       records: list):
+        """
+        Inserts entries into a style's table in the SQLite cache file.  Each
+        metadata key is stored in an indexed column for queries, and the full
+        metadata dict is pickled to retain the original values.
+
+        Parameters
+        ----------
+        con : sqlite3.Connection
+            An open connection to the SQLite cache file.
+        style : str
+            The record style.
+        records : list
+            The metadata dicts with file stats (_mtime, _size and optionally
+            _hash) to insert.
+        """
+        if len(records) == 0:
+            return
+        table = _sqlname(style)
+
+        # Split the metadata from the file stats
+        statkeys = ['_mtime', '_size', '_hash']
+        metas = [{k: v for k, v in record.items() if k not in statkeys}
+                 for record in records]
+
+        # Add indexed columns for any new metadata keys
+        columns = [row[1] for row in con.execute(f'PRAGMA table_info({table})')]
+        keys = []
+        for meta in metas:
+            for key in meta:
+                if key not in keys and key != 'name':
+                    keys.append(key)
+        for key in keys:
+            if key not in columns:
+                con.execute(f'ALTER TABLE {table} ADD COLUMN {_sqlname(key)}')
+                con.execute(f'CREATE INDEX IF NOT EXISTS {_sqlname(style + "." + key)} '
+                            f'ON {table} ({_sqlname(key)})')
+
+        # Insert the entries
+        sqlcolumns = ', '.join(['name', '_mtime', '_size', '_hash', '_meta']
+                               + [_sqlname(key) for key in keys])
+        placeholders = ', '.join('?' * (5 + len(keys)))
+        rows = []
+        for record, meta in zip(records, metas):
+            row = [meta['name'], int(record['_mtime']), int(record['_size']),
+                   _sqlvalue(record.get('_hash', None)),
+                   pickle.dumps(meta, protocol=5)]
+            row += [_sqlvalue(meta.get(key, None)) for key in keys]
+            rows.append(row)
+        con.executemany(f'INSERT OR REPLACE INTO {table} ({sqlcolumns}) VALUES ({placeholders})',
+                        rows)
+
+    def sqlite_select(self,
+                      style: str,
+                      where: str = '1',
+                      params: Optional[list] = None) -> pd.DataFrame:
+        """
+        Selects entries for a style from the SQLite cache file.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        where : str, optional
+            An SQL WHERE clause for selecting the entries, such as built by
+            the record's sqlquery method.  Default value of '1' selects all.
+        params : list, optional
+            Values for any ? placeholders in where.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The metadata and file stats for the selected entries.
+        """
+        if params is None:
+            params = []
+        table = _sqlname(style)
+
+        with closing(self.sqlite_connect()) as con:
+            rows = con.execute(f'SELECT _meta, _mtime, _size, _hash FROM {table} '
+                               f'WHERE {where} ORDER BY name', params).fetchall()
+
+        return self._sqlite_df(style, rows)
+
+    def iter_sqlite_select(self,
+                           style: str,
+                           where: str = '1',
+                           params: Optional[list] = None,
+                           chunksize: int = 100):
+        """
+        Iterates over chunks of entries selected for a style from the SQLite
+        cache file.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        where : str, optional
+            An SQL WHERE clause for selecting the entries, such as built by
+            the record's sqlquery method.  Default value of '1' selects all.
+        params : list, optional
+            Values for any ? placeholders in where.
+        chunksize : int, optional
+            The number of entries to fetch at a time.  Default value is 100.
+
+        Yields
+        ------
+        pandas.DataFrame
+            The metadata and file stats for a chunk of the selected entries.
+        """
+        if params is None:
+            params = []
+        table = _sqlname(style)
+
+        with closing(self.sqlite_connect()) as con:
+            cursor = con.execute(f'SELECT _meta, _mtime, _size, _hash FROM {table} '
+                                 f'WHERE {where} ORDER BY name', params)
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if len(rows) == 0:
+                    break
+                yield self._sqlite_df(style, rows)
+
+    def _sqlite_df(self,
+                   style: str,
+                   rows: list) -> pd.DataFrame:
+        """
+        Builds a DataFrame from selected SQLite cache rows.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        rows : list
+            The (_meta, _mtime, _size, _hash) values of the selected rows.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The metadata and file stats for the rows.
+        """
+        # Unpickle the metadata and add the file stats
+        records = []
+        for meta, mtime, size, filehash in rows:
+            meta = pickle.loads(meta)
+            meta['_mtime'] = mtime
+            meta['_size'] = size
+            if filehash is not None:
+                meta['_hash'] = filehash
+            records.append(meta)
+
+        if len(records) == 0:
+            r = load_record(style)
+            return pd.DataFrame(columns=r.metadatakeys)
+        return pd.DataFrame(records)
+
+    def cache_entries(self,
+                      style: str,
+                      names: list,
+                      refresh: bool = False) -> pd.DataFrame:
+        """
+        Retrieves the cached metadata for specific records.  Only the named
+        record files are checked, and only those that are not in the cache
+        or have changed since they were cached are parsed.  The cache file
+        itself is not updated.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        names : list
+            The names of the records.  Names without a record file are
+            ignored.
+        refresh : bool, optional
+            If True, then every named record file is parsed rather than using
+            the cached metadata.  Default value is False.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The metadata and file stats of the named records.
+        """
+        # Get the current stats of the named record files
+        names = list(dict.fromkeys(names))
+        stats = self.record_file_stats(style, names=names)
+        if self.hashcheck:
+            stats = stats.assign(_hash=[self.record_file_hash(style, name)
+                                        for name in stats.index])
+
+        # Get the stored entries
+        if refresh or len(stats) == 0:
+            cache = pd.DataFrame(columns=['name'])
+        elif self.cacheformat == 'sqlite':
+            self.update_sqlite_cache(style, addnew=False)
+            cache = []
+            for i in range(0, len(stats), 500):
+                chunk = stats.index[i:i+500].tolist()
+                cache.append(self.sqlite_select(style, f'name IN ({", ".join("?" * len(chunk))})', chunk))
+            cache = pd.concat(cache, sort=False) if len(cache) > 1 else cache[0]
+        else:
+            cache = self.cache(style, addnew=False)
+            cache = cache[cache.name.isin(stats.index)]
+
+        # Keep only entries whose stats match the current files
+        stored = cache.set_index('name').reindex(stats.index)
+        current = pd.Series(True, index=stats.index)
+        for key in stats.keys():
+            if key in stored:
+                current &= stored[key] == stats[key]
+            else:
+                current[:] = False
+        cache = cache[cache.name.isin(current[current].index)]
+
+        # Parse the new and changed records
+        loadnames = current[~current].index.tolist()
+        newrecords = self.load_metadata(style, loadnames)
+        for meta in newrecords:
+            meta['_mtime'] = int(stats.at[meta['name'], '_mtime'])
+            meta['_size'] = int(stats.at[meta['name'], '_size'])
+
+        # Combine the entries in the order given by names
+        if len(newrecords) > 0:
+            newrecords = pd.DataFrame(newrecords)
+            if not cache.empty:
+                cache = pd.concat([cache, newrecords], sort=False)
+            else:
+                cache = newrecords
+        if len(cache) == 0:
+            r = load_record(style)
+            return pd.DataFrame(columns=r.metadatakeys)
+        cache = cache.set_index('name').loc[stats.index].reset_index()
+        return cache
+
+    def read_cache_file(self,
+                        style: str) -> pd.DataFrame:
+        """
+        Reads the metadata cache file for a given record style as is.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The contents of the cache file.
+        """
+        cachefile = self.cachefile(style)
+
+        # Binary caches retain the original types
+        if self.cacheformat == 'pickle':
+            return pd.read_pickle(cachefile)
+        elif self.cacheformat == 'sqlite':
+            return self.sqlite_select(style)
+
+        # Load csv cache file
+        cache = pd.read_csv(cachefile, dtype={'name': str, '_hash': str})
+
+        def interpret(series, key):
+            """Safely convert dict, list and tuple elements from str"""
+            try:
+                assert series[key][0] in '{[('
+                return ast.literal_eval(series[key])
+            except:
+                return series[key]
+
+        def toint(column):
+            """Convert int columns as needed"""
+            try:
+                assert column.dtype == float
+                newcolumn = column.astype(int)
+                assert np.allclose(column, newcolumn, atol=0.0)
+            except:
+                return column
+            else:
+                return newcolumn
+
+        # Interpret int, dict and list elements
+        if len(cache) > 0:
+            cache = cache.apply(toint, axis=0)
+            for key in cache.keys():
+                cache[key] = cache.apply(interpret, axis=1, args=[key])
 
-    @property
-    def style(self) -> str:
-        """str: The database style"""
-        return 'local'
+        return cache
 
-    @property
-    def format(self) -> str:
-        """str: The format that records are saved as: 'json' or 'xml'"""
-        return self.__format
+    def write_cache_file(self,
+                         style: str,
+                         cache: pd.DataFrame):
+        """
+        Saves metadata to the cache file for a given record style.
 
-    @property
-    def indent(self) -> Optional[int]:
-        """int or None: The record indentation setting to use when saving records."""
-        return self.__indent
+        Parameters
+        ----------
+        style : str
+            The record style.
+        cache : pandas.DataFrame
+            The metadata to save.
+        """
+        cachefile = self.cachefile(style)
+        tempname = Path(cachefile.parent, f'.{cachefile.name}.tmp')
+
+        if self.cacheformat == 'pickle':
+            cache.to_pickle(tempname, protocol=5)
+            os.replace(tempname, cachefile)
+        elif self.cacheformat == 'sqlite':
+            self.update_sqlite_cache(style, refresh=True, addnew=False)
+            records = [{k: v for k, v in record.items() if k == '_hash' or not pd.isna(v)}
+                       for record in cache.to_dict('records')]
+            with closing(self.sqlite_connect()) as con, con:
+                self._sqlite_insert(con, style, records)
+        else:
+            cache.to_csv(tempname, index=False)
+            os.replace(tempname, cachefile)
 
-    def cache(self,
-              style: str,
-              refresh: bool = False,
-              addnew: bool = True) -> pd.DataFrame:
+    def record_file_stats(self,
+                          style: str,
+                          names: Optional[list] = None) -> pd.DataFrame:
         """
-        Loads/generates the metadata cache csv file for a given record style.
+        Collects the modification times and sizes of all record files of a
+        given style.
 
         Parameters
         ----------
-        style : str 
-            The record style to retrieve the metadata content for.
-        refresh : bool, optional
-            If True, then the metadata content will be rebuilt by loading every
-            record of the given style.  If False (default), the stored metadata
-            for records will be used rather than loading from the files.
-        addnew : bool, optional
-            If True (default), then the metadata for new records will be
-            appended to the stored metadata cache.  If False, then the stored
-            metadata is returned as is.
+        style : str
+            The record style to collect file stats for.
+        names : list, optional
+            If given, only the stats of the record files with these names
+            are collected.  Names without a record file are skipped.
 
         Returns
         -------
         pandas.DataFrame
-            The contents of the cache csv file.
+            The record files' modification times in ns (_mtime) and sizes in
+            bytes (_size), indexed by record name.
         """
-        recordmanager.assert_style(style)
-        cachefile = Path(self.host, f'{style}.csv')
+        suffix = self.suffix
 
-        if cachefile.is_file() and refresh is False:
-
-            # Load cache file
-            cache = pd.read_csv(cachefile)
-
-            def interpret(series, key):
-                """Safely convert dict, list and tuple elements from str"""
+        stats = []
+        if names is not None:
+            for name in names:
                 try:
-                    assert series[key][0] in '{[('
-                    return ast.literal_eval(series[key])
-                except:
-                    return series[key]
+                    stat = os.stat(self.record_path(style, name))
+                except FileNotFoundError:
+                    continue
+                stats.append((name, stat.st_mtime_ns, stat.st_size))
 
-            def toint(column):
-                """Convert int columns as needed"""
-                try:
-                    assert column.dtype == float
-                    newcolumn = column.astype(int)
-                    assert np.allclose(column, newcolumn, atol=0.0)
-                except:
-                    return column
-                else:
-                    return newcolumn
+        else:
+            for entry in self.iter_record_files(style):
+                stat = entry.stat()
+                stats.append((entry.name[:-len(suffix)],
+                              stat.st_mtime_ns, stat.st_size))
 
-            # Interpret int, dict and list elements
-            if len(cache) > 0:
-                cache = cache.apply(toint, axis=0)
-                for key in cache.keys():
-                    cache[key] = cache.apply(interpret, axis=1, args=[key])
-            else:
-                r = load_record(style)
-                cache = pd.DataFrame(columns=r.metadatakeys)
+        stats = pd.DataFrame(stats, columns=['name', '_mtime', '_size'])
+        return stats.astype({'_mtime': 'int64', '_size': 'int64'}).set_index('name')
 
-        else:
-            # Initialize new cache
-            r = load_record(style)
-            cache = pd.DataFrame(columns=r.metadatakeys)
+    def record_file_hash(self,
+                         style: str,
+                         name: str) -> str:
+        """
+        Computes a hash of a record file's content.
 
-        if addnew is True:
+        Parameters
+        ----------
+        style : str
+            The record's style.
+        name : str
+            The record's name.
 
-            # Compare names in the cache to file names in the directory
-            cachenames = set(cache.name)
-            filenames = set([fname.stem for fname in Path(self.host, style).glob(f'*.{self.format}')])
-            newnames = filenames.difference(cachenames)
-            deletednames = cachenames.difference(filenames)
-
-            # Load new entries
-            if len(newnames) > 0:
-                newrecords = []
-                for name in newnames:
-                    fname = Path(self.host, style, f'{name}.{self.format}')
-                    record = load_record(style, model=fname, name=name)
-                    newrecords.append(record.metadata())
-                newrecords = pd.DataFrame(newrecords)
-                if not cache.empty:
-                    cache = pd.concat([cache, newrecords], sort=False).sort_values('name')
-                else:
-                    cache = newrecords.sort_values('name')
-                refresh = True
+        Returns
+        -------
+        str
+            The sha1 hex digest of the file's content.
+        """
+        fname = self.record_path(style, name)
+        return _file_hash(fname)
 
-            # Delete missing entries
-            if len(deletednames) > 0:
-                cache = cache[~cache.name.isin(deletednames)]
-                refresh = True
+    def load_metadata(self,
+                      style: str,
+                      names: list,
+                      workers: Optional[int] = None) -> list:
+        """
+        Loads record files and extracts their metadata.  If hashcheck is set,
+        the metadata will also include the file content hashes.
 
-        # Refresh cache file
-        if refresh:
-            cache.to_csv(cachefile, index=False)
+        Parameters
+        ----------
+        style : str
+            The record style.
+        names : list
+            The names of the records to load.
+        workers : int, optional
+            The number of worker processes to use.  If not given, the
+            database's workers setting will be used.
 
-        return cache
+        Returns
+        -------
+        list
+            The metadata dicts for the records, in the same order as names.
+        """
+        if workers is None:
+            workers = self.workers
+
+        recordclass = recordmanager.get_class(style)
+        fnames = [self.record_path(style, name) for name in names]
+        hashchecks = [self.hashcheck] * len(names)
+        compressions = [self.compression] * len(names)
+
+        # Parse records in the current process
+        if workers == 1 or len(names) <= 1:
+            return list(map(_file_metadata, [recordclass] * len(names),
+                            fnames, names, hashchecks, compressions))
+
+        # Parse records using a process pool
+        chunksize = max(1, len(names) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_file_metadata, [recordclass] * len(names),
+                                     fnames, names, hashchecks, compressions,
+                                     chunksize=chunksize))
 
     def get_records(self, 
                     style: Optional[str] = None,
                     return_df: bool = False,
                     refresh_cache: bool = False,
+                    threads: Optional[int] = None,
+                    lazy: bool = False,
+                    sort: Union[str, list, None] = _namesort,
+                    ascending: bool = True,
+                    skip: int = 0,
+                    limit: Optional[int] = None,
                     **kwargs) -> Union[list, Tuple[list, pd.DataFrame]]:
         """
         Produces a list of all matching records in the database.
@@ -186,13 +1803,33 @@ class LocalDatabase(Database):
             The record style to search.
         refresh_cache : bool, optional
             Indicates if the metadata cache file is to be refreshed.  If False,
-            metadata for new records will be added but the old record metadata
-            fields will not be updated.  If True, then the metadata for all
-            records will be regenerated, which is needed to update the metadata
-            for modified records.
+            metadata will only be regenerated for new and modified records
+            as identified by changes in the record files' modification times
+            and sizes (and content hashes if hashcheck is set).  If True, then
+            the metadata for all records will be regenerated.
         return_df : bool, optional
             If True, then the corresponding pandas.Dataframe of metadata
             will also be returned
+        threads : int, optional
+            The number of threads to use for loading the matching record
+            files.  If not given, the database's threads setting will be used.
+        lazy : bool, optional
+            If True, then RecordProxy objects backed by the cached metadata
+            are returned and each record file is only loaded when an attribute
+            not in the metadata is accessed.  Default value is False.
+        sort : str, list or None, optional
+            The metadata key(s) to sort the records by.  By default, records
+            are sorted by name, or kept in the order of the names if name is
+            given.  If None, then the cache's order is used.
+        ascending : bool, optional
+            Indicates if the sort is in ascending (True, default) or
+            descending (False) order.
+        skip : int, optional
+            The number of matching records to skip.  Default value is 0.
+        limit : int, optional
+            The maximum number of records to return.  If None (default), then
+            all matching records after skip are returned.  Only the
+            returned records are loaded.
         **kwargs : any, optional
             Any of the record-specific metadata keywords that can be searched
             for.
@@ -210,25 +1847,88 @@ class LocalDatabase(Database):
             style = self.select_record_style()
 
         # Get df
-        df = self.get_records_df(style, refresh_cache=refresh_cache, **kwargs)
+        df = self.get_records_df(style, refresh_cache=refresh_cache, sort=sort,
+                                 ascending=ascending, skip=skip, limit=limit,
+                                 **kwargs)
 
-        # Load only the matching records
-        records = []
-        if len(df) > 0:
-            for name in df.name:
-                fname = Path(self.host, style, f'{name}.{self.format}')
-                records.append(load_record(style, model=fname, database=self))
+        # Build proxies that load the records on demand
+        if lazy:
+            records = np.array([RecordProxy(style, meta, database=self,
+                                            loader=functools.partial(self.load_record_file, style, meta['name']))
+                                for meta in df.to_dict('records')])
 
-        records = np.array(records)
+        # Load only the matching records
+        else:
+            records = np.array(self.load_records(style, df.name, threads=threads))
 
         if return_df:
             return records, df
         else:
             return records
 
+    def load_records(self,
+                     style: str,
+                     names: list,
+                     threads: Optional[int] = None) -> list:
+        """
+        Loads record files as Record objects.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        names : list
+            The names of the records to load.
+        threads : int, optional
+            The number of threads to use for loading the files.  If not given,
+            the database's threads setting will be used.
+
+        Returns
+        -------
+        list
+            The loaded records, in the same order as names.
+        """
+        if threads is None:
+            threads = self.threads
+        load = functools.partial(self.load_record_file, style)
+
+        # Load records in the current thread
+        if threads == 1 or len(names) <= 1:
+            return [load(name) for name in names]
+
+        # Load records using a thread pool: map returns results in order
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(load, names))
+
+    def load_record_file(self,
+                         style: str,
+                         name: str) -> Record:
+        """
+        Loads a record file as a Record object.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        name : str
+            The name of the record to load.
+
+        Returns
+        -------
+        Record
+            The loaded record.
+        """
+        fname = self.record_path(style, name)
+        return load_record(style, model=_read_file(fname, self.compression),
+                           name=name, database=self)
+
     def get_records_df(self, 
                        style: Optional[str] = None,
                        refresh_cache: bool = False,
+                       sort: Union[str, list, None] = _namesort,
+                       ascending: bool = True,
+                       skip: int = 0,
+                       limit: Optional[int] = None,
                        **kwargs) -> pd.DataFrame:
         """
         Produces a table of metadata for matching records in the database.
@@ -239,10 +1939,22 @@ class LocalDatabase(Database):
             The record style to limit the search by.
         refresh_cache : bool, optional
             Indicates if the metadata cache file is to be refreshed.  If False,
-            metadata for new records will be added but the old record metadata
-            fields will not be updated.  If True, then the metadata for all
-            records will be regenerated, which is needed to update the metadata
-            for modified records.
+            metadata will only be regenerated for new and modified records
+            as identified by changes in the record files' modification times
+            and sizes (and content hashes if hashcheck is set).  If True, then
+            the metadata for all records will be regenerated.
+        sort : str, list or None, optional
+            The metadata key(s) to sort the records by.  By default, records
+            are sorted by name, or kept in the order of the names if name is
+            given.  If None, then the cache's order is used.
+        ascending : bool, optional
+            Indicates if the sort is in ascending (True, default) or
+            descending (False) order.
+        skip : int, optional
+            The number of matching records to skip.  Default value is 0.
+        limit : int, optional
+            The maximum number of records to return.  If None (default), then
+            all matching records after skip are returned.
         **kwargs : any, optional
             Any of the record-specific metadata keywords that can be searched
             for.
@@ -258,21 +1970,17 @@ class LocalDatabase(Database):
             style = self.select_record_style()
 
         if 'name' in kwargs and kwargs['name'] is not None:
-            # Load named records
-            cache = []
-            for name in aslist(kwargs['name']):
-                fname = Path(self.host, style, f'{name}.{self.format}')
-                if fname.exists():
-                    record = load_record(style, model=fname)
-                    cache.append(record.metadata())
-
-            # Build cache DataFrame
-            if len(cache) == 0:
-                # Initialize new cache
-                r = load_record(style)
-                cache = pd.DataFrame(columns=r.metadatakeys)
-            else:
-                cache = pd.DataFrame(cache)
+            # Get cached entries for the named records in the order given
+            cache = self.cache_entries(style, aslist(kwargs['name']),
+                                       refresh=refresh_cache)
+            if sort is _namesort:
+                sort = None
+
+        elif self.cacheformat == 'sqlite':
+            # Update the cache and select candidates with an SQL query
+            self.update_sqlite_cache(style, refresh=refresh_cache)
+            where, params = load_record(style).sqlquery(**kwargs)
+            cache = self.sqlite_select(style, where, params)
 
         else:
             # Load cache file
@@ -280,10 +1988,112 @@ class LocalDatabase(Database):
 
         # Filter based on the record's pandasfilter method
         mask = load_record(style).pandasfilter(cache, **kwargs)
-        df = cache[mask].reset_index(drop=True)
+        df = cache[mask]
+
+        # Sort and select the requested records
+        if sort is not None:
+            df = df.sort_values(sort, ascending=ascending, kind='stable')
+        stop = None if limit is None else skip + limit
+        df = df.iloc[skip:stop].reset_index(drop=True)
+
+        # Remove the cached file stats
+        df = df.drop(columns=['_mtime', '_size', '_hash'], errors='ignore')
 
         return df
 
+    def iter_records(self,
+                     style: Optional[str] = None,
+                     chunksize: int = 100,
+                     refresh_cache: bool = False,
+                     threads: Optional[int] = None,
+                     **kwargs):
+        """
+        Iterates over all matching records in the database.  The record files
+        are loaded one chunk at a time.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search.
+        chunksize : int, optional
+            The number of record files to load at a time.  Default value is
+            100.
+        refresh_cache : bool, optional
+            Indicates if the metadata cache file is to be refreshed.  If False,
+            metadata will only be regenerated for new and modified records.
+            If True, then the metadata for all records will be regenerated.
+        threads : int, optional
+            The number of threads to use for loading each chunk of record
+            files.  If not given, the database's threads setting will be used.
+        **kwargs : any, optional
+            Any of the record-specific metadata keywords that can be searched
+            for.
+
+        Yields
+        ------
+        Record
+            Each record from the database matching the given parameters.
+        """
+        # Set default search parameters
+        if style is None:
+            style = self.select_record_style()
+
+        for df in self.iter_records_df(style, chunksize=chunksize,
+                                       refresh_cache=refresh_cache, **kwargs):
+            yield from self.load_records(style, df.name.tolist(), threads=threads)
+
+    def iter_records_df(self,
+                        style: Optional[str] = None,
+                        chunksize: int = 100,
+                        refresh_cache: bool = False,
+                        **kwargs):
+        """
+        Iterates over the metadata of all matching records in the database
+        in chunks.  With the 'sqlite' cacheformat, the matching entries are
+        fetched from the cache one chunk at a time.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search.
+        chunksize : int, optional
+            The maximum number of records in each chunk.  Default value is 100.
+        refresh_cache : bool, optional
+            Indicates if the metadata cache file is to be refreshed.  If False,
+            metadata will only be regenerated for new and modified records.
+            If True, then the metadata for all records will be regenerated.
+        **kwargs : any, optional
+            Any of the record-specific metadata keywords that can be searched
+            for.
+
+        Yields
+        ------
+        pandas.DataFrame
+            The metadata for a chunk of the matching records.
+        """
+        # Set default search parameters
+        if style is None:
+            style = self.select_record_style()
+
+        if self.cacheformat != 'sqlite' or kwargs.get('name', None) is not None:
+            # Split the matching metadata into chunks
+            df = self.get_records_df(style, refresh_cache=refresh_cache, **kwargs)
+            for i in range(0, len(df), chunksize):
+                yield df.iloc[i:i+chunksize].reset_index(drop=True)
+            return
+
+        # Update the cache and fetch candidates with an SQL query
+        self.update_sqlite_cache(style, refresh=refresh_cache)
+        record = load_record(style)
+        where, params = record.sqlquery(**kwargs)
+        for cache in self.iter_sqlite_select(style, where, params, chunksize=chunksize):
+
+            # Filter based on the record's pandasfilter method
+            mask = record.pandasfilter(cache, **kwargs)
+            df = cache[mask].reset_index(drop=True)
+            if len(df) > 0:
+                yield df.drop(columns=['_mtime', '_size', '_hash'], errors='ignore')
+
     def get_record(self,
                    style: Optional[str] = None,
                    refresh_cache: bool = False,
@@ -297,10 +2107,10 @@ class LocalDatabase(Database):
             The record style to limit the search by.
         refresh_cache : bool, optional
             Indicates if the metadata cache file is to be refreshed.  If False,
-            metadata for new records will be added but the old record metadata
-            fields will not be updated.  If True, then the metadata for all
-            records will be regenerated, which is needed to update the metadata
-            for modified records.
+            metadata will only be regenerated for new and modified records
+            as identified by changes in the record files' modification times
+            and sizes (and content hashes if hashcheck is set).  If True, then
+            the metadata for all records will be regenerated.
         **kwargs : any, optional
             Any of the record-specific metadata keywords that can be searched
             for.
@@ -363,7 +2173,7 @@ class LocalDatabase(Database):
 
         # Fast count of all records of a given style
         if len(kwargs) == 0:
-            count = len([i for i in Path(self.host, style).glob(f'*.{self.format}')])
+            count = sum(1 for entry in self.iter_record_files(style))
 
         # Use get_records_df for delimited searches    
         else:
@@ -426,35 +2236,59 @@ class LocalDatabase(Database):
             raise ValueError('kwargs style, name, and model cannot be given with kwarg record')
 
         # Verify that there isn't already a record with a matching name
-        style_dir = Path(self.host, record.style)
-        fname = Path(style_dir, f'{record.name}.{self.format}')
+        fname = self.record_path(record.style, record.name)
         if fname.is_file():
             raise ValueError(f'Record {record.name} already exists')
 
-        # Make record style directory if needed
-        if not style_dir.is_dir():
-            style_dir.mkdir()
+        # Make record directory if needed
+        fname.parent.mkdir(parents=True, exist_ok=True)
 
-        # Retrieve/build model contents
+        # Retrieve/build model contents and metadata
         try:
             assert build is False
             model = record.model
             assert model is not None
+            meta = load_record(record.style, model=model, name=record.name).metadata()
         except:
             model = record.build_model()
+            meta = record.metadata()
 
         # Save record
-        with open(fname, 'w', encoding='UTF-8') as f:
-            if self.format == 'json':
-                model.json(fp=f, indent=self.indent, ensure_ascii=False)
-            elif self.format == 'xml':
-                model.xml(fp=f, indent=self.indent)
+        self.__save_model(fname, model)
+        self.__cache_saved(record.style, [meta])
+        self.index_name(record.name, record.style)
 
         if verbose:
             print(f'{record} added to {self.host}')
 
         return record
 
+    def __save_model(self,
+                     fname: Path,
+                     model: DM):
+        """
+        Saves a record model to a file.  The content is written to a
+        temporary file that then replaces fname so that readers never see a
+        partially written record and the directory's modification time
+        changes.
+        """
+        tempname = Path(fname.parent, f'.{fname.name}.tmp')
+        try:
+            with _open_file(tempname, self.compression, 'wb') as f:
+                if self.format == 'json':
+                    content = model.json(indent=self.indent, ensure_ascii=False)
+                elif self.format == 'xml':
+                    content = model.xml(indent=self.indent)
+                f.write(content.encode('UTF-8'))
+            os.replace(tempname, fname)
+        except BaseException:
+            tempname.unlink(missing_ok=True)
+            raise
+
+        # Mark the style directory as changed for sharded layouts
+        if self.shardlevels > 0:
+            os.utime(fname.parents[self.shardlevels])
+
     def update_record(self,
                       record: Optional[Record] = None,
                       style: Optional[str] = None,
@@ -518,25 +2352,23 @@ class LocalDatabase(Database):
             record = load_record(record.style, model=model, name=record.name)
 
         # Check if record already exists
-        style_dir = Path(self.host, record.style)
-        fname = Path(style_dir, f'{record.name}.{self.format}')
+        fname = self.record_path(record.style, record.name)
         if not fname.is_file():
             raise ValueError(f'No existing {record.style} record {record.name} found')
 
-        # Retrieve/build model contents
+        # Retrieve/build model contents and metadata
         try:
             assert build is False
             model = record.model
             assert model is not None
+            meta = load_record(record.style, model=model, name=record.name).metadata()
         except:
             model = record.build_model()
+            meta = record.metadata()
 
         # Save record
-        with open(fname, 'w', encoding='UTF-8') as f:
-            if self.format == 'json':
-                model.json(fp=f, indent=self.indent, ensure_ascii=False)
-            elif self.format == 'xml':
-                model.xml(fp=f, indent=self.indent)
+        self.__save_model(fname, model)
+        self.__cache_saved(record.style, [meta])
 
         if verbose:
             print(f'{record} updated in {self.host}')
@@ -580,20 +2412,269 @@ class LocalDatabase(Database):
             raise ValueError('kwargs style and name cannot be given with kwarg record')
 
          # Delete record file
-        fname = Path(self.host, record.style, f'{record.name}.{self.format}')
+        fname = self.record_path(record.style, record.name)
         if fname.is_file():
             fname.unlink()
+            self.index_name(record.name, record.style, delete=True)
+            self.__update_cache_entries(record.style, [], [record.name])
+            if self.shardlevels > 0:
+                os.utime(Path(self.host, record.style))
         else:
             raise ValueError(f'No existing {record.style} record {record.name} found')
 
         if verbose:
             print(f'{record} deleted from {self.host}')
 
+    def add_records(self,
+                    records: list,
+                    build: bool = False,
+                    threads: Optional[int] = None,
+                    verbose: bool = False) -> list:
+        """
+        Adds multiple new records to the database.  The record files are
+        written using a thread pool, and the metadata cache and name index
+        are updated once for all of the records.
+        
+        Parameters
+        ----------
+        records : list
+            The new records to add to the database.
+        build : bool, optional
+            If True, then the uploaded content will be (re)built based on the
+            records' attributes.  If False (default), then records' existing
+            content will be loaded if it exists, or built if it doesn't exist.
+        threads : int, optional
+            The number of threads to use for writing the record files.  If not
+            given, the database's threads setting will be used.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+
+        Returns
+        ------
+        list
+            The added records.
+        
+        Raises
+        ------
+        ValueError
+            If any of the records already exist or are given multiple times.
+            No records are added in this case.
+        """
+        records = aslist(records)
+        self.__save_records(records, build=build, threads=threads, new=True)
+
+        if verbose:
+            print(f'{len(records)} records added to {self.host}')
+
+        return records
+
+    def update_records(self,
+                       records: list,
+                       build: bool = False,
+                       threads: Optional[int] = None,
+                       verbose: bool = False) -> list:
+        """
+        Replaces multiple existing records with new content.  The record files
+        are written using a thread pool, and the metadata cache is updated
+        once for all of the records.
+        
+        Parameters
+        ----------
+        records : list
+            The records with new content to update in the database.
+        build : bool, optional
+            If True, then the uploaded content will be (re)built based on the
+            records' attributes.  If False (default), then records' existing
+            content will be loaded if it exists, or built if it doesn't exist.
+        threads : int, optional
+            The number of threads to use for writing the record files.  If not
+            given, the database's threads setting will be used.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+
+        Returns
+        ------
+        list
+            The updated records.
+        
+        Raises
+        ------
+        ValueError
+            If any of the records do not exist or are given multiple times.
+            No records are updated in this case.
+        """
+        records = aslist(records)
+        self.__save_records(records, build=build, threads=threads, new=False)
+
+        if verbose:
+            print(f'{len(records)} records updated in {self.host}')
+
+        return records
+
+    def __save_records(self,
+                       records: list,
+                       build: bool,
+                       threads: Optional[int],
+                       new: bool):
+        """
+        Writes multiple record files and adds their metadata to the cache.
+        new indicates if the records are added (True) or updated (False).
+        """
+        if threads is None:
+            threads = self.threads
+
+        # Check the records
+        keys = [(record.style, record.name) for record in records]
+        if len(set(keys)) != len(keys):
+            raise ValueError('records contain duplicate names')
+        fnames = [self.record_path(style, name) for style, name in keys]
+        for record, fname in zip(records, fnames):
+            if new and fname.is_file():
+                raise ValueError(f'Record {record.name} already exists')
+            elif not new and not fname.is_file():
+                raise ValueError(f'No existing {record.style} record {record.name} found')
+
+        # Retrieve/build model contents and metadata
+        models = []
+        entries = {}
+        for record in records:
+            try:
+                assert build is False
+                model = record.model
+                assert model is not None
+                meta = load_record(record.style, model=model, name=record.name).metadata()
+            except:
+                model = record.build_model()
+                meta = record.metadata()
+            models.append(model)
+            entries.setdefault(record.style, []).append(meta)
+
+        # Write the record files
+        for parent in set(fname.parent for fname in fnames):
+            parent.mkdir(parents=True, exist_ok=True)
+        if threads == 1 or len(records) <= 1:
+            for fname, model in zip(fnames, models):
+                self.__save_model(fname, model)
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(self.__save_model, fnames, models))
+
+        # Update the name index and the metadata caches
+        if new:
+            self.index_names([(name, style) for style, name in keys])
+        for style, metas in entries.items():
+            self.__cache_saved(style, metas)
+
+    def __cache_saved(self,
+                      style: str,
+                      metas: list):
+        """
+        Adds the file stats to the metadata of saved records and replaces
+        their metadata cache entries.
+        """
+        stats = self.record_file_stats(style, names=[meta['name'] for meta in metas])
+        for meta in metas:
+            meta['_mtime'] = int(stats.at[meta['name'], '_mtime'])
+            meta['_size'] = int(stats.at[meta['name'], '_size'])
+            if self.hashcheck:
+                meta['_hash'] = self.record_file_hash(style, meta['name'])
+        self.__update_cache_entries(style, metas, [meta['name'] for meta in metas])
+
+    def delete_records(self,
+                       records: Optional[list] = None,
+                       style: Optional[str] = None,
+                       names: Optional[list] = None,
+                       verbose: bool = False):
+        """
+        Permanently deletes multiple records from the database.  The metadata
+        cache and name index are updated once for all of the records.
+        
+        Parameters
+        ----------
+        records : list, optional
+            The records to delete from the database.  If not given, names
+            (and style) are needed to identify the records to delete.
+        style : str, optional
+            The style of the records to delete.  If not given with names, the
+            style of each record is found from its name.
+        names : list, optional
+            The names of the records to delete.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+        
+        Raises
+        ------
+        ValueError
+            If style and/or names given with records, or any of the records
+            do not exist.  No records are deleted in this case.
+        """
+        # Identify the records
+        if records is not None:
+            if style is not None or names is not None:
+                raise ValueError('kwargs style and names cannot be given with kwarg records')
+            keys = [(record.style, record.name) for record in aslist(records)]
+        elif style is not None:
+            keys = [(style, name) for name in aslist(names)]
+        else:
+            keys = [(self.find_record_style(name), name) for name in aslist(names)]
+
+        # Check that the records exist
+        fnames = [self.record_path(style, name) for style, name in keys]
+        for (style, name), fname in zip(keys, fnames):
+            if not fname.is_file():
+                raise ValueError(f'No existing {style} record {name} found')
+
+        # Delete record files
+        for fname in fnames:
+            fname.unlink()
+
+        # Update the name index and the metadata caches
+        self.index_names([(name, style) for style, name in keys], delete=True)
+        for style in set(style for style, name in keys):
+            if self.shardlevels > 0:
+                os.utime(Path(self.host, style))
+            self.__update_cache_entries(style, [], [name for s, name in keys if s == style])
+
+        if verbose:
+            print(f'{len(keys)} records deleted from {self.host}')
+
+    def __update_cache_entries(self,
+                               style: str,
+                               newrecords: list,
+                               removenames: list):
+        """
+        Removes entries from and adds entries to an existing metadata cache.
+        newrecords are metadata dicts with file stats.  For the 'csv' and
+        'pickle' cacheformats the changes are appended to the change log.
+        """
+        # Apply the changes to a watched cache
+        with self.__watchlock:
+            if style in self.__watchcaches:
+                self.__watchcaches[style] = _fold_cache(self.__watchcaches[style],
+                                                        [(removenames, newrecords)])
+
+        if self.cacheformat == 'sqlite':
+            self.update_sqlite_cache(style, addnew=False)
+            with closing(self.sqlite_connect()) as con, con:
+                con.executemany(f'DELETE FROM {_sqlname(style)} WHERE name = ?',
+                                [(name,) for name in removenames])
+                self._sqlite_insert(con, style, newrecords)
+            return
+
+        # Caches that do not exist yet are built when first used
+        if not self.cachefile(style).is_file():
+            return
+
+        self.__append_cache_log(style, removenames, newrecords)
+
     def add_tar(self, 
                 record: Optional[Record] = None,
                 style: Optional[str] = None,
                 name: Optional[str] = None,
-                tar: Optional[bytes] = None,
+                tar: Union[bytes, BinaryIO, None] = None,
                 root_dir: Optional[Path] = None):
         """
         Archives and stores a folder associated with a record.
@@ -608,8 +2689,9 @@ class LocalDatabase(Database):
             The name to use in uniquely identifying the record.
         style : str, optional
             The style to use in uniquely identifying the record.
-        tar : bytes, optional
-            The bytes content of a tar file to save.  tar cannot be given
+        tar : bytes or file-like object, optional
+            The bytes content of a tar file to save, or a readable binary
+            file-like object to read the content from.  tar cannot be given
             with root_dir.
         root_dir : str, optional
             Specifies the root directory for finding the directory to archive.
@@ -635,14 +2717,13 @@ class LocalDatabase(Database):
             raise ValueError('kwargs style and name cannot be given with kwarg record')
 
         # Verify that record exists
-        style_dir = Path(self.host, record.style)
-        fname = Path(style_dir, f'{record.name}.{self.format}')
+        fname = self.record_path(record.style, record.name)
         if not fname.is_file():
             raise ValueError(f'No existing {record.style} record {record.name} found')
 
         # Build path to record
-        dir_path = Path(style_dir, record.name)
-        tar_path = Path(style_dir, f'{record.name}.tar.gz')
+        dir_path = self.folder_path(record.style, record.name)
+        tar_path = self.tar_path(record.style, record.name)
 
         # Check if an archive or folder already exists
         if tar_path.exists():
@@ -656,21 +2737,45 @@ class LocalDatabase(Database):
                 root_dir = '.'
             target = Path(root_dir, record.name)
 
-            tar = tarfile.open(tar_path, 'w:gz')
+            tar = tarfile.open(tar_path, 'w' if self.tarindex else 'w:gz')
             tar.add(target, target.name)
             tar.close()
 
         elif root_dir is None:
-            with open(tar_path, 'wb') as f:
-                f.write(tar)
+            if not hasattr(tar, 'read'):
+                tar = BytesIO(tar)
+
+            # Copy the content in chunks to a temporary file
+            tempname = Path(tar_path.parent, f'.{tar_path.name}.tmp')
+            try:
+                with open(tempname, 'wb') as f:
+                    shutil.copyfileobj(tar, f)
+
+                # Decompress archives that will be indexed
+                compression = _tar_compression(tempname) if self.tarindex else None
+                if compression is not None:
+                    with _open_file(tempname, compression) as src, open(tar_path, 'wb') as f:
+                        shutil.copyfileobj(src, f)
+                else:
+                    os.replace(tempname, tar_path)
+            finally:
+                tempname.unlink(missing_ok=True)
         else:
             raise ValueError('tar and root_dir cannot both be given')
 
+        # Index uncompressed archives
+        if self.tarindex:
+            with tarfile.open(tar_path, 'r:') as tar:
+                index = IndexedTarFile.build_index(tar, tar_path.stat().st_size)
+            with open(self.tar_files(record.style, record.name)[2], 'w', encoding='UTF-8') as f:
+                json.dump(index, f)
+
     def get_tar(self,
                 record: Optional[Record] = None,
                 style: Optional[str] = None,
                 name: Optional[str] = None,
-                raw: bool = False) -> Union[tarfile.TarFile, bytes]:
+                raw: bool = False,
+                stream: bool = False) -> Union[tarfile.TarFile, bytes, BinaryIO]:
         """
         Retrieves the tar archive associated with a record in the database.
         
@@ -685,12 +2790,17 @@ class LocalDatabase(Database):
         raw : bool, optional
             If True, return the archive as raw binary content. If 
             False, return as an open tarfile. (Default is False)
+        stream : bool, optional
+            If True, return the archive\'s raw binary content as a readable
+            file-like object so that it does not have to be loaded into
+            memory.  The caller is responsible for closing it.  Overrides
+            raw.  (Default is False)
         
         Returns
         -------
-        tarfile or bytes
-            The tar archive as an open tarfile if raw=False, or as a binary str if
-            raw=True.
+        tarfile, bytes or file-like object
+            The tar archive as an open tarfile if raw=False, as a binary str if
+            raw=True, or as a readable binary file-like object if stream=True.
         
         Raises
         ------
@@ -709,16 +2819,28 @@ class LocalDatabase(Database):
             raise ValueError('kwargs style and name cannot be given with kwarg record')
 
         # Build path to record
-        
+        tar_path = self.tar_path(record.style, record.name)
         if not tar_path.is_file():
             raise ValueError(f'No existing tar found for {record.style} record {record.name}')
 
         # Return content
-        if raw is True:
+        if stream is True:
+            return open(tar_path, 'rb')
+        elif raw is True:
             with open(tar_path, 'rb') as f:
                 return f.read()
         else:
-            tar = tarfile.open(tar_path)
+            # Open uncompressed archives with their indices
+            uncompressed, compressed, indexfile = self.tar_files(record.style, record.name)
+            if tar_path == uncompressed:
+                try:
+                    with open(indexfile, encoding='UTF-8') as f:
+                        index = json.load(f)
+                except FileNotFoundError:
+                    index = None
+                tar = IndexedTarFile.open(tar_path, 'r:', index=index)
+            else:
+                tar = tarfile.open(tar_path)
             if record is not None:
                 record.tar = tar
             return tar
@@ -757,18 +2879,15 @@ class LocalDatabase(Database):
         elif style is not None or name is not None:
             raise ValueError('kwargs style and name cannot be given with kwarg record')
 
-        # Build path to tar file
-        tar_path = Path(self.host, record.style, record.name+'.tar.gz')
-
-        # Delete record if it exists
-        if tar_path.is_file():
-            tar_path.unlink()
+        # Delete the tar archive and index if they exist
+        for tar_file in self.tar_files(record.style, record.name):
+            tar_file.unlink(missing_ok=True)
 
     def update_tar(self,
                    record: Optional[Record] = None,
                    style: Optional[str] = None,
                    name: Optional[str] = None,
-                   tar: Optional[bytes] = None,
+                   tar: Union[bytes, BinaryIO, None] = None,
                    root_dir: Optional[Path] = None):
         """
         Replaces an existing tar archive for a record with a new one.
@@ -783,8 +2902,9 @@ class LocalDatabase(Database):
             The name to use in uniquely identifying the record.
         style : str, optional
             The style to use in uniquely identifying the record.
-        tar : bytes, optional
-            The bytes content of a tar file to save.  tar cannot be given
+        tar : bytes or file-like object, optional
+            The bytes content of a tar file to save, or a readable binary
+            file-like object to read the content from.  tar cannot be given
             with root_dir.
         root_dir : str, optional
             Specifies the root directory for finding the directory to archive.
@@ -846,14 +2966,13 @@ class LocalDatabase(Database):
             raise ValueError('kwargs style and name cannot be given with kwarg record')
 
         # Verify that record exists
-        style_dir = Path(self.host, record.style)
-        fname = Path(style_dir, f'{record.name}.{self.format}')
+        fname = self.record_path(record.style, record.name)
         if not fname.is_file():
             raise ValueError(f'No existing {record.style} record {record.name} found')
 
         # Build database paths
-        dir_path = Path(style_dir, record.name)
-        tar_path = Path(style_dir, f'{record.name}.tar.gz')
+        dir_path = self.folder_path(record.style, record.name)
+        tar_path = self.tar_path(record.style, record.name)
 
         # Check if an archive or folder already exists
         if tar_path.exists():
@@ -918,7 +3037,7 @@ class LocalDatabase(Database):
             raise ValueError('kwargs style and name cannot be given with kwarg record')
 
         # Build path to folder
-        dir_path = Path(self.host, record.style, record.name)
+        dir_path = self.folder_path(record.style, record.name)
 
         # Return path
         if dir_path.exists():
@@ -961,7 +3080,7 @@ class LocalDatabase(Database):
             raise ValueError('kwargs style and name cannot be given with kwarg record')
 
         # Build path to tar file
-        dir_path = Path(self.host, record.style, record.name)
+        dir_path = self.folder_path(record.style, record.name)
 
         # Delete record if it exists
         if dir_path.exists():
@@ -1015,7 +3134,7 @@ class LocalDatabase(Database):
             raise ValueError('kwargs style and name cannot be given with kwarg record')
 
         # Build database paths
-        dir_path = Path(self.host, record.style, record.name)
+        dir_path = self.folder_path(record.style, record.name)
 
         # Delete existing folder
         if clear is True:
@@ -1036,21 +3155,128 @@ class LocalDatabase(Database):
                 shutil.copy2(filename, Path(dir_path, Path(filename).name))
 
 
+    @property
+    def nameindexfile(self) -> Path:
+        """pathlib.Path: The path to the host-wide index of record names and styles"""
+        return Path(self.host, 'names.sqlite')
+
+    def nameindex_connect(self) -> sqlite3.Connection:
+        """
+        Opens a connection to the name index file.  The index is built by
+        scanning all style directories if it does not exist yet.  Use the
+        connection in a with statement to commit changes.
+
+        Returns
+        -------
+        sqlite3.Connection
+            The open connection.
+        """
+        con = sqlite3.connect(self.nameindexfile, timeout=60)
+
+        # Check if the initial scan is done without locking the index
+        try:
+            scanned = con.execute("SELECT 1 FROM info WHERE key = 'scanned'").fetchone()
+        except sqlite3.OperationalError:
+            scanned = None
+        if scanned is not None:
+            return con
+
+        # Create and build the index in one locked transaction so that only
+        # one process does the initial scan
+        try:
+            with con:
+                con.execute('BEGIN IMMEDIATE')
+                con.execute('CREATE TABLE IF NOT EXISTS names '
+                            '(name TEXT, style TEXT, PRIMARY KEY (name, style))')
+                con.execute('CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)')
+                if con.execute("SELECT 1 FROM info WHERE key = 'scanned'").fetchone() is None:
+
+                    # Index the existing records
+                    suffix = self.suffix
+                    for styledir in Path(self.host).iterdir():
+                        if styledir.is_dir():
+                            con.executemany('INSERT OR IGNORE INTO names VALUES (?, ?)',
+                                            [(entry.name[:-len(suffix)], styledir.name)
+                                             for entry in self.iter_record_files(styledir.name)])
+                    con.execute("INSERT INTO info VALUES ('scanned', '1')")
+        except BaseException:
+            con.close()
+            raise
+        return con
+
+    def index_name(self,
+                   name: str,
+                   style: str,
+                   delete: bool = False):
+        """
+        Adds a record to or removes a record from the name index.
+
+        Parameters
+        ----------
+        name : str
+            The record name.
+        style : str
+            The record style.
+        delete : bool, optional
+            If True, the record is removed from the index.  Default value is
+            False.
+        """
+        self.index_names([(name, style)], delete=delete)
+
+    def index_names(self,
+                    entries: list,
+                    delete: bool = False):
+        """
+        Adds multiple records to or removes multiple records from the name
+        index in a single transaction.
+
+        Parameters
+        ----------
+        entries : list
+            The (name, style) pairs of the records.
+        delete : bool, optional
+            If True, the records are removed from the index.  Default value is
+            False.
+        """
+        with closing(self.nameindex_connect()) as con, con:
+            if delete:
+                con.executemany('DELETE FROM names WHERE name = ? AND style = ?', entries)
+            else:
+                con.executemany('INSERT OR IGNORE INTO names VALUES (?, ?)', entries)
+
     def find_record_style(self, name):
         """
-        Uses path globs to search for a record by name to identify its style.
+        Uses the name index to identify a record's style by name.  Records
+        that were not added through the database are searched for in all
+        style directories and then indexed.
 
         Parameters
         ----------
         name : str
             The record name to search for.
         """
-        # Glob search for record if style is unknown
-        paths = [path for path in Path(self.host).glob(f'*/{name}.{self.format}')]
-        if len(paths) == 0:
+        with closing(self.nameindex_connect()) as con, con:
+            styles = [row[0] for row in con.execute('SELECT style FROM names WHERE name = ?', (name,))]
+
+            # Verify that the indexed records still exist
+            found = [style for style in styles
+                     if self.record_path(style, name).is_file()]
+
+            # Search all styles for records missing from the index
+            if len(found) == 0:
+                found = [path.name for path in Path(self.host).iterdir()
+                         if path.is_dir() and self.record_path(path.name, name).is_file()]
+
+            # Update the index
+            if set(found) != set(styles):
+                con.execute('DELETE FROM names WHERE name = ?', (name,))
+                con.executemany('INSERT INTO names VALUES (?, ?)',
+                                [(name, style) for style in found])
+
+        if len(found) == 0:
             raise ValueError(f'no existing record {name} found')
-        elif len(paths) > 1:
+        elif len(found) > 1:
             raise ValueError(f'multiple existing records called {name} found: style must be specified!')
         
         # Return style field
-        return paths[0].parent.name
\ No newline at end of file
+        return found[0]
@@ -1,10 +1,13 @@
 # coding: utf-8
 # Standard Python libraries
 from pathlib import Path
-import shutil
 import tarfile
 from collections import OrderedDict
-from typing import Optional, Tuple, Union
+import datetime
+import functools
+import queue
+import threading
+from typing import Any, BinaryIO, Optional, Tuple, Union
 
 # http://www.numpy.org/
 import numpy as np
@@ -24,7 +27,88 @@ from DataModelDict import DataModelDict as DM
 # Relative imports
 from ..tools import aslist
 from . import Database
-from ..record import recordmanager, load_record, Record
+from .Database import _namesort
+from ..record import recordmanager, load_record, Record, RecordProxy
+
+# Key of the sub-documents that timedelta metadata values are stored as
+_timedeltakey = '__timedelta__'
+
+def _bson_metadata(value: Any) -> Any:
+    """
+    Converts metadata values to types that can be stored in BSON documents.
+    Arrays are saved as lists, dates as datetimes and timedeltas as
+    sub-documents holding the number of nanoseconds.
+
+    Raises
+    ------
+    TypeError
+        If a value cannot be stored in BSON.
+    """
+    if isinstance(value, dict):
+        for key in value:
+            if not isinstance(key, str):
+                raise TypeError(f'cannot store metadata key {key!r} in BSON')
+        return {key: _bson_metadata(val) for key, val in value.items()}
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_bson_metadata(val) for val in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        return {_timedeltakey: int(pd.Timedelta(value).value)}
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime.combine(value, datetime.time())
+    if isinstance(value, int) and not isinstance(value, bool) and not -2**63 <= value < 2**63:
+        raise TypeError(f'cannot store metadata value {value!r} in BSON')
+    if value is None or isinstance(value, (bool, int, float, str, bytes, datetime.datetime)):
+        return value
+    raise TypeError(f'cannot store metadata value {value!r} in BSON')
+
+def _restore_metadata(value: Any) -> Any:
+    """
+    Converts the datetimes and timedelta sub-documents of stored metadata
+    back to dates and pandas.Timedeltas.
+    """
+    if isinstance(value, dict):
+        if len(value) == 1 and _timedeltakey in value:
+            return pd.Timedelta(value[_timedeltakey])
+        return {key: _restore_metadata(val) for key, val in value.items()}
+    if isinstance(value, list):
+        return [_restore_metadata(val) for val in value]
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+def _entry_metadata(record: Record,
+                    model: Optional[DM] = None) -> Optional[dict]:
+    """
+    Returns the metadata of a record to store in its entry, or None if the
+    metadata cannot be stored in BSON.  If model is given, the metadata is
+    built from it rather than from the record's attributes so that it
+    matches the stored content.  Entries without stored metadata have it
+    built from their content when read.
+    """
+    if model is not None:
+        record = load_record(record.style, model=model, name=record.name)
+    try:
+        return _bson_metadata(record.metadata())
+    except (TypeError, ValueError):
+        return None
+
+# Projection that only retrieves the name and stored metadata of entries
+_metaprojection = {'_id': 0, 'name': 1, 'metadata': 1}
+
+@functools.lru_cache(maxsize=None)
+def _array_keys(style: str) -> tuple:
+    """Identifies the (parent, key) metadata paths of a style's array values"""
+    keys = []
+    for value in load_record(style).value_objects:
+        if value.metadatakey is not False and value.style in ('floatarray', 'intarray'):
+            keys.append((value.metadataparent, value.metadatakey))
+    return tuple(keys)
 
 class MongoDatabase(Database):
 
@@ -32,6 +116,7 @@ class MongoDatabase(Database):
                  host: str = 'localhost',
                  port: int = 27017,
                  database: str = 'iprPy',
+                 autoindex: bool = False,
                  **kwargs):
         """
         Initializes a connection to a Mongo database.
@@ -46,6 +131,10 @@ class MongoDatabase(Database):
         database : str, optional
             The name of the database in the mongo host to interact with.
             Default value is 'iprPy'
+        autoindex : bool, optional
+            If True, ensure_indexes is called for each record style the first
+            time that its collection is queried or added to.  Default value
+            is False.
         **kwargs : dict, optional
             Any extra keyword arguments needed to initialize a
             pymongo.MongoClient object.
@@ -53,6 +142,8 @@ class MongoDatabase(Database):
 
         # Connect to underlying class
         self.__mongodb = MongoClient(host=host, port=port, document_class=DM, **kwargs)[database]
+        self.__autoindex = autoindex
+        self.__indexedstyles = set()
 
         # Define class host using client's host, port and database name
         host = f'{host}:{port}.{database}'
@@ -70,10 +161,21 @@ class MongoDatabase(Database):
         """pymongo.database.Database : The underlying database API object."""
         return self.__mongodb
 
+    @property
+    def autoindex(self) -> bool:
+        """bool: Indicates if indexes are ensured on the first use of each style"""
+        return self.__autoindex
+
     def get_records(self,
                     style: Optional[str] = None,
                     return_df: bool = False,
                     query: Optional[dict] = None,
+                    lazy: bool = False,
+                    sort: Union[str, list, None] = _namesort,
+                    ascending: bool = True,
+                    skip: int = 0,
+                    limit: Optional[int] = None,
+                    batchsize: int = 100,
                     **kwargs) -> Union[list, Tuple[list, pd.DataFrame]]:
         """
         Produces a list of all matching records in the database.
@@ -88,6 +190,31 @@ class MongoDatabase(Database):
         query : dict, optional
             A custom-built Mongo-style query to use for the record search.
             Alternative to passing in the record-specific metadata kwargs.
+        lazy : bool, optional
+            If True, then RecordProxy objects are returned that are backed by
+            the entries' stored metadata.  The content of a record is only
+            retrieved and parsed when an attribute that is not in the metadata
+            is accessed.  This has no effect if return_df is True.  Default
+            value is False.
+        sort : str, list or None, optional
+            The metadata key(s) to sort the records by on the server.  By
+            default, records are sorted by name, or kept in the order of the
+            names if a name search parameter is given.  Sorts without a
+            matching index (see ensure_indexes) may use temporary files on
+            the server.  If None, then the records are returned in the
+            collection's order.
+        ascending : bool, optional
+            Indicates if the sort is in ascending (True, default) or
+            descending (False) order.
+        skip : int, optional
+            The number of matching records to skip.  Default value is 0.
+        limit : int, optional
+            The maximum number of records to return.  If None (default), then
+            all matching records after skip are returned.
+        batchsize : int, optional
+            The number of entries to retrieve from the server in each batch.
+            The next batch is retrieved while the records of the current
+            batch are built.  Default value is 100.
         **kwargs : any, optional
             Any of the record-specific metadata keywords that can be searched
             for.
@@ -104,19 +231,32 @@ class MongoDatabase(Database):
         if style is None:
             style = self.select_record_style()
 
-        # Use given query
-        if query is not None:
-            assert len(kwargs) == 0, 'query cannot be given with kwargs'
-        else:
-            query = load_record(style).mongoquery(**kwargs)
+        # Only retrieve the stored metadata for record proxies
+        lazy = lazy and not return_df
+        projection = _metaprojection if lazy else None
+
+        # Sort, skip and limit on the server
+        batches = self.__find_batches(style, query, kwargs, projection=projection,
+                                      sort=sort, ascending=ascending, skip=skip,
+                                      limit=limit, batchsize=batchsize)
+
+        # Query the collection to construct record proxies
+        if lazy:
+            records = []
+            for batch in batches:
+                for entry, meta in zip(batch, self.__entries_metadata(style, batch)):
+                    meta.setdefault('name', entry['name'])
+                    loader = functools.partial(self.__load_entry, style, entry['name'])
+                    records.append(RecordProxy(style, meta, loader, database=self))
+            return np.array(records)
 
         # Query the collection to construct records
         records = []
-        collection = self.mongodb[style]
-        for entry in collection.find(query):
-            record = load_record(style, model=entry['content'],
-                                 name=entry['name'], database=self)
-            records.append(record)
+        for batch in batches:
+            for entry in batch:
+                record = load_record(style, model=entry['content'],
+                                     name=entry['name'], database=self)
+                records.append(record)
         records = np.array(records)
 
         # Build df
@@ -129,10 +269,6 @@ class MongoDatabase(Database):
             r = load_record(style)
             df = pd.DataFrame(columns=r.metadatakeys)
 
-        # Sort by name
-        df = df.sort_values('name')
-        records = records[df.index.tolist()]
-
         # Return records (and df)
         if return_df:
             return records, df.reset_index(drop=True)
@@ -142,9 +278,16 @@ class MongoDatabase(Database):
     def get_records_df(self,
                        style: Optional[str] = None,
                        query: Optional[dict] = None,
+                       sort: Union[str, list, None] = _namesort,
+                       ascending: bool = True,
+                       skip: int = 0,
+                       limit: Optional[int] = None,
+                       batchsize: int = 100,
                        **kwargs) -> pd.DataFrame:
         """
         Produces a pandas.Dataframe of all matching records in the database.
+        Only the stored metadata of the entries is retrieved, so Records are
+        only built for entries added before metadata was stored with them.
         
         Parameters
         ----------
@@ -153,6 +296,25 @@ class MongoDatabase(Database):
         query : dict, optional
             A custom-built Mongo-style query to use for the record search.
             Alternative to passing in the record-specific metadata keywords.
+        sort : str, list or None, optional
+            The metadata key(s) to sort the records by on the server.  By
+            default, records are sorted by name, or kept in the order of the
+            names if a name search parameter is given.  Sorts without a
+            matching index (see ensure_indexes) may use temporary files on
+            the server.  If None, then the records are returned in the
+            collection's order.
+        ascending : bool, optional
+            Indicates if the sort is in ascending (True, default) or
+            descending (False) order.
+        skip : int, optional
+            The number of matching records to skip.  Default value is 0.
+        limit : int, optional
+            The maximum number of records to return.  If None (default), then
+            all matching records after skip are returned.
+        batchsize : int, optional
+            The number of entries to retrieve from the server in each batch.
+            The next batch is retrieved while the metadata of the current
+            batch is processed.  Default value is 100.
         **kwargs : any, optional
             Any of the record-specific metadata keywords that can be searched
             for.
@@ -162,7 +324,271 @@ class MongoDatabase(Database):
         records_df : pandas.DataFrame
             The corresponding metadata values for the records.
         """
-        return self.get_records(style, query=query, return_df=True, **kwargs)[1]
+        # Set default search parameters
+        if style is None:
+            style = self.select_record_style()
+
+        # Retrieve only the stored metadata
+        metas = []
+        for batch in self.__find_batches(style, query, kwargs, projection=_metaprojection,
+                                         sort=sort, ascending=ascending, skip=skip,
+                                         limit=limit, batchsize=batchsize):
+            metas.extend(self.__entries_metadata(style, batch))
+
+        # Build df
+        if len(metas) > 0:
+            return pd.DataFrame(metas)
+        else:
+            return pd.DataFrame(columns=load_record(style).metadatakeys)
+
+    def __find(self,
+               style: str,
+               query: Optional[dict],
+               kwargs: dict,
+               projection: Optional[dict] = None,
+               sort: Union[str, list, None] = None,
+               ascending: bool = True,
+               skip: int = 0,
+               limit: Optional[int] = None) -> pymongo.cursor.Cursor:
+        """
+        Builds a cursor for the entries of a style matching a query or the
+        record-specific metadata kwargs.
+        """
+        # Use given query
+        if query is not None:
+            assert len(kwargs) == 0, 'query cannot be given with kwargs'
+        else:
+            query = load_record(style).mongoquery(**kwargs)
+
+        # Sort, skip and limit on the server.  Sorts that cannot use an
+        # index may exceed the server's in-memory sort limit, so they are
+        # allowed to use temporary files.
+        cursor = self.__collection(style).find(query, projection)
+        if sort is not None:
+            cursor = cursor.sort(load_record(style).mongosort(sort, ascending))
+            cursor = cursor.allow_disk_use(True)
+        cursor = cursor.skip(skip)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+
+        return cursor
+
+    def __find_batches(self,
+                       style: str,
+                       query: Optional[dict],
+                       kwargs: dict,
+                       projection: Optional[dict],
+                       sort: Union[str, list, None],
+                       ascending: bool,
+                       skip: int,
+                       limit: Optional[int],
+                       batchsize: int):
+        """
+        Yields batches of the matching entries.  If names are searched for
+        without giving sort, all matching entries are retrieved and put in
+        the order of the names before skip and limit are applied.
+        """
+        names = kwargs.get('name')
+        if sort is not _namesort or names is None:
+            cursor = self.__find(style, query, kwargs, projection=projection, sort=sort,
+                                 ascending=ascending, skip=skip, limit=limit)
+            yield from self.__prefetch(cursor, batchsize)
+            return
+
+        cursor = self.__find(style, query, kwargs, projection=projection)
+        entries = []
+        for batch in self.__prefetch(cursor, batchsize):
+            entries.extend(batch)
+        order = {name: i for i, name in enumerate(dict.fromkeys(aslist(names)))}
+        entries.sort(key=lambda entry: order.get(entry['name'], len(order)))
+        stop = None if limit is None else skip + limit
+        yield from self.__batches(entries[skip:stop], batchsize)
+
+    def __prefetch(self,
+                   cursor: pymongo.cursor.Cursor,
+                   batchsize: int):
+        """
+        Yields lists of batchsize entries from a cursor.  The next batch is
+        retrieved by a background thread while the current batch is used.
+        """
+        if batchsize < 1:
+            raise ValueError('batchsize must be a positive integer')
+        cursor = cursor.batch_size(batchsize)
+        batches = queue.Queue(maxsize=1)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            """Waits to queue an item until it is used or iteration stops"""
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def fetch():
+            """Retrieves the batches, ending with None or the raised error"""
+            try:
+                batch = []
+                for entry in cursor:
+                    batch.append(entry)
+                    if len(batch) == batchsize:
+                        if not put(batch):
+                            return
+                        batch = []
+                if len(batch) > 0 and not put(batch):
+                    return
+                put(None)
+            except Exception as err:
+                put(err)
+
+        thread = threading.Thread(target=fetch, daemon=True)
+        thread.start()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            stop.set()
+            thread.join()
+            cursor.close()
+
+    def __load_entry(self,
+                     style: str,
+                     name: str) -> Record:
+        """
+        Retrieves an entry's content and builds its Record.  Used as the
+        loader of record proxies.
+        """
+        entry = self.mongodb[style].find_one({'name': name}, {'content': 1})
+        if entry is None:
+            raise ValueError('No matching records found')
+        return load_record(style, model=entry['content'], name=name, database=self)
+
+    def __load_metadata(self,
+                        style: str,
+                        meta: dict) -> dict:
+        """
+        Restores the dates and arrays of metadata retrieved from an entry.
+        """
+        meta = _restore_metadata(meta)
+        for parent, key in _array_keys(style):
+            values = meta if parent is None else meta.get(parent, {})
+            if values.get(key) is not None:
+                values[key] = np.array(values[key])
+        return meta
+
+    def __entries_metadata(self,
+                           style: str,
+                           entries: list) -> list:
+        """
+        Returns the metadata of entries retrieved with the metadata
+        projection.  Metadata for entries saved without it is built from the
+        entries' content.
+        """
+        metas = []
+        missing = {}
+        for entry in entries:
+            if 'metadata' in entry:
+                metas.append(self.__load_metadata(style, entry['metadata']))
+            else:
+                missing[entry['name']] = len(metas)
+                metas.append(None)
+
+        # Load the content of entries without stored metadata
+        if len(missing) > 0:
+            cursor = self.mongodb[style].find({'name': {'$in': list(missing)}},
+                                              {'_id': 0, 'name': 1, 'content': 1})
+            for entry in cursor:
+                record = load_record(style, model=entry['content'], name=entry['name'])
+                metas[missing[entry['name']]] = record.metadata()
+
+        return metas
+
+    def iter_records(self,
+                     style: Optional[str] = None,
+                     chunksize: int = 100,
+                     query: Optional[dict] = None,
+                     **kwargs):
+        """
+        Iterates over all matching records in the database.  The entries are
+        retrieved from the collection in batches of chunksize and are yielded
+        in the order returned by the collection rather than sorted by name.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search.  If not given, a prompt will ask for it.
+        chunksize : int, optional
+            The number of entries to retrieve from the server in each batch.
+            Default value is 100.
+        query : dict, optional
+            A custom-built Mongo-style query to use for the record search.
+            Alternative to passing in the record-specific metadata kwargs.
+        **kwargs : any, optional
+            Any of the record-specific metadata keywords that can be searched
+            for.
+
+        Yields
+        ------
+        Record
+            Each record from the database matching the given parameters.
+        """
+        # Set default search parameters
+        if style is None:
+            style = self.select_record_style()
+
+        # Iterate over the cursor
+        cursor = self.__find(style, query, kwargs)
+        for entry in cursor.batch_size(chunksize):
+            yield load_record(style, model=entry['content'],
+                              name=entry['name'], database=self)
+
+    def iter_records_df(self,
+                        style: Optional[str] = None,
+                        chunksize: int = 100,
+                        query: Optional[dict] = None,
+                        **kwargs):
+        """
+        Iterates over the metadata of all matching records in the database
+        in chunks.  Only the stored metadata of the entries is retrieved.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search.  If not given, a prompt will ask for it.
+        chunksize : int, optional
+            The maximum number of records in each chunk.  Default value is 100.
+        query : dict, optional
+            A custom-built Mongo-style query to use for the record search.
+            Alternative to passing in the record-specific metadata kwargs.
+        **kwargs : any, optional
+            Any of the record-specific metadata keywords that can be searched
+            for.
+
+        Yields
+        ------
+        pandas.DataFrame
+            The metadata for a chunk of the matching records.
+        """
+        # Set default search parameters
+        if style is None:
+            style = self.select_record_style()
+
+        cursor = self.__find(style, query, kwargs, projection=_metaprojection)
+        chunk = []
+        for entry in cursor.batch_size(chunksize):
+            chunk.append(entry)
+            if len(chunk) == chunksize:
+                yield pd.DataFrame(self.__entries_metadata(style, chunk))
+                chunk = []
+        if len(chunk) > 0:
+            yield pd.DataFrame(self.__entries_metadata(style, chunk))
 
     def get_record(self,
                    style: Optional[str] = None,
@@ -247,11 +673,116 @@ class MongoDatabase(Database):
             query = load_record(style).mongoquery(**kwargs)
 
         # Query the collection to construct records
-        collection = self.mongodb[style]
+        collection = self.__collection(style)
         count = collection.count_documents(query)
 
         return count
 
+    def aggregate_metadata(self,
+                           style: Optional[str] = None,
+                           groupby: Union[str, list, None] = None,
+                           count: bool = True,
+                           min: Union[str, list, None] = None,
+                           max: Union[str, list, None] = None,
+                           mean: Union[str, list, None] = None,
+                           query: Optional[dict] = None,
+                           **kwargs) -> pd.DataFrame:
+        """
+        Computes summary values of the metadata of matching records, grouped
+        by metadata keys.  The values are computed on the server with a
+        $match and $group aggregation pipeline over the entries' stored
+        metadata.  The pipeline also counts matching entries saved without
+        metadata, and if there are any the values are computed from
+        get_records_df instead.
+        
+        Parameters
+        ----------
+        style : str, optional
+            The record style to search.  If not given, a prompt will ask for it.
+        groupby : str or list, optional
+            The metadata key(s) to group the records by.  If not given, the
+            values are computed for all matching records.
+        count : bool, optional
+            If True (default), the number of records in each group is
+            included as column 'count'.
+        min : str or list, optional
+            Metadata key(s) to find the minimum values of.  Included as
+            columns '<key>_min'.
+        max : str or list, optional
+            Metadata key(s) to find the maximum values of.  Included as
+            columns '<key>_max'.
+        mean : str or list, optional
+            Metadata key(s) to find the mean values of.  Included as columns
+            '<key>_mean'.  Only int and float values are averaged: other
+            values are ignored, and groups without any give NaN.
+        query : dict, optional
+            A custom-built Mongo-style query to use for the record search.
+            Alternative to passing in the record-specific metadata kwargs.
+        **kwargs : any, optional
+            Any of the record-specific metadata keywords that can be searched
+            for.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row for each group, sorted by the groupby keys.
+        
+        Raises
+        ------
+        ValueError
+            If a key is not a metadata key of the record style.
+        """
+        # Set default search parameters
+        if style is None:
+            style = self.select_record_style()
+        groupby, aggregations = self._aggregate_spec(style, groupby, count,
+                                                     min, max, mean)
+        columns = groupby + [column for column, key, func in aggregations]
+
+        # Use given query
+        if query is not None:
+            assert len(kwargs) == 0, 'query cannot be given with kwargs'
+        else:
+            query = load_record(style).mongoquery(**kwargs)
+        collection = self.__collection(style)
+
+        # Build the pipeline
+        group = {}
+        if len(groupby) > 0:
+            group['_id'] = {key: f'$metadata.{key}' for key in groupby}
+        else:
+            group['_id'] = None
+        operators = {'count': '$sum', 'min': '$min', 'max': '$max', 'mean': '$avg'}
+        for column, key, func in aggregations:
+            group[column] = {'$sum': 1} if func == 'count' else {operators[func]: f'$metadata.{key}'}
+
+        # Count the entries without stored metadata in the same pass
+        group['_nometadata'] = {'$sum': {'$cond': [{'$eq': [{'$type': '$metadata'}, 'missing']}, 1, 0]}}
+        pipeline = [{'$match': query}, {'$group': group}]
+        if len(groupby) > 0:
+            pipeline.append({'$sort': OrderedDict((f'_id.{key}', 1) for key in groupby)})
+        results = list(collection.aggregate(pipeline))
+
+        # Compute client-side if any matching entries lack stored metadata
+        if any(result['_nometadata'] > 0 for result in results):
+            return super().aggregate_metadata(style, groupby=groupby, count=count,
+                                              min=min, max=max, mean=mean,
+                                              query=query)
+
+        # Build df
+        rows = []
+        for result in results:
+            row = {}
+            for key in groupby:
+                row[key] = result['_id'].get(key)
+            for column, key, func in aggregations:
+                row[column] = result.get(column)
+                if func == 'mean' and row[column] is None:
+                    row[column] = float('nan')
+            rows.append(_restore_metadata(row))
+
+        return pd.DataFrame(rows, columns=columns)
+
     def add_record(self,
                    record: Optional[Record] = None,
                    style: Optional[str] = None,
@@ -306,7 +837,8 @@ class MongoDatabase(Database):
             raise ValueError('kwargs style, name, and content cannot be given with kwarg record')
 
         # Verify that there isn't already a record with a matching name
-        if len(self.get_records(name=record.name, style=record.style)) > 0:
+        collection = self.__collection(record.style)
+        if collection.find_one({'name': record.name}, {'_id': 1}) is not None:
             raise ValueError(f'Record {record.name} already exists')
 
         # Retrieve/build model contents
@@ -315,14 +847,20 @@ class MongoDatabase(Database):
             model = record.model
         except:
             model = record.build_model()
+            metadata = _entry_metadata(record)
+        else:
+            # Attributes may have changed since the model was loaded
+            metadata = _entry_metadata(record, model)
 
         # Create meta mongo entry
         entry = OrderedDict()
         entry['name'] = record.name
         entry['content'] = model
+        if metadata is not None:
+            entry['metadata'] = metadata
 
         # Upload to mongodb
-        self.mongodb[record.style].insert_one(entry)
+        collection.insert_one(entry)
 
         if verbose:
             print(f'{record} added to {self.host}')
@@ -391,15 +929,13 @@ class MongoDatabase(Database):
             oldrecord = record
             record = load_record(oldrecord.style, model=model, name=oldrecord.name)
 
-        # Find oldrecord matching record
-        else:
-            oldrecord = self.get_record(name=record.name, style=record.style)
-
-        # Delete oldrecord
-        self.delete_record(record=oldrecord)
+        # Create meta mongo entry
+        entry = self.__build_entries([record], build)[record.style][0]
 
-        # Add new record
-        self.add_record(record=record, build=build)
+        # Replace the existing entry
+        result = self.__collection(record.style).replace_one({'name': record.name}, entry)
+        if result.matched_count == 0:
+            raise ValueError('No matching records found')
 
         if verbose:
             print(f'{record} updated in {self.host}')
@@ -455,11 +991,494 @@ class MongoDatabase(Database):
         if verbose:
             print(f'{record} deleted from {self.host}')
 
+    def add_records(self,
+                    records: list,
+                    build: bool = False,
+                    ordered: bool = False,
+                    batchsize: int = 1000,
+                    verbose: bool = False) -> list:
+        """
+        Adds multiple new records to the database using one insert_many
+        operation per batch of each record style.
+        
+        Parameters
+        ----------
+        records : list
+            The new records to add to the database.
+        build : bool, optional
+            If True, then the uploaded content will be (re)built based on the
+            records' attributes.  If False (default), then records' existing
+            content will be loaded if it exists, or built if it doesn't exist.
+        ordered : bool, optional
+            If True, each batch is inserted in order and stops at the first
+            failed insert.  If False (default), the server may insert the
+            entries of a batch in any order and continues after failures.
+        batchsize : int, optional
+            The maximum number of entries to check and insert with each
+            operation.  Default value is 1000.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+
+        Returns
+        ------
+        list
+            The added records.
+        
+        Raises
+        ------
+        ValueError
+            If any of the records already exist or are given multiple times.
+            No records are added in this case.
+        """
+        records = aslist(records)
+        entries = self.__build_entries(records, build)
+
+        # Verify that there aren't already records with matching names
+        for style, styleentries in entries.items():
+            collection = self.__collection(style)
+            for batch in self.__batches(styleentries, batchsize):
+                names = [entry['name'] for entry in batch]
+                existing = collection.find_one({'name': {'$in': names}}, {'name': 1})
+                if existing is not None:
+                    raise ValueError(f"Record {existing['name']} already exists")
+
+        # Upload to mongodb
+        for style, styleentries in entries.items():
+            collection = self.mongodb[style]
+            for batch in self.__batches(styleentries, batchsize):
+                collection.insert_many(batch, ordered=ordered)
+
+        if verbose:
+            print(f'{len(records)} records added to {self.host}')
+
+        return records
+
+    def update_records(self,
+                       records: list,
+                       build: bool = False,
+                       upsert: bool = False,
+                       ordered: bool = False,
+                       batchsize: int = 1000,
+                       verbose: bool = False) -> list:
+        """
+        Replaces multiple existing records with new content using one
+        bulk_write operation per batch of each record style.
+        
+        Parameters
+        ----------
+        records : list
+            The records with new content to update in the database.
+        build : bool, optional
+            If True, then the uploaded content will be (re)built based on the
+            records' attributes.  If False (default), then records' existing
+            content will be loaded if it exists, or built if it doesn't exist.
+        upsert : bool, optional
+            If True, records that do not exist are added instead of raising
+            an error, and no existence checks are performed.  Default value
+            is False.
+        ordered : bool, optional
+            If True, the operations of each batch are performed in order and
+            stop at the first failure.  If False (default), the server may
+            perform them in any order and continues after failures.
+        batchsize : int, optional
+            The maximum number of entries to check and replace with each
+            operation.  Default value is 1000.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+
+        Returns
+        ------
+        list
+            The updated records.
+        
+        Raises
+        ------
+        ValueError
+            If any of the records are given multiple times, or do not exist
+            and upsert is False.  No records are updated in this case.
+        """
+        records = aslist(records)
+        entries = self.__build_entries(records, build)
+
+        # Verify that the records exist
+        if not upsert:
+            for style, styleentries in entries.items():
+                collection = self.__collection(style)
+                for batch in self.__batches(styleentries, batchsize):
+                    names = [entry['name'] for entry in batch]
+                    existing = collection.distinct('name', {'name': {'$in': names}})
+                    missing = set(names).difference(existing)
+                    if len(missing) > 0:
+                        raise ValueError(f'No existing {style} record {sorted(missing)[0]} found')
+
+        # Replace the entries
+        for style, styleentries in entries.items():
+            collection = self.__collection(style)
+            for batch in self.__batches(styleentries, batchsize):
+                operations = [pymongo.ReplaceOne({'name': entry['name']}, entry, upsert=upsert)
+                              for entry in batch]
+                collection.bulk_write(operations, ordered=ordered)
+
+        if verbose:
+            print(f'{len(records)} records updated in {self.host}')
+
+        return records
+
+    @staticmethod
+    def __batches(entries: list,
+                  batchsize: int):
+        """Yields successive batches of entries"""
+        if batchsize < 1:
+            raise ValueError('batchsize must be a positive integer')
+        for i in range(0, len(entries), batchsize):
+            yield entries[i:i + batchsize]
+
+    def __build_entries(self,
+                        records: list,
+                        build: bool) -> dict:
+        """
+        Builds the database entries for records, grouped by record style.
+        """
+        entries = {}
+        keys = set()
+        for record in records:
+            key = (record.style, record.name)
+            if key in keys:
+                raise ValueError('records contain duplicate names')
+            keys.add(key)
+
+            # Retrieve/build model contents
+            try:
+                assert build is False
+                model = record.model
+            except:
+                model = record.build_model()
+                metadata = _entry_metadata(record)
+            else:
+                # Attributes may have changed since the model was loaded
+                metadata = _entry_metadata(record, model)
+
+            # Create meta mongo entry
+            entry = OrderedDict()
+            entry['name'] = record.name
+            entry['content'] = model
+            if metadata is not None:
+                entry['metadata'] = metadata
+            entries.setdefault(record.style, []).append(entry)
+
+        return entries
+
+    def delete_records(self,
+                       records: Optional[list] = None,
+                       style: Optional[str] = None,
+                       names: Optional[list] = None,
+                       verbose: bool = False):
+        """
+        Permanently deletes multiple records from the database using one
+        delete_many operation per record style.
+        
+        Parameters
+        ----------
+        records : list, optional
+            The records to delete from the database.  If not given, names
+            (and style) are needed to identify the records to delete.
+        style : str, optional
+            The style of the records to delete.  If not given with names, the
+            style of each record is found by searching the collections of all
+            loaded record styles.
+        names : list, optional
+            The names of the records to delete.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+        
+        Raises
+        ------
+        ValueError
+            If style and/or names given with records, any of the records do
+            not exist, or a name matches records of multiple styles.  No
+            records are deleted in this case.
+        """
+        # Group names by style
+        if records is not None:
+            if style is not None or names is not None:
+                raise ValueError('kwargs style and names cannot be given with kwarg records')
+            stylenames = {}
+            for record in aslist(records):
+                stylenames.setdefault(record.style, []).append(record.name)
+        elif style is not None:
+            stylenames = {style: aslist(names)}
+        else:
+            stylenames = self.__find_styles(aslist(names))
+
+        # Check that the records exist
+        for style, names in stylenames.items():
+            existing = set(self.mongodb[style].distinct('name', {'name': {'$in': names}}))
+            missing = [name for name in names if name not in existing]
+            if len(missing) > 0:
+                raise ValueError(f'No existing {style} records found: {", ".join(missing)}')
+
+        # Delete records
+        count = 0
+        for style, names in stylenames.items():
+            count += self.mongodb[style].delete_many({'name': {'$in': names}}).deleted_count
+
+        if verbose:
+            print(f'{count} records deleted from {self.host}')
+
+    def __find_styles(self,
+                      names: list) -> dict:
+        """
+        Groups record names by style by searching the collections of all
+        loaded record styles.
+        """
+        found = {}
+        for style in self.__styles(None):
+            for name in self.mongodb[style].distinct('name', {'name': {'$in': names}}):
+                found.setdefault(name, []).append(style)
+
+        # Check that each name matches one record
+        missing = [name for name in names if name not in found]
+        if len(missing) > 0:
+            raise ValueError(f'No existing records found: {", ".join(missing)}')
+        for name, styles in found.items():
+            if len(styles) > 1:
+                raise ValueError(f'multiple existing records called {name} found: style must be specified!')
+
+        stylenames = {}
+        for name in names:
+            stylenames.setdefault(found[name][0], []).append(name)
+        return stylenames
+
+    def migrate_metadata(self,
+                         style: Union[str, list, None] = None,
+                         refresh: bool = False,
+                         chunksize: int = 100,
+                         verbose: bool = False) -> int:
+        """
+        Adds the stored metadata used by get_records_df and iter_records_df
+        to entries that were saved without it.  Entries whose metadata
+        cannot be stored in BSON are left without it.
+        
+        Parameters
+        ----------
+        style : str or list, optional
+            The record style(s) to migrate.  If not given, all collections
+            of loaded record styles are migrated.
+        refresh : bool, optional
+            If True, the metadata of all entries is rebuilt.  If False
+            (default), only entries without stored metadata are updated.
+        chunksize : int, optional
+            The number of entries to update with each bulk_write operation.
+            Default value is 100.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+
+        Returns
+        -------
+        int
+            The number of entries updated.
+        """
+        count = 0
+        for style in self.__styles(style):
+            collection = self.mongodb[style]
+            query = {} if refresh else {'metadata': {'$exists': False}}
+            cursor = collection.find(query, {'name': 1, 'content': 1})
+
+            # Build the metadata from the content and update in chunks
+            operations = []
+            for entry in cursor.batch_size(chunksize):
+                record = load_record(style, model=entry['content'], name=entry['name'])
+                metadata = _entry_metadata(record)
+                if metadata is not None:
+                    update = {'$set': {'metadata': metadata}}
+                elif refresh:
+                    update = {'$unset': {'metadata': ''}}
+                else:
+                    continue
+                operations.append(pymongo.UpdateOne({'_id': entry['_id']}, update))
+                if len(operations) == chunksize:
+                    count += collection.bulk_write(operations, ordered=False).modified_count
+                    operations = []
+            if len(operations) > 0:
+                count += collection.bulk_write(operations, ordered=False).modified_count
+
+        if verbose:
+            print(f'metadata added to {count} entries in {self.host}')
+
+        return count
+
+    def __styles(self,
+                 style: Union[str, list, None]) -> list:
+        """
+        Returns the given record style(s) as a list, or the loaded record
+        styles that have collections in the database if style is None.
+        """
+        if style is None:
+            collections = self.mongodb.list_collection_names()
+            return [style for style in recordmanager.loaded_style_names
+                    if style in collections]
+        return aslist(style)
+
+    def __collection(self,
+                     style: str) -> pymongo.collection.Collection:
+        """
+        Returns the collection of a record style, ensuring its indexes on
+        first use if autoindex is True.
+        """
+        if self.autoindex and style not in self.__indexedstyles:
+            self.ensure_indexes(style)
+        return self.mongodb[style]
+
+    def index_keys(self,
+                   style: str) -> list:
+        """
+        Lists the fields that the record style's queries search on.
+        
+        Parameters
+        ----------
+        style : str
+            The record style.
+
+        Returns
+        -------
+        list
+            The entry field paths to index, starting with 'name'.
+        """
+        keys = ['name']
+        for query in load_record(style).queries.values():
+            if query.style == 'dummy':
+                continue
+            key = f'content.{query.path}'
+            if key not in keys:
+                keys.append(key)
+        return keys
+
+    def ensure_indexes(self,
+                       style: Union[str, list, None] = None,
+                       verbose: bool = False) -> list:
+        """
+        Creates the indexes for the fields searched by the record styles'
+        queries: a unique index on name and a single-field index on the path
+        of each query.  Indexes on fields holding arrays are created by Mongo
+        as multikey indexes.  Existing indexes are left unchanged.  If a
+        collection already holds records with duplicate names, a non-unique
+        name index is created instead and reported by index_report.
+        
+        Parameters
+        ----------
+        style : str or list, optional
+            The record style(s) to index.  If not given, all collections of
+            loaded record styles are indexed.
+        verbose : bool, optional
+            If True, info messages will be printed during operations.  Default
+            value is False.
+
+        Returns
+        -------
+        list
+            The names of the ensured indexes.
+        """
+        names = []
+        for style in self.__styles(style):
+            collection = self.mongodb[style]
+
+            # Fall back to a non-unique name index if names are duplicated
+            try:
+                names.append(collection.create_index([('name', pymongo.ASCENDING)],
+                                                     unique=True))
+            except pymongo.errors.DuplicateKeyError:
+                names.append(collection.create_index([('name', pymongo.ASCENDING)]))
+                if verbose:
+                    print(f'{style} in {self.host} has duplicate names: name index is not unique')
+            except pymongo.errors.OperationFailure as err:
+                # Keep an existing name index that has different options
+                if err.code not in (85, 86):
+                    raise
+                names.append('name_1')
+
+            indexes = []
+            for key in self.index_keys(style)[1:]:
+                indexes.append(pymongo.IndexModel([(key, pymongo.ASCENDING)]))
+            if len(indexes) > 0:
+                names.extend(collection.create_indexes(indexes))
+            self.__indexedstyles.add(style)
+
+            if verbose:
+                print(f'{len(indexes) + 1} indexes ensured for {style} in {self.host}')
+
+        return names
+
+    def index_report(self,
+                     style: Union[str, list, None] = None) -> pd.DataFrame:
+        """
+        Compares the indexes of record style collections to the indexes that
+        ensure_indexes would create, and reports how often existing indexes
+        have been used since the server started.
+        
+        Parameters
+        ----------
+        style : str or list, optional
+            The record style(s) to report on.  If not given, all collections
+            of loaded record styles are reported.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per expected or existing index with columns style, index,
+            key, expected, unique, ops and status.  The status is 'missing'
+            for expected indexes that do not exist, 'nonunique' for a name
+            index that is not unique, 'unused' for other existing indexes
+            without any accesses, and 'used' otherwise.
+        """
+        rows = []
+        for style in self.__styles(style):
+            collection = self.mongodb[style]
+            expected = self.index_keys(style)
+
+            # Get the usage counts of the existing indexes
+            ops = {}
+            for stats in collection.aggregate([{'$indexStats': {}}]):
+                ops[stats['name']] = stats['accesses']['ops']
+
+            # Report on the existing indexes
+            found = set()
+            for name, info in collection.index_information().items():
+                if name == '_id_':
+                    continue
+                fields = [field for field, direction in info['key']]
+                key = ', '.join(fields)
+                isexpected = len(fields) == 1 and key in expected
+                if isexpected:
+                    found.add(key)
+                count = ops.get(name, 0)
+                unique = info.get('unique', False)
+                if key == 'name' and not unique:
+                    status = 'nonunique'
+                else:
+                    status = 'used' if count > 0 else 'unused'
+                rows.append({'style': style, 'index': name, 'key': key,
+                             'expected': isexpected, 'unique': unique,
+                             'ops': count, 'status': status})
+
+            # Report on the missing indexes
+            for key in expected:
+                if key not in found:
+                    rows.append({'style': style, 'index': None, 'key': key,
+                                 'expected': True, 'unique': None, 'ops': None,
+                                 'status': 'missing'})
+
+        return pd.DataFrame(rows, columns=['style', 'index', 'key', 'expected',
+                                           'unique', 'ops', 'status'])
+
     def add_tar(self, 
                 record: Optional[Record] = None,
                 style: Optional[str] = None,
                 name: Optional[str] = None,
-                tar: Optional[bytes] = None,
+                tar: Union[bytes, BinaryIO, None] = None,
                 root_dir: Optional[Path] = None):
         """
         Archives and stores a folder associated with a record.
@@ -474,8 +1493,9 @@ class MongoDatabase(Database):
             .The name to use in uniquely identifying the record.
         style : str, optional
             .The style to use in uniquely identifying the record.
-        tar : bytes, optional
-            The bytes content of a tar file to save.  tar cannot be given
+        tar : bytes or file-like object, optional
+            The bytes content of a tar file to save, or a readable binary
+            file-like object to read the content from.  tar cannot be given
             with root_dir.
         root_dir : str, optional
             Specifies the root directory for finding the directory to archive.
@@ -512,38 +1532,41 @@ class MongoDatabase(Database):
             if root_dir is None:
                 root_dir = Path.cwd()
 
-            # Make archive
-            basename = Path(root_dir, record.name)
-            filename = Path(root_dir, record.name + '.tar.gz')
-            shutil.make_archive(basename, 'gztar', root_dir=root_dir,
-                                base_dir=record.name)
-
-            # Upload archive
-            with open(filename, 'rb') as f:
-                tries = 0
-                while tries < 2:
-                    tries += 1
-                    try:
-                        mongofs.put(f, recordname=record.name)
-                        break
-                    except Exception as err:
-                        if tries == 2:
-                            raise ValueError('Failed to upload archive 2 times') from err
-
-            # Remove local archive copy
-            filename.unlink()
+            # Stream the archive directly into GridFS
+            target = Path(root_dir, record.name)
+            tries = 0
+            while tries < 2:
+                tries += 1
+                gridin = mongofs.new_file(recordname=record.name)
+                try:
+                    with tarfile.open(fileobj=gridin, mode='w|gz') as tar:
+                        tar.add(target, record.name)
+                    gridin.close()
+                    break
+                except Exception as err:
+                    # Remove any uploaded chunks
+                    gridin.abort()
+                    if tries == 2:
+                        raise ValueError('Failed to upload archive 2 times') from err
 
         elif root_dir is None:
+            # Streams can only be uploaded again if they are seekable
+            retry = not hasattr(tar, 'read') or tar.seekable()
+            if hasattr(tar, 'read') and retry:
+                start = tar.tell()
+
             # Upload archive
             tries = 0
             while tries < 2:
                 tries += 1
                 try:
+                    if hasattr(tar, 'read') and retry:
+                        tar.seek(start)
                     mongofs.put(tar, recordname=record.name)
                     break
                 except Exception as err:
-                    if tries == 2:
-                        raise ValueError('Failed to upload archive 2 times') from err
+                    if tries == 2 or not retry:
+                        raise ValueError(f'Failed to upload archive {tries} times') from err
         else:
             raise ValueError('tar and root_dir cannot both be given')
 
@@ -551,7 +1574,8 @@ class MongoDatabase(Database):
                 record: Optional[Record] = None,
                 style: Optional[str] = None,
                 name: Optional[str] = None,
-                raw: bool = False) -> Union[tarfile.TarFile, bytes]:
+                raw: bool = False,
+                stream: bool = False) -> Union[tarfile.TarFile, bytes, BinaryIO]:
         """
         Retrieves the tar archive associated with a record in the database.
                 
@@ -566,12 +1590,17 @@ class MongoDatabase(Database):
         raw : bool, optional
             If True, return the archive as raw binary content. If 
             False, return as an open tarfile. (Default is False)
+        stream : bool, optional
+            If True, return the archive\'s raw binary content as a readable
+            file-like object so that it does not have to be loaded into
+            memory.  The caller is responsible for closing it.  Overrides
+            raw.  (Default is False)
         
         Returns
         -------
-        tarfile or str
-            The tar archive as an open tarfile if raw=False, or as a binary str if
-            raw=True.
+        tarfile, bytes or file-like object
+            The tar archive as an open tarfile if raw=False, as a binary str if
+            raw=True, or as a readable binary file-like object if stream=True.
         
         Raises
         ------
@@ -604,7 +1633,9 @@ class MongoDatabase(Database):
             raise ValueError('Multiple tars found for the record')
 
         # Return content
-        if raw is True:
+        if stream is True:
+            return tar
+        elif raw is True:
             return tar.read()
         else:
             tarobj = tarfile.open(fileobj=tar)
@@ -666,7 +1697,7 @@ class MongoDatabase(Database):
                    record: Optional[Record] = None,
                    style: Optional[str] = None,
                    name: Optional[str] = None,
-                   tar: Optional[bytes] = None,
+                   tar: Union[bytes, BinaryIO, None] = None,
                    root_dir: Optional[Path] = None):
         """
         Replaces an existing tar archive for a record with a new one. 
@@ -681,8 +1712,9 @@ class MongoDatabase(Database):
             The name to use in uniquely identifying the record.
         style : str, optional
             The style to use in uniquely identifying the record.
-        tar : bytes, optional
-            The bytes content of a tar file to save.  tar cannot be given
+        tar : bytes or file-like object, optional
+            The bytes content of a tar file to save, or a readable binary
+            file-like object to read the content from.  tar cannot be given
             with root_dir.
         root_dir : str, optional
             Specifies the root directory for finding the directory to archive.
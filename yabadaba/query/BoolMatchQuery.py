@@ -48,6 +48,35 @@ class BoolMatchQuery(Query):
         if isinstance(value, bool):
             querylist.append( {path: value} )
 
+    def sql(self,
+            querylist: list,
+            params: list,
+            value: Any):
+        """
+        Builds an SQL WHERE condition for the field.  The conditions are used
+        to prefilter metadata stored in SQL tables, so they are only required
+        to match a superset of the records that the pandas query matches.
+
+        Parameters
+        ----------
+        querylist : list
+            The working list of SQL conditions which is to be appended with
+            the condition for this query object.
+        params : list
+            The working list of parameter values for the conditions' ?
+            placeholders.
+        value : any
+            The value of the field to query on.  If None, then no new
+            condition will be added.
+        """
+        # Only top-level metadata fields are supported
+        if not isinstance(value, bool) or self.parent is not None:
+            return
+
+        # Bools are stored as ints
+        querylist.append(f'{self.sqlcolumn} = ?')
+        params.append(int(value))
+
     def pandas(self,
                df: pd.DataFrame,
                value: Any) -> pd.Series:
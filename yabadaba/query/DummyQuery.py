@@ -85,6 +85,32 @@ class DummyQuery(Query):
             if self.value not in aslist(value):
                 querylist.append( {'nonexistantpath': {'$exists': True} } )
 
+    def sql(self,
+            querylist: list,
+            params: list,
+            value: Any):
+        """
+        Builds an SQL WHERE condition for the field.  The conditions are used
+        to prefilter metadata stored in SQL tables, so they are only required
+        to match a superset of the records that the pandas query matches.
+
+        Parameters
+        ----------
+        querylist : list
+            The working list of SQL conditions which is to be appended with
+            the condition for this query object.
+        params : list
+            The working list of parameter values for the conditions' ?
+            placeholders.
+        value : any
+            The value of the field to query on.  If None, then no new
+            condition will be added.
+        """
+        # Build an always false condition if self.value not in value
+        if value is not None and self.value is not None:
+            if self.value not in aslist(value):
+                querylist.append('0')
+
     def pandas(self,
                df: pd.DataFrame,
                value: Any) -> pd.Series:
@@ -125,6 +125,52 @@ class FloatQuery(Query):
             # Append newquery to querylist
             querylist.append(newquery)
 
+    def sql(self,
+            querylist: list,
+            params: list,
+            value: Any):
+        """
+        Builds an SQL WHERE condition for the field.  The conditions are used
+        to prefilter metadata stored in SQL tables, so they are only required
+        to match a superset of the records that the pandas query matches.
+
+        Parameters
+        ----------
+        querylist : list
+            The working list of SQL conditions which is to be appended with
+            the condition for this query object.
+        params : list
+            The working list of parameter values for the conditions' ?
+            placeholders.
+        value : any
+            The value of the field to query on.  If None, then no new
+            condition will be added.
+        """
+        # Only top-level metadata fields are supported
+        if value is None or self.parent is not None:
+            return
+
+        # Handle unique case of a single 2-value tuple
+        if isinstance(value, tuple) and len(value) == 2:
+            value = [value]
+
+        # Build a range condition for each value
+        conditions = []
+        for v in iaslist(value):
+            if isinstance(v, tuple) and len(v) == 2:
+                minval, maxval = self.range_check(v)
+            else:
+                if self.unit is None:
+                    v = float(v)
+                else:
+                    v = float(uc.get_in_units(uc.set_in_units(v), self.unit))
+                minval = v - self.atol
+                maxval = v + self.atol
+            conditions.append(f'{self.sqlcolumn} BETWEEN ? AND ?')
+            params.extend([float(minval), float(maxval)])
+
+        querylist.append(f'({" OR ".join(conditions)})')
+
     def pandas(self,
                df: pd.DataFrame,
                value: Any) -> pd.Series:
@@ -2,6 +2,7 @@
 
 # Standard Python libraries
 from typing import Any, Optional
+import json
 
 import pandas as pd
 
@@ -56,6 +57,40 @@ class ListContainsQuery(Query):
             # Append newquery to querylist
             querylist.append(newquery)
 
+    def sql(self,
+            querylist: list,
+            params: list,
+            value: Any):
+        """
+        Builds an SQL WHERE condition for the field.  The conditions are used
+        to prefilter metadata stored in SQL tables, so they are only required
+        to match a superset of the records that the pandas query matches.
+
+        Parameters
+        ----------
+        querylist : list
+            The working list of SQL conditions which is to be appended with
+            the condition for this query object.
+        params : list
+            The working list of parameter values for the conditions' ?
+            placeholders.
+        value : any
+            The value of the field to query on.  If None, then no new
+            condition will be added.
+        """
+        # Only top-level metadata fields are supported
+        if value is None or self.parent is not None:
+            return
+
+        # Lists are stored as JSON: check for each str value's JSON
+        # representation.  Other values can equal list items with different
+        # JSON representations, e.g. 1 and 1.0, so they are left to pandas.
+        for v in iaslist(value):
+            if not isinstance(v, str):
+                continue
+            querylist.append(f'instr({self.sqlcolumn}, ?) > 0')
+            params.append(json.dumps(v))
+
     def pandas(self,
                df: pd.DataFrame,
                value: Any) -> pd.Series:
@@ -51,6 +51,36 @@ class MonthMatchQuery(Query):
             val = [f'--{int(v):02}' for v in iaslist(value)]
             querylist.append( {path: {'$in': val} } )
 
+    def sql(self,
+            querylist: list,
+            params: list,
+            value: Any):
+        """
+        Builds an SQL WHERE condition for the field.  The conditions are used
+        to prefilter metadata stored in SQL tables, so they are only required
+        to match a superset of the records that the pandas query matches.
+
+        Parameters
+        ----------
+        querylist : list
+            The working list of SQL conditions which is to be appended with
+            the condition for this query object.
+        params : list
+            The working list of parameter values for the conditions' ?
+            placeholders.
+        value : any
+            The value of the field to query on.  If None, then no new
+            condition will be added.
+        """
+        # Only top-level metadata fields are supported
+        if value is None or self.parent is not None:
+            return
+
+        # Build the condition
+        value = [int(v) for v in iaslist(value)]
+        querylist.append(f'{self.sqlcolumn} IN ({", ".join("?" * len(value))})')
+        params.extend(value)
+
     def pandas(self,
                df: pd.DataFrame,
                value: Any) -> pd.Series:
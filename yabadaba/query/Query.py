@@ -107,6 +107,11 @@ class Query():
         else:
             raise TypeError('path must be None or a string')
 
+    @property
+    def sqlcolumn(self) -> str:
+        """str: The quoted SQL column identifier for the metadata key."""
+        return '"' + self.name.replace('"', '""') + '"'
+
     @property
     def description(self) -> str:
         """str: Describes the query operation"""
@@ -138,6 +143,30 @@ class Query():
         # Do nothing - base class
         pass
 
+    def sql(self,
+            querylist: list,
+            params: list,
+            value: Any):
+        """
+        Builds an SQL WHERE condition for the field.  The conditions are used
+        to prefilter metadata stored in SQL tables, so they are only required
+        to match a superset of the records that the pandas query matches.
+
+        Parameters
+        ----------
+        querylist : list
+            The working list of SQL conditions which is to be appended with
+            the condition for this query object.
+        params : list
+            The working list of parameter values for the conditions' ?
+            placeholders.
+        value : any
+            The value of the field to query on.  If None, then no new
+            condition will be added.
+        """
+        # Do nothing - base class
+        pass
+
     def pandas(self,
                df: pd.DataFrame, 
                value: Any) -> pd.Series:
@@ -3,7 +3,7 @@ import types
 import functools
 from pathlib import Path
 from importlib import resources
-from typing import Union, Optional, Any
+from typing import Union, Optional, Any, Tuple
 import io
 from tarfile import TarFile
 
@@ -21,6 +21,7 @@ import pandas as pd
 from DataModelDict import DataModelDict as DM
 
 from .. import load_query, load_value
+from ..tools import aslist
 
 class Record():
     """
@@ -570,6 +571,49 @@ class Record():
 
         return querydict
 
+    def mongosort(self,
+                  sort: Union[str, list],
+                  ascending: bool = True) -> list:
+        """
+        Builds a Mongo-style sort specification for metadata keys of the
+        record style.
+
+        Parameters
+        ----------
+        sort : str or list
+            The metadata key(s) to sort by.
+        ascending : bool, optional
+            Indicates if the sort is in ascending (True, default) or
+            descending (False) order.
+
+        Returns
+        -------
+        list
+            The (path, direction) pairs for sorting the database entries.
+
+        Raises
+        ------
+        ValueError
+            If a key is not a top-level metadata key of the record style.
+        """
+        direction = 1 if ascending else -1
+
+        # Map metadata keys to model paths
+        paths = {}
+        if self.noname is False:
+            paths['name'] = 'name'
+        for value_object in self.value_objects:
+            if value_object.metadatakey is not False and value_object.metadataparent is None:
+                paths[value_object.metadatakey] = f'content.{self.modelroot}.{value_object.modelpath}'
+
+        sortlist = []
+        for key in aslist(sort):
+            if key not in paths:
+                raise ValueError(f'cannot sort by {key}: not a metadata key of {self.style}')
+            sortlist.append((paths[key], direction))
+
+        return sortlist
+
     def cdcsquery(self,
                   **kwargs: any) -> dict:
         """
@@ -598,6 +642,49 @@ class Record():
 
         return querydict
 
+    def sqlquery(self,
+                 name: Union[str, list, None] = None,
+                 **kwargs: any) -> Tuple[str, list]:
+        """
+        Builds an SQL WHERE clause based on kwargs values for the record
+        style.  Note that the clause is meant to prefilter metadata tables
+        and pandasfilter should still be applied to the selected rows.
+
+        Parameters
+        ----------
+        name : str or list, optional
+            The record name(s) to parse by.
+        **kwargs : any
+            Any of the record style-specific search parameters.
+
+        Returns
+        -------
+        where : str
+            The WHERE clause conditions, with ? placeholders for values.
+        params : list
+            The values for the placeholders.
+        """
+        # Get the dict of queries
+        queries = self.queries
+
+        # Initialize the lists of conditions and parameters
+        querylist = []
+        params = []
+
+        # Query name
+        if self.noname is False:
+            load_query('str_match', name='name').sql(querylist, params, name)
+        elif name is not None:
+            raise ValueError('name turned off for record')
+
+        # Apply queries based on given kwargs
+        for key in kwargs:
+            queries[key].sql(querylist, params, kwargs[key])
+
+        if len(querylist) == 0:
+            return '1', params
+        return ' AND '.join(querylist), params
+
     def html(self,
              render: bool = False) -> Optional[str]:
         """
@@ -0,0 +1,150 @@
+# coding: utf-8
+
+# Standard Python libraries
+from typing import Any, Callable
+
+# https://pandas.pydata.org/
+import pandas as pd
+
+# Relative imports
+from ..value import Value
+from . import recordmanager
+
+class RecordProxy():
+    """
+    Lightweight stand-in for a Record that is backed by the record's metadata.
+    The full Record is only loaded when an attribute that cannot be answered
+    by the metadata is accessed, such as model, build_model or tar.
+    """
+
+    # Attribute names mapped to metadata keys for each record class
+    __valuekeys = {}
+
+    def __init__(self,
+                 style: str,
+                 metadata: dict,
+                 loader: Callable,
+                 database = None):
+        """
+        Initializes a RecordProxy.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+        metadata : dict
+            The metadata for the record.  Must include the record's name.
+            Missing (NaN) values are ignored.
+        loader : callable
+            A function with no arguments that returns the full Record.
+        database : yabadaba.Database, optional
+            The Database that the record is from.
+        """
+        self.__style = style
+        self.__metadata = {key: value for key, value in metadata.items()
+                           if not (pd.api.types.is_scalar(value) and pd.isna(value))}
+        self.__loader = loader
+        self.__database = database
+        self.__record = None
+
+    @classmethod
+    def valuekeys(cls, style: str) -> dict:
+        """
+        Identifies the values of a record style whose attributes are
+        identical to their metadata values.
+
+        Parameters
+        ----------
+        style : str
+            The record style.
+
+        Returns
+        -------
+        dict
+            The attribute names mapped to the corresponding metadata keys.
+        """
+        if style not in cls.__valuekeys:
+            valuekeys = {}
+            for value in recordmanager.init(style).value_objects:
+                if (value.metadatakey is not False
+                    and value.metadataparent is None
+                    and getattr(value, 'unit', None) is None
+                    and type(value).metadata_value is Value.metadata_value):
+                    valuekeys[value.name] = value.metadatakey
+            cls.__valuekeys[style] = valuekeys
+        return cls.__valuekeys[style]
+
+    def __str__(self) -> str:
+        """str: The string representation of the record"""
+        return f'{self.style} record named {self.name}'
+
+    def __repr__(self) -> str:
+        return f'<RecordProxy: {self}>'
+
+    @property
+    def style(self) -> str:
+        """str: The record style"""
+        return self.__style
+
+    @property
+    def name(self) -> str:
+        """str: The record's name"""
+        if self.__record is not None:
+            return self.__record.name
+        return self.__metadata['name']
+
+    @property
+    def database(self):
+        """yabadaba.Database or None: The Database that the record is from"""
+        if self.__record is not None:
+            return self.__record.database
+        return self.__database
+
+    @property
+    def loaded(self) -> bool:
+        """bool: Indicates if the full Record has been loaded"""
+        return self.__record is not None
+
+    @property
+    def record(self):
+        """Record: The full Record, which is loaded on first access"""
+        if self.__record is None:
+            self.__record = self.__loader()
+        return self.__record
+
+    def metadata(self) -> dict:
+        """
+        Returns the record's metadata.  Uses the stored metadata unless the
+        full Record has already been loaded.
+
+        Returns
+        -------
+        dict
+            The record's metadata.
+        """
+        if self.__record is not None:
+            return self.__record.metadata()
+        return dict(self.__metadata)
+
+    def __getattr__(self, name: str) -> Any:
+        """Gets metadata-backed values or the attributes of the full Record"""
+        if name.startswith('_RecordProxy__') or name.startswith('__'):
+            raise AttributeError(name)
+
+        # Check the stored metadata
+        if self.__record is None:
+            valuekeys = self.valuekeys(self.style)
+            if name in valuekeys and valuekeys[name] in self.__metadata:
+                return self.__metadata[valuekeys[name]]
+
+        return getattr(self.record, name)
+
+    def __setattr__(self, name: str, value: Any):
+        """Sets private attributes locally and all others on the full Record"""
+        if name.startswith('_RecordProxy__'):
+            super().__setattr__(name, value)
+        else:
+            setattr(self.record, name, value)
+
+    def __dir__(self):
+        return sorted(set(super().__dir__() + list(self.valuekeys(self.style))))
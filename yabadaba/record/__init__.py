@@ -1,5 +1,5 @@
 # coding: utf-8
-__all__ = ['Record', 'recordmanager', 'load_record']
+__all__ = ['Record', 'RecordProxy', 'recordmanager', 'load_record']
 
 # Standard Python libraries
 from typing import Optional, Union
@@ -14,6 +14,8 @@ from ..tools import ModuleManager
 # Initialize ModuleManager for records
 recordmanager = ModuleManager('Record')
 
+from .RecordProxy import RecordProxy
+
 # Define load_record
 def load_record(style: str,
                 model: Union[str, DM, None] = None,
@@ -0,0 +1,125 @@
+# coding: utf-8
+# Standard Python libraries
+import os
+from tarfile import TarFile, TarInfo
+from typing import Optional
+
+class IndexedTarFile(TarFile):
+    """
+    TarFile for uncompressed tar archives that uses an index of the member
+    header offsets to read individual members without scanning the archive.
+    """
+
+    def __init__(self,
+                 name: Optional[str] = None,
+                 mode: str = 'r',
+                 fileobj = None,
+                 index: Optional[dict] = None,
+                 **kwargs):
+        """
+        Opens an uncompressed tar archive for reading.
+
+        Parameters
+        ----------
+        name : str, optional
+            The path to the tar archive.
+        mode : str, optional
+            The mode to open the archive in.  Default value is 'r'.
+        fileobj : file-like object, optional
+            A seekable file-like object to read the archive from instead of
+            name.
+        index : dict, optional
+            The index of the archive as generated by build_index.  If not
+            given or if the index's size does not match the archive's size,
+            members are found by scanning the archive like TarFile does.
+        **kwargs : any, optional
+            Any other keyword arguments supported by TarFile.
+        """
+        super().__init__(name=name, mode=mode, fileobj=fileobj, **kwargs)
+
+        # Only use the index if it matches the archive
+        self.__index = None
+        if index is not None:
+            position = self.fileobj.tell()
+            self.fileobj.seek(0, os.SEEK_END)
+            if self.fileobj.tell() == index['size']:
+                self.__index = index['members']
+            self.fileobj.seek(position)
+
+    @staticmethod
+    def build_index(tar: TarFile,
+                    size: int) -> dict:
+        """
+        Builds the index of an uncompressed tar archive.
+
+        Parameters
+        ----------
+        tar : tarfile.TarFile
+            The open tar archive.
+        size : int
+            The size of the archive file in bytes.  Used to check that the
+            index matches the archive it is used with.
+
+        Returns
+        -------
+        dict
+            The archive size and the header offset of each member by name.
+        """
+        members = {}
+        for member in tar:
+            members[os.path.normpath(member.name)] = member.offset
+        return {'size': size, 'members': members}
+
+    @property
+    def indexed(self) -> bool:
+        """bool: Indicates if members are found using the index"""
+        return self.__index is not None
+
+    def getmember(self, name: str) -> TarInfo:
+        """
+        Return a TarInfo object for member name.  If the archive is indexed,
+        only the member's header is read.
+
+        Parameters
+        ----------
+        name : str
+            The name of the member.
+
+        Returns
+        -------
+        tarfile.TarInfo
+            The member's info.
+
+        Raises
+        ------
+        KeyError
+            If name is not found in the archive.
+        """
+        if self.__index is None:
+            return super().getmember(name)
+
+        offset = self.__index.get(os.path.normpath(str(name)))
+        if offset is None:
+            raise KeyError(f'filename {name!r} not found')
+
+        # Read the member's header without moving the scan position
+        scanoffset = self.offset
+        try:
+            self.fileobj.seek(offset)
+            return TarInfo.fromtarfile(self)
+        finally:
+            self.offset = scanoffset
+
+    def getnames(self) -> list:
+        """
+        Return the members of the archive as a list of their names.  If the
+        archive is indexed, the names are taken from the index.
+
+        Returns
+        -------
+        list
+            The member names.
+        """
+        if self.__index is None:
+            return super().getnames()
+        return list(self.__index)
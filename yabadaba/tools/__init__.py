@@ -1,10 +1,11 @@
 # coding: utf-8
 __all__ = sorted(['aslist', 'iaslist', 'screen_input', 'dict_insert',
-                  'ModuleManager', 'is_uuid'])
+                  'ModuleManager', 'is_uuid', 'IndexedTarFile'])
 
 # Relative imports
 from cdcs import aslist, iaslist
 from .screen_input import screen_input
 from .dict_insert import dict_insert
 from .ModuleManager import ModuleManager
-from .is_uuid import is_uuid
\ No newline at end of file
+from .is_uuid import is_uuid
+from .IndexedTarFile import IndexedTarFile
\ No newline at end of file